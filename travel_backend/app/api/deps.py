@@ -1,6 +1,9 @@
-from typing import Generator, Optional
+from typing import Any, Callable, Dict, Generator, Iterable, Optional, Set, Type
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
@@ -66,4 +69,50 @@ async def get_current_active_superuser(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def sparse_fields(allowed: Iterable[str]) -> Callable[..., Optional[Set[str]]]:
+    """
+    Dependency factory for a `fields=` query parameter (comma-separated field names).
+    The dependency returns the requested subset of `allowed`, or None when the
+    parameter is absent (meaning all fields). Unknown names give a 400.
+    """
+    allowed_fields = frozenset(allowed)
+
+    def get_fields(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Comma-separated subset of fields to return: {', '.join(sorted(allowed_fields))}. `id` is always included."
+        )
+    ) -> Optional[Set[str]]:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - allowed_fields
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+        return requested | {"id"}
+
+    return get_fields
+
+
+def sparse_response(schema: Type[BaseModel], data: Any, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    """
+    Serializes a sparse fieldset result (a dict or list of dicts holding a subset of
+    `schema`'s fields). Each present field is validated with its schema definition;
+    the endpoint's response_model can't be used since it requires every field.
+    """
+    def validate(item: Dict[str, Any]) -> Dict[str, Any]:
+        validated = {}
+        for name, value in item.items():
+            value, errors = schema.__fields__[name].validate(value, validated, loc=name, cls=schema)
+            if errors:
+                raise ValueError(f"Invalid value for field '{name}' of {schema.__name__}: {errors}")
+            validated[name] = value
+        return validated
+
+    content = [validate(item) for item in data] if isinstance(data, list) else validate(data)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
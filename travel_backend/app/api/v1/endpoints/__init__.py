@@ -2,4 +2,5 @@ from . import auth
 from . import cities # Add the new cities endpoint module
 from . import places
 from . import users # <<< Add this
+from . import search
 # Import other endpoint modules
\ No newline at end of file
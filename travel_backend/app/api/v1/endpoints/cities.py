@@ -1,10 +1,11 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, Path, Query, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Path, Query, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Set
 
 from app import crud, schemas # Import top-level crud and schemas
 from app.api import deps # Import dependencies (like get_db)
 from app.core.config import settings # Import settings for defaults
+from app.core.pagination import InvalidCursorError
 from app.schemas import City as CitySchema # Import and potentially alias
 from app.schemas import City as CityListSchema # Schema for list
 from app.schemas import CityDetail as CityDetailSchema # Schema for detail
@@ -16,10 +17,11 @@ router = APIRouter()
     "/popular",
     response_model=List[CitySchema], # Response uses the schema
     summary="Get Popular Cities with Images (Optimized)",
-    description="Retrieves a list of popular cities with images. Fetches missing images in the background.",
+    description="Retrieves cities ordered by popularity, with images. Fetches missing images in the background.",
 )
 async def read_popular_cities(
     background_tasks: BackgroundTasks, # Inject BackgroundTasks dependency
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     limit: int = Query(
         settings.DEFAULT_PAGE_SIZE,
@@ -32,28 +34,38 @@ async def read_popular_cities(
         ge=0,
         description="Number of cities to skip."
     ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned for the previous page. Replaces `offset`."),
     country: Optional[str] = Query(
         None,
         description="Filter cities by country name (case-insensitive, partial match)."
     ),
 ) -> Any:
     """
-    Retrieves popular cities based on pre-populated data.
+    Retrieves cities ordered by their precomputed popularity score
+    (population, number of places and their favorites/visits, refreshed by scripts/refresh_popularity.py).
 
     - Fetches existing images efficiently.
     - Triggers **background tasks** to fetch images from Wikimedia if missing.
-    - Supports pagination (`limit`, `offset`) and filtering (`country`).
+    - Supports pagination (`limit`, `offset` or `cursor`) and filtering (`country`).
+    - When another page exists its cursor is returned in the `X-Next-Cursor` header.
     """
     # Call the optimized CRUD function, passing background_tasks object
-    cities_data = await crud.crud_city.get_popular_cities_optimized(
-        db=db,
-        background_tasks=background_tasks, # Pass it here
-        country_name=country,
-        skip=offset,
-        limit=limit
-    )
+    try:
+        page = await crud.crud_city.get_popular_cities_optimized(
+            db=db,
+            background_tasks=background_tasks, # Pass it here
+            country_name=country,
+            cursor=cursor,
+            skip=offset,
+            limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
     # FastAPI automatically validates the returned list of dicts against List[CitySchema]
-    return cities_data
+    return page["items"]
 
 # You can add other city-related endpoints to this router later
 # e.g., GET /cities/{city_id}
@@ -68,6 +80,7 @@ async def read_city_detail(
     background_tasks: BackgroundTasks, # Needed for underlying image/detail fetching
     city_id: int = Path(..., title="The ID of the city to retrieve", ge=1),
     db: AsyncSession = Depends(deps.get_db),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(crud.crud_city.CITY_DETAIL_FIELDS)),
 ) -> Any:
     """
     Retrieves comprehensive details for a single city, including:
@@ -75,13 +88,19 @@ async def read_city_detail(
     - Cached images
     - Cached description, travel info (if available)
     - Live or recently cached weather data
+
+    `fields` limits the response to the listed keys; weather is only looked up
+    (and possibly fetched live) when `current_weather` or `weather_last_updated` is requested.
     """
     city_details = await crud.crud_city.get_city_details(
-        db=db, city_id=city_id, background_tasks=background_tasks
+        db=db, city_id=city_id, background_tasks=background_tasks, fields=fields
     )
 
     if not city_details:
         raise HTTPException(status_code=404, detail="City not found")
 
+    if fields is not None:
+        return deps.sparse_response(CityDetailSchema, city_details)
+
     # FastAPI validates the returned dict against CityDetailSchema
     return city_details
\ No newline at end of file
@@ -1,14 +1,24 @@
 # app/api/v1/endpoints/places.py
+import hashlib
+import json
+from datetime import datetime
 from enum import Enum
-from fastapi import APIRouter, BackgroundTasks, Depends, Query, HTTPException, Path
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Query, HTTPException, Path, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 from app import crud, schemas # Use top-level imports
 from app.api import deps
 from app.core.config import settings # For pagination defaults
+from app.core.pagination import InvalidCursorError
 from app.schemas import PlaceDetail as PlaceDetailSchema # Schema for detail
 from app.schemas import Place as PlaceListSchema
+from app.schemas import PlaceNearby as PlaceNearbySchema
+from app.schemas import PlaceTrending as PlaceTrendingSchema
+from app.schemas import PlaceSimilar as PlaceSimilarSchema
+from app.schemas import PlacePage as PlacePageSchema
+from app.schemas import CategoryCatalog as CategoryCatalogSchema
+from app.schemas import PlaceClusterMarker as PlaceClusterMarkerSchema
 
 router = APIRouter()
 
@@ -16,7 +26,9 @@ class PlaceSortOptions(str, Enum):
     relevance = "relevance"
     name_asc = "name_asc"
     name_desc = "name_desc"
-    # Add more later e.g., distance_asc, rating_desc
+    distance_asc = "distance_asc" # Needs lat/lon
+    popular = "popular" # Favorites + recent visits
+    # Add more later e.g., rating_desc
 
 # Keep /categories endpoint from before
 @router.get(
@@ -27,14 +39,137 @@ class PlaceSortOptions(str, Enum):
 )
 async def read_place_categories(
     db: AsyncSession = Depends(deps.get_db),
+    city_id: Optional[int] = Query(None, description="Only categories used by places in this city."),
 ) -> Any:
     """
     Fetches a sorted list of unique categories assigned to places
     in the database. Useful for populating filter options.
     """
-    categories = await crud.crud_place.get_distinct_categories(db=db)
+    categories = await crud.crud_place.get_distinct_categories(db=db, city_id=city_id)
     return categories
 
+@router.get(
+    "/categories/counts",
+    response_model=CategoryCatalogSchema,
+    summary="Get Place Categories with Counts",
+    description="Categories with their number of places, globally or for one city.",
+    responses={304: {"description": "Counts unchanged since the ETag in If-None-Match"}}
+)
+async def read_place_category_counts(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
+    city_id: Optional[int] = Query(None, description="Count only places in this city."),
+    if_none_match: Optional[str] = Header(None),
+) -> Any:
+    """
+    Served from an in-memory catalog maintained as places are written.
+    The ETag is a hash of the counts, clients can revalidate with If-None-Match.
+    (The catalog version is per process, it differs between workers and restarts.)
+    """
+    catalog = await crud.crud_place.get_category_counts(db=db, city_id=city_id)
+    counts = json.dumps([catalog["city_id"], catalog["categories"]], separators=(",", ":"), sort_keys=True)
+    etag = '"categories-' + hashlib.sha1(counts.encode()).hexdigest()[:16] + '"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return catalog
+
+
+
+def parse_attribute_filters(values: List[str]) -> Optional[Dict[str, List[str]]]:
+    """
+    Parses attr=key:value filters into {key: [values]}. Splits on the last colon,
+    so namespaced OSM keys work (`diet:vegan:yes` is key `diet:vegan`, value `yes`).
+    """
+    if len(values) > settings.MAX_ATTRIBUTE_FILTERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_ATTRIBUTE_FILTERS} attr filters are allowed.")
+    attributes: Dict[str, List[str]] = {}
+    for value in values:
+        key, sep, tag_value = value.rpartition(":")
+        if not sep or not key.strip() or not tag_value.strip():
+            raise HTTPException(status_code=400, detail=f"Invalid attr filter '{value}', expected key:value.")
+        tag_values = attributes.setdefault(key.strip(), [])
+        if tag_value.strip() not in tag_values:
+            tag_values.append(tag_value.strip())
+    return attributes or None
+
+
+class PlaceListParams:
+    """
+    Query parameters shared by the place listing endpoints (/ and /browse).
+    Used as a dependency so both endpoints always accept the same filters.
+    """
+    def __init__(
+        self,
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        offset: int = Query(0, ge=0),
+        cursor: Optional[str] = Query(None, description="Opaque cursor returned for the previous page. Replaces `offset`."),
+        city_id: Optional[int] = Query(None),
+        category: Optional[str] = Query(None),
+        q: Optional[str] = Query(None, description="Full-text search query across name, category, description."), # <<< Add q
+        sort_by: Optional[PlaceSortOptions] = Query(PlaceSortOptions.name_asc, description="Sorting order for results."), # <<< Add sort_by
+        lat: Optional[float] = Query(None, ge=-90, le=90, description="Origin latitude for sort_by=distance_asc."),
+        lon: Optional[float] = Query(None, ge=-180, le=180, description="Origin longitude for sort_by=distance_asc."),
+        open_now: bool = Query(False, description="Only places open now (in the city's local time when city_id is given)."),
+        open_at: Optional[datetime] = Query(None, description="Only places open at this local wall-clock time at the place, e.g. 2026-05-01T19:30."),
+        attr: Optional[List[str]] = Query(
+            None,
+            description="OSM tag filter `key:value`, repeatable (e.g. `attr=wheelchair:yes&attr=outdoor_seating:yes`). "
+                        "Different keys must all match, repeating a key accepts any of its values."
+        ),
+    ):
+        if open_now and open_at is not None:
+            raise HTTPException(status_code=400, detail="Use either open_now or open_at, not both.")
+        # Ensure sort_by relevance is only used if q is provided
+        if sort_by == PlaceSortOptions.relevance and not q:
+            sort_by = PlaceSortOptions.name_asc # Default if relevance requested without query
+        # Same for distance without an origin
+        if sort_by == PlaceSortOptions.distance_asc and (lat is None or lon is None):
+            sort_by = PlaceSortOptions.name_asc
+
+        self.limit = limit
+        self.offset = offset
+        self.cursor = cursor
+        self.city_id = city_id
+        self.category = category
+        self.q = q
+        self.sort_by = sort_by
+        self.lat = lat
+        self.lon = lon
+        self.open_now = open_now
+        self.open_at = open_at
+        self.attributes = parse_attribute_filters(attr or [])
+
+
+async def _get_places_page(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    params: PlaceListParams,
+    with_facets: bool = False,
+    fields: Optional[Set[str]] = None
+) -> dict:
+    """Runs crud_place.get_places for the shared listing parameters, mapping cursor errors to 400."""
+    try:
+        return await crud.crud_place.get_places(
+            db=db,
+            background_tasks=background_tasks,
+            city_id=params.city_id,
+            category=params.category,
+            q=params.q, # Pass search query
+            sort_by=params.sort_by.value if params.sort_by else None, # Pass sorting value
+            latitude=params.lat,
+            longitude=params.lon,
+            open_now=params.open_now,
+            open_at=params.open_at,
+            attributes=params.attributes,
+            cursor=params.cursor,
+            skip=params.offset,
+            limit=params.limit,
+            with_facets=with_facets,
+            fields=fields
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get(
@@ -45,38 +180,223 @@ async def read_place_categories(
 )
 async def read_places(
     background_tasks: BackgroundTasks,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
-    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
-    offset: int = Query(0, ge=0),
-    city_id: Optional[int] = Query(None),
-    category: Optional[str] = Query(None),
-    q: Optional[str] = Query(None, description="Full-text search query across name, category, description."), # <<< Add q
-    sort_by: Optional[PlaceSortOptions] = Query(PlaceSortOptions.name_asc, description="Sorting order for results.") # <<< Add sort_by
+    params: PlaceListParams = Depends(),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(crud.crud_place.PLACE_LIST_FIELDS)),
 ) -> Any:
     """
     Retrieves a list of places with filtering, search, and sorting.
 
     - Fetches existing images efficiently.
     - Triggers background tasks to fetch images from Wikimedia if missing.
-    - Supports pagination (`limit`, `offset`), filtering (`city_id`, `category`),
-      full-text search (`q`), and sorting (`sort_by`).
+    - Supports pagination (`limit`, `offset` or `cursor`), filtering (`city_id`, `category`),
+      full-text search (`q`), opening hours (`open_now`, `open_at`), OSM tags (`attr`)
+      and sorting (`sort_by`, `distance_asc` with `lat`/`lon`).
+    - When another page exists its cursor is returned in the `X-Next-Cursor` header.
+      Cursor pages cost the same at any depth, `offset` is kept for compatibility.
+    - `fields` limits each item to the listed keys; only those columns are read
+      and images are neither loaded nor fetched unless requested.
     """
-    # Ensure sort_by relevance is only used if q is provided
-    if sort_by == PlaceSortOptions.relevance and not q:
-         sort_by = PlaceSortOptions.name_asc # Default if relevance requested without query
+    page = await _get_places_page(db, background_tasks, params, fields=fields)
+
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    if fields is not None:
+        return deps.sparse_response(PlaceListSchema, page["items"], headers=dict(response.headers))
+    return page["items"]
 
-    places = await crud.crud_place.get_places(
+@router.get(
+    "/browse",
+    response_model=PlacePageSchema,
+    summary="Browse Places with Category Facets",
+    description="Same filters as GET /places/, returned as a page object with the next cursor and per-category counts."
+)
+async def browse_places(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    params: PlaceListParams = Depends(),
+    include_facets: bool = Query(True, description="Include place counts per category for the current city/q filter."),
+) -> Any:
+    """
+    Retrieves one page of places together with category facet counts.
+
+    - Facets ignore the `category` filter, so each chip shows how many results selecting it gives.
+    - Items, next cursor and facets come from a single database query.
+    """
+    page = await _get_places_page(db, background_tasks, params, with_facets=include_facets)
+    return page
+
+# Must be declared before /{place_id} so "nearby" isn't parsed as an ID
+@router.get(
+    "/nearby",
+    response_model=List[PlaceNearbySchema],
+    summary="Get Places Near a Point",
+    description="Retrieve places within a radius of a coordinate (or the k nearest), closest first."
+)
+async def read_nearby_places(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search origin."),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the search origin."),
+    radius_m: Optional[float] = Query(
+        settings.DEFAULT_NEARBY_RADIUS_M,
+        gt=0,
+        le=settings.MAX_NEARBY_RADIUS_M,
+        description="Search radius in metres. Ignored when `nearest` is set."
+    ),
+    nearest: bool = Query(False, description="Return the `limit` nearest places regardless of distance."),
+    category: Optional[str] = Query(None),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> Any:
+    """
+    Retrieves places sorted by distance from (`lat`, `lon`).
+
+    - Radius and k-nearest queries are both served by the spatial (GiST) index.
+    - Each place includes its `distance_m` from the origin.
+    """
+    places = await crud.crud_place.get_nearby_places(
         db=db,
         background_tasks=background_tasks,
-        city_id=city_id,
+        latitude=lat,
+        longitude=lon,
+        radius_m=None if nearest else radius_m,
         category=category,
-        q=q, # Pass search query
-        sort_by=sort_by.value if sort_by else None, # Pass sorting value
-        skip=offset,
         limit=limit
     )
     return places
 
+class TrendingWindow(str, Enum):
+    last_24h = "24h"
+    last_7d = "7d"
+
+@router.get(
+    "/trending",
+    response_model=List[PlaceTrendingSchema],
+    summary="Get Trending Places",
+    description="Most visited places over the last 24 hours or 7 days, optionally within one city."
+)
+async def read_trending_places(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    city_id: Optional[int] = Query(None),
+    window: TrendingWindow = Query(TrendingWindow.last_24h, description="Time window of the ranking."),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> Any:
+    """
+    Retrieves the places with the most visits in the window, most visited first.
+
+    - Counts come from hourly visit counters, not from the full visit history.
+    - Rankings are cached for a few minutes.
+    """
+    places = await crud.crud_place.get_trending_places(
+        db=db,
+        background_tasks=background_tasks,
+        window=window.value,
+        city_id=city_id,
+        limit=limit
+    )
+    return places
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parses "min_lon,min_lat,max_lon,max_lat", raising a 400 on malformed input."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'min_lon,min_lat,max_lon,max_lat'.")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range.")
+    return min_lon, min_lat, max_lon, max_lat
+
+@router.get(
+    "/clusters",
+    response_model=List[PlaceClusterMarkerSchema],
+    summary="Get Clustered Place Markers for a Map Viewport",
+    description="Precomputed marker clusters (centroid, count, representative place) for a bounding box and zoom level."
+)
+async def read_place_clusters(
+    db: AsyncSession = Depends(deps.get_db),
+    bbox: str = Query(..., description="Viewport as min_lon,min_lat,max_lon,max_lat (min_lon > max_lon crosses the antimeridian)."),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level."),
+) -> Any:
+    """
+    Returns at most one marker per ~32px grid cell of the viewport.
+
+    - Clusters are precomputed per zoom level (scripts/refresh_place_clusters.py),
+      so the response size depends on the viewport, not on the number of places.
+    """
+    min_lon, min_lat, max_lon, max_lat = parse_bbox(bbox)
+    clusters = await crud.crud_map.get_clusters(
+        db=db, min_lon=min_lon, min_lat=min_lat, max_lon=max_lon, max_lat=max_lat, zoom=zoom
+    )
+    return clusters
+
+@router.get(
+    "/tiles/{z}/{x}/{y}",
+    summary="Get a Binary Place Marker Tile",
+    description="Place markers (id, position, category) of one slippy-map tile in a compact binary encoding.",
+    response_class=Response,
+    responses={
+        200: {"content": {"application/octet-stream": {}}, "description": "Tile in the PTL1 format (see app/services/map_tiles.py)"},
+        304: {"description": "Tile unchanged since the ETag in If-None-Match"},
+    }
+)
+async def read_place_tile(
+    z: int = Path(..., ge=crud.crud_map.MIN_TILE_ZOOM, le=crud.crud_map.MAX_TILE_ZOOM, description="Zoom level. Use /clusters below the minimum."),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Response:
+    """
+    Returns 9 bytes per marker plus a small category table, instead of full place JSON.
+
+    - Generated lazily and cached on disk, sent with long-lived cache headers and an ETag.
+    """
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+
+    data = await crud.crud_map.get_marker_tile(db=db, z=z, x=x, y=y)
+    etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.TILE_CACHE_MAX_AGE_SECONDS}",
+    }
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type="application/octet-stream", headers=headers)
+
+@router.get(
+    "/batch",
+    response_model=List[PlaceDetailSchema],
+    summary="Get Many Place Details",
+    description="Retrieve detailed information for several places in one request.",
+)
+async def read_place_details_batch(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    ids: str = Query(..., description="Comma-separated place IDs, e.g. 1,2,3."),
+) -> Any:
+    """
+    Returns the details of every requested place that exists, in the requested order.
+
+    - Unknown IDs are skipped rather than failing the whole batch.
+    - At most `MAX_PAGE_SIZE` IDs per request.
+    """
+    try:
+        place_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers.")
+    if not place_ids:
+        raise HTTPException(status_code=400, detail="At least one place ID is required.")
+    if len(place_ids) > settings.MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_PAGE_SIZE} IDs per request.")
+
+    places = await crud.crud_place.get_places_details_batch(
+        db=db, background_tasks=background_tasks, place_ids=place_ids
+    )
+    return places
+
 # --- NEW Endpoint for Place Details ---
 @router.get(
     "/{place_id}", # Path parameter for the place ID
@@ -90,20 +410,53 @@ async def read_place_detail(
     # Use Path for path parameters, adding validation like greater-than-0
     place_id: int = Path(..., title="The ID of the place to retrieve", ge=1),
     db: AsyncSession = Depends(deps.get_db),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(crud.crud_place.PLACE_DETAIL_FIELDS)),
 ) -> Any:
     """
     Retrieves comprehensive details for a single place, including images.
 
     - Fetches existing images or triggers background fetching if needed.
+    - `fields` limits the response to the listed keys (e.g. `fields=name,opening_hours`).
     - Returns a 404 error if the place ID is not found.
     """
     place_details = await crud.crud_place.get_place_details_with_images(
-        db=db, place_id=place_id, background_tasks=background_tasks
+        db=db, place_id=place_id, background_tasks=background_tasks, fields=fields
     )
 
     if not place_details:
         raise HTTPException(status_code=404, detail="Place not found")
 
+    if fields is not None:
+        return deps.sparse_response(PlaceDetailSchema, place_details)
+
     # The dictionary returned by the CRUD function will be validated
     # against the PlaceDetailSchema response_model by FastAPI.
-    return place_details
\ No newline at end of file
+    return place_details
+
+
+@router.get(
+    "/{place_id}/similar",
+    response_model=List[PlaceSimilarSchema],
+    summary="Get Similar Places",
+    description="Places that users who visited or favorited this place also visited or favorited.",
+    responses={404: {"description": "Place not found"}}
+)
+async def read_similar_places(
+    background_tasks: BackgroundTasks,
+    place_id: int = Path(..., title="The ID of the place", ge=1),
+    db: AsyncSession = Depends(deps.get_db),
+    limit: int = Query(10, ge=1, le=20, description="Maximum number of similar places."),
+) -> Any:
+    """
+    Retrieves the most similar places, most similar first.
+
+    - Neighbour lists are precomputed offline from co-visitation data.
+    - Places without enough activity return an empty list.
+    """
+    places = await crud.crud_place.get_similar_places(
+        db=db, background_tasks=background_tasks, place_id=place_id, limit=limit
+    )
+    if places is None:
+        raise HTTPException(status_code=404, detail="Place not found")
+    return places
+
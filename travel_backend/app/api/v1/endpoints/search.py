@@ -0,0 +1,52 @@
+# app/api/v1/endpoints/search.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Any, Optional
+
+from app import crud
+from app.api import deps
+from app.schemas import SearchSuggestion as SearchSuggestionSchema
+from app.schemas import SearchResults as SearchResultsSchema
+
+router = APIRouter()
+
+@router.get(
+    "",
+    response_model=SearchResultsSchema,
+    summary="Search Cities, Places and Categories",
+    description="One query across cities (by city or country name), places (full-text and name) and categories, grouped and ranked together.",
+)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100, description="Search text."),
+    limit: int = Query(5, ge=1, le=20, description="Maximum number of results per group (and in `top`)."),
+    city_id: Optional[int] = Query(None, description="Restrict places and categories to one city."),
+) -> Any:
+    """
+    Returns grouped search results plus a merged `top` list.
+
+    - Scores are on one 0-1 scale across groups, so `top` is a single ranking.
+    - The city and place sub-queries run concurrently on separate database sessions.
+    """
+    results = await crud.crud_search.search_all(q=q, limit=limit, city_id=city_id)
+    return results
+
+
+@router.get(
+    "/suggest",
+    response_model=List[SearchSuggestionSchema],
+    summary="Autocomplete Place and City Names",
+    description="Suggest place and city names for partial or misspelled input, meant to be called as the user types.",
+)
+async def read_suggestions(
+    db: AsyncSession = Depends(deps.get_db),
+    q: str = Query(..., min_length=1, max_length=100, description="Partial name typed by the user."),
+    limit: int = Query(10, ge=1, le=25, description="Maximum number of suggestions."),
+) -> Any:
+    """
+    Returns the best matching place and city names.
+
+    - Prefix matches rank first, then typo-tolerant trigram matches.
+    - Served from trigram / prefix indexes on `lower(name)`.
+    """
+    suggestions = await crud.crud_search.get_suggestions(db=db, q=q, limit=limit)
+    return suggestions
@@ -1,8 +1,8 @@
 # app/api/v1/endpoints/users.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any
-from datetime import datetime, timedelta
+from typing import List, Any, Optional
+from datetime import date, datetime, timedelta
 
 from app import crud, schemas # Import models for current_user type hint
 from app.db.models.user import User # Import User model
@@ -10,6 +10,7 @@ from app.api import deps
 from app.core.config import settings # For pagination defaults
 from app.schemas import Place as PlaceSchema # Use Place schema for favorites list
 from app.schemas import VisitHistoryEntry # Use VisitHistoryEntry schema
+from app.schemas import Itinerary
 
 router = APIRouter()
 
@@ -78,16 +79,14 @@ async def read_favorite_places(
     db: AsyncSession = Depends(deps.get_db),
     limit: int = Query(100, ge=1, le=200, description="Maximum number of favorites to return."),
     offset: int = Query(0, ge=0, description="Number of favorites to skip."),
+    city_id: Optional[int] = Query(None, description="Only favorites in this city."),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """Retrieves the list of places favorited by the current user."""
     places = await crud.crud_user_activity.get_favorite_places(
-        db=db, user_id=current_user.id, skip=offset, limit=limit
+        db=db, user_id=current_user.id, city_id=city_id, skip=offset, limit=limit
     )
-    # The returned places objects need to be converted to schema,
-    # including mapping image URLs correctly.
-    # Let's adjust CRUD to return dicts or ensure schema conversion handles images.
-    # --- Assuming Pydantic handles the Place model with its images relationship ---
+    # CRUD returns dicts matching the Place schema (image URLs already mapped)
     return places
 
 
@@ -106,6 +105,67 @@ async def read_favorite_place_ids(
     return ids
 
 
+@router.get(
+    "/me/itinerary",
+    response_model=Itinerary,
+    summary="Plan Itinerary from Favorites"
+)
+async def read_itinerary(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    city_id: int = Query(..., ge=1, description="City whose favorited places are planned."),
+    days: int = Query(1, ge=1, le=14, description="Number of days to spread the visits over."),
+    start_date: Optional[date] = Query(None, description="Date of the first day (defaults to today), used for opening hours."),
+    start_lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude each day starts from, e.g. the hotel."),
+    start_lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude each day starts from."),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Orders the current user's favorites in a city into short day routes.
+
+    - Route: nearest neighbour + 2-opt over a distance matrix, computed server-side.
+    - Visits respect the places' opening hours on each day; favorites that fit no day are listed in `unscheduled`.
+    """
+    itinerary = await crud.crud_user_activity.get_itinerary(
+        db=db,
+        user_id=current_user.id,
+        city_id=city_id,
+        days=days,
+        start_date=start_date,
+        start_latitude=start_lat,
+        start_longitude=start_lon,
+    )
+    return itinerary
+
+
+# --- Feed Endpoint ---
+
+@router.get(
+    "/me/feed",
+    response_model=List[PlaceSchema],
+    summary="Get Personalized Feed"
+)
+async def read_feed(
+    *,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_db),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of places to return."),
+    offset: int = Query(0, ge=0, description="Number of places to skip."),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieves places recommended for the current user, best first.
+
+    - Based on places similar to the user's favorites/visits and popular places in their cities.
+    - Candidates are precomputed offline, the request only re-ranks them.
+    - Users without activity get the most popular places.
+    """
+    places = await crud.crud_feed.get_feed(
+        db=db, background_tasks=background_tasks, user_id=current_user.id, skip=offset, limit=limit
+    )
+    return places
+
+
 # --- Visit History Endpoints ---
 
 @router.post(
@@ -148,7 +208,5 @@ async def read_visit_history(
     history_entries = await crud.crud_user_activity.get_visit_history(
         db=db, user_id=current_user.id, days=days, skip=offset, limit=limit
     )
-    # The history_entries are UserVisitHistory objects with Place eager loaded.
-    # Pydantic needs to convert these to the VisitHistoryEntry schema.
-    # Ensure the relationships and orm_mode=True are set correctly.
+    # CRUD returns dicts matching the VisitHistoryEntry schema
     return history_entries
\ No newline at end of file
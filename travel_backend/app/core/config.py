@@ -22,6 +22,24 @@ class Settings(BaseSettings):
     # Pagination (Optional, using defaults from .env)
     DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", 20))
     MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", 100))
+    # Nearby search (metres)
+    DEFAULT_NEARBY_RADIUS_M: float = float(os.getenv("DEFAULT_NEARBY_RADIUS_M", 1000))
+    MAX_NEARBY_RADIUS_M: float = float(os.getenv("MAX_NEARBY_RADIUS_M", 50000))
+    # In-process cache for place listings
+    PLACES_CACHE_TTL_SECONDS: int = int(os.getenv("PLACES_CACHE_TTL_SECONDS", 60))
+    PLACES_CACHE_MAX_ENTRIES: int = int(os.getenv("PLACES_CACHE_MAX_ENTRIES", 1024))
+    # Full reload interval of the in-memory category catalog (picks up writes from other processes)
+    CATEGORY_CATALOG_REFRESH_SECONDS: int = int(os.getenv("CATEGORY_CATALOG_REFRESH_SECONDS", 600))
+    # Binary marker tiles
+    TILE_CACHE_DIR: str = os.getenv("TILE_CACHE_DIR", "tile_cache")
+    TILE_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("TILE_CACHE_MAX_AGE_SECONDS", 86400))
+    # Max number of attr=key:value filters per listing request
+    MAX_ATTRIBUTE_FILTERS: int = int(os.getenv("MAX_ATTRIBUTE_FILTERS", 10))
+    # Trending places rankings cache
+    TRENDING_CACHE_TTL_SECONDS: int = int(os.getenv("TRENDING_CACHE_TTL_SECONDS", 300))
+    TRENDING_CACHE_MAX_ENTRIES: int = int(os.getenv("TRENDING_CACHE_MAX_ENTRIES", 256))
+    # Used for open_now when the city has no (recognised) timezone
+    DEFAULT_PLACE_TIMEZONE: str = os.getenv("DEFAULT_PLACE_TIMEZONE", "UTC")
     OWM_API_KEY: str = os.getenv("OWM_API_KEY","8e5718c568f5a5c51c81c827f7bd17bf")
     # Example of how to add CORS origins if needed later
     # BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
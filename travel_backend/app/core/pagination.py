@@ -0,0 +1,51 @@
+# app/core/pagination.py
+# Opaque cursors for keyset pagination.
+# A cursor carries the sort key of the last row of a page, the next page
+# continues strictly after it instead of using OFFSET.
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+
+# Expected types of the key values, e.g. (NUMBER, int) for [score, id]
+NUMBER = (int, float)
+KeyTypes = Sequence[Union[type, Tuple[type, ...]]]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor can't be decoded or belongs to another sort order."""
+
+
+def encode_cursor(sort: str, key: List[Any]) -> str:
+    """Encodes the sort name and last-seen key values into a URL-safe token."""
+    payload = json.dumps({"s": sort, "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, types: KeyTypes) -> List[Any]:
+    """
+    Decodes a cursor produced by encode_cursor and returns its key values.
+    The cursor must have been issued for the same sort order, and its key must
+    have one value of the matching type per entry of `types`.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, key = payload["s"], payload["k"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Malformed cursor.") from e
+
+    if cursor_sort != sort or not isinstance(key, list):
+        raise InvalidCursorError(f"Cursor was not issued for sort '{sort}'.")
+    if len(key) != len(types) or not all(
+        isinstance(value, expected) and not isinstance(value, bool) for value, expected in zip(key, types)
+    ):
+        raise InvalidCursorError("Malformed cursor.")
+    return key
+
+
+def next_cursor(sort: str, rows: List[Any], limit: int, key_of) -> Optional[str]:
+    """Returns the cursor for the page after `rows`, or None when this was the last page."""
+    if len(rows) < limit:
+        return None
+    return encode_cursor(sort, key_of(rows[-1]))
@@ -2,4 +2,8 @@ from . import crud_user
 from . import crud_city # Add the new crud module
 from . import crud_place
 from . import crud_user_activity # <<< Add this
+from . import crud_search
+from . import crud_map
+from . import crud_popularity
+from . import crud_feed
 # Import other crud modules
\ No newline at end of file
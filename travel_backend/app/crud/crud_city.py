@@ -1,18 +1,33 @@
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload # Use selectinload for efficient async relationship loading
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.orm import load_only
 from sqlalchemy import func as sql_func
 from app.db import models # Import models namespace
 from app.core.config import settings
+from app.core.pagination import NUMBER, decode_cursor, next_cursor
 from app.db.session import AsyncSessionLocal
+from app.crud.loaders import get_loaders
 from app.services import weather_service, wikimedia_service # For pagination defaults if needed later
 from datetime import datetime, timedelta, timezone # Import timezone
 WEATHER_CACHE_MINUTES = 30 # How long to cache weather for (e.g., 30 minutes)
 
+# Plain columns of the city detail response (country, images and weather are handled separately)
+CITY_DETAIL_COLUMNS = [
+    "name", "description", "best_time_to_travel", "famous_for", "timezone",
+    "population", "wikidata_id", "details_last_updated", "latitude", "longitude",
+]
+# Every key of the CityDetail response, for sparse fieldsets
+CITY_DETAIL_FIELDS = [
+    "id", *CITY_DETAIL_COLUMNS, "country", "images", "current_weather", "weather_last_updated",
+]
+
+# Sort name stored in /cities/popular cursors
+CITY_POPULAR_SORT = "city_popular"
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO) # Configure basic logging
 
@@ -34,72 +49,72 @@ async def get_popular_cities_optimized( # Renamed
     background_tasks: BackgroundTasks, # Accept background tasks object
     *,
     country_name: Optional[str] = None,
+    cursor: Optional[str] = None, # Keyset cursor from a previous page, takes precedence over skip
     skip: int = 0,
     limit: int = settings.DEFAULT_PAGE_SIZE
-) -> List[Dict[str, Any]]: # Return dicts matching schema structure
+) -> Dict[str, Any]:
     """
-    Retrieves popular cities, fetches existing images efficiently (one query),
+    Retrieves cities by precomputed popularity (cities.popularity_score, see crud_popularity),
+    fetches each city's primary image efficiently (one query),
     and triggers background tasks to fetch missing images.
+    Returns {"items": [...], "next_cursor": ...}, items being dicts matching the City schema.
+    Raises InvalidCursorError if `cursor` is malformed.
     """
-    logger.info(f"Fetching popular cities: country='{country_name}', skip={skip}, limit={limit}")
-    # --- 1. Fetch Cities with Countries ---
-    stmt_cities = select(models.City).options(
-        selectinload(models.City.country) # Eager load country
-    )
+    logger.info(f"Fetching popular cities: country='{country_name}', cursor={cursor}, skip={skip}, limit={limit}")
+    loaders = get_loaders(db)
+    # --- 1. Fetch Cities (countries come from the batch loader below) ---
+    stmt_cities = select(models.City)
     if country_name:
         # Use case-insensitive matching on the joined Country table
         stmt_cities = stmt_cities.join(models.City.country).where(
             sql_func.lower(models.Country.name).contains(sql_func.lower(country_name))
             # Or use ilike: models.Country.name.ilike(f"%{country_name}%")
        )
-    stmt_cities = stmt_cities.order_by(models.City.name).offset(skip).limit(limit)
+    # Backward scan of ix_cities_popularity, id breaks ties so keyset pages are stable.
+    # Cursors get their own sort name, /places/?sort_by=popular ones must not be accepted here.
+    stmt_cities = stmt_cities.order_by(models.City.popularity_score.desc(), models.City.id.desc())
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, CITY_POPULAR_SORT, (NUMBER, int))
+        stmt_cities = stmt_cities.where(tuple_(models.City.popularity_score, models.City.id) < tuple_(last_score, last_id))
+    else:
+        stmt_cities = stmt_cities.offset(skip)
+    stmt_cities = stmt_cities.limit(limit)
 
     result_cities = await db.execute(stmt_cities)
     cities: List[models.City] = result_cities.scalars().unique().all()
 
     if not cities:
         logger.info("No popular cities found matching criteria.")
-        return [] # Return empty list if no cities found
+        return {"items": [], "next_cursor": None}
+    new_cursor = next_cursor(CITY_POPULAR_SORT, cities, limit, lambda city: [city.popularity_score, city.id])
 
     city_ids = [city.id for city in cities]
     logger.info(f"Found {len(cities)} cities with IDs: {city_ids}")
 
-    # --- 2. Fetch Existing Images for these Cities (Batch Query) ---
-    stmt_images = select(models.CityImage).where(models.CityImage.city_id.in_(city_ids))
-    # If you want only ONE (e.g., featured) image per city, add filtering/ranking here
-    # Example: .where(models.CityImage.is_featured == True)
-    # Or use DISTINCT ON or ROW_NUMBER in more complex scenarios if needed.
-    # For now, fetches all images and we'll take the first one later if needed.
-
-    result_images = await db.execute(stmt_images)
-    images: List[models.CityImage] = result_images.scalars().all()
-
-    # --- 3. Map Images to Cities for efficient lookup ---
-    images_by_city_id: Dict[int, List[str]] = {city_id: [] for city_id in city_ids}
-    for image in images:
-        if image.city_id in images_by_city_id:
-             # Append image_url as string
-            images_by_city_id[image.city_id].append(str(image.image_url))
+    # --- 2. Fetch Countries and Primary Images (one query each, memoized per request) ---
+    countries = await loaders.countries.load_many(city.country_id for city in cities)
+    images_by_city_id = await loaders.primary_city_images.load_many(city_ids)
     logger.info(f"Found existing images for city IDs: {[cid for cid, imgs in images_by_city_id.items() if imgs]}")
 
 
-    # --- 4. Prepare Response Data and Trigger Background Tasks ---
+    # --- 3. Prepare Response Data and Trigger Background Tasks ---
     cities_data = []
     cities_missing_images = [] # Keep track to trigger tasks later
 
     for city in cities:
         city_existing_images = images_by_city_id.get(city.id, [])
+        country = countries[city.country_id]
 
         # Prepare data structure matching the Pydantic schema
         city_dict = {
             "id": city.id,
             "name": city.name,
             "country": {
-                 "id": city.country.id,
-                 "name": city.country.name
+                 "id": country.id,
+                 "name": country.name
             },
-            # Use only the first image found for simplicity in the list view
-            "images": city_existing_images[:1] # Take up to 1 image URL
+            # The list view only shows the primary image
+            "images": city_existing_images
         }
         cities_data.append(city_dict)
 
@@ -107,7 +122,7 @@ async def get_popular_cities_optimized( # Renamed
         if not city_existing_images:
             cities_missing_images.append(city) # Add the full city object
 
-    # --- 5. Add Background Tasks for Cities Missing Images ---
+    # --- 4. Add Background Tasks for Cities Missing Images ---
     if cities_missing_images:
         logger.info(f"Triggering background tasks for {len(cities_missing_images)} cities missing images.")
         for city_to_fetch in cities_missing_images:
@@ -115,11 +130,11 @@ async def get_popular_cities_optimized( # Renamed
                 fetch_and_store_city_image_task,
                 city_id=city_to_fetch.id,
                 city_name=city_to_fetch.name,
-                country_name=city_to_fetch.country.name # Assumes country is loaded
+                country_name=countries[city_to_fetch.country_id].name
             )
 
     logger.info("Finished preparing popular cities data.")
-    return cities_data
+    return {"items": cities_data, "next_cursor": new_cursor}
 async def fetch_and_store_city_image_task(city_id: int, city_name: str, country_name: str):
     """
     Background task to fetch image from Wikimedia and store it in the DB.
@@ -157,22 +172,79 @@ async def fetch_and_store_city_image_task(city_id: int, city_name: str, country_
             pass
 
 
+# Component-wise median of the places' coordinates: unlike the mean, a few
+# mis-geocoded places (or a far-away airport) don't pull the centroid away.
+_CITY_CENTROIDS_SQL = """
+    WITH centroids AS (
+        SELECT city_id,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY latitude) AS latitude,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY longitude) AS longitude
+        FROM places
+        WHERE city_id IS NOT NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+          {city_filter}
+        GROUP BY city_id
+    )
+    UPDATE cities
+    SET latitude = centroids.latitude, longitude = centroids.longitude
+    FROM centroids
+    WHERE cities.id = centroids.city_id
+      AND (cities.latitude IS DISTINCT FROM centroids.latitude
+           OR cities.longitude IS DISTINCT FROM centroids.longitude)
+    RETURNING cities.id, cities.latitude, cities.longitude
+"""
+
+
+async def refresh_city_centroids(
+    db: AsyncSession, city_ids: Optional[List[int]] = None
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Stores the median of the place coordinates as City.latitude/longitude, for `city_ids`
+    or every city, in the caller's transaction. Cities without places keep their value.
+    Returns {city_id: (latitude, longitude)} of the cities that changed.
+    """
+    if city_ids is None:
+        stmt = text(_CITY_CENTROIDS_SQL.format(city_filter=""))
+        params = {}
+    else:
+        stmt = text(_CITY_CENTROIDS_SQL.format(city_filter="AND city_id = ANY(CAST(:city_ids AS integer[]))"))
+        params = {"city_ids": list(city_ids)}
+    result = await db.execute(stmt, params)
+    centroids = {row.id: (row.latitude, row.longitude) for row in result.all()}
+    logger.info(f"Refreshed centroids of {len(centroids)} cities")
+    return centroids
+
+
 async def get_city_details(
     db: AsyncSession,
     city_id: int,
-    background_tasks: BackgroundTasks # Keep for image fetching if needed
+    background_tasks: BackgroundTasks, # Keep for image fetching if needed
+    fields: Optional[Set[str]] = None # Sparse fieldset, None means every field
 ) -> Optional[Dict[str, Any]]:
     """
     Gets detailed city information, utilizing cached data and fetching fresh weather.
     Handles image fetching via background tasks (similar to popular cities).
+    With `fields`, only those columns are loaded and only those keys returned;
+    country, images and weather are only fetched when requested.
     """
-    logger.info(f"Getting details for city_id: {city_id}")
-
-    # --- 1. Fetch City Core Data + Existing Images + Country ---
-    stmt_city = select(models.City).options(
-        selectinload(models.City.country), # Load country
-        selectinload(models.City.images)  # Load existing cached images
-    ).where(models.City.id == city_id)
+    logger.info(f"Getting details for city_id: {city_id}, fields={sorted(fields) if fields else 'all'}")
+
+    def wants(field: str) -> bool:
+        return fields is None or field in fields
+
+    wants_weather = wants("current_weather") or wants("weather_last_updated")
+
+    # --- 1. Fetch City Core Data (+ Country when requested) ---
+    columns = [
+        getattr(models.City, field) for field in CITY_DETAIL_COLUMNS if wants(field)
+    ]
+    if wants("country"):
+        columns.append(models.City.country_id)
+    if wants_weather:
+        # The big JSONB weather cache is only read when weather is part of the response
+        columns += [models.City.cached_weather, models.City.weather_last_updated]
+        # Weather is looked up at the centroid, whichever of the two is part of the response
+        columns += [models.City.latitude, models.City.longitude]
+    stmt_city = select(models.City).options(load_only(models.City.id, *columns)).where(models.City.id == city_id)
 
     result_city = await db.execute(stmt_city)
     city: Optional[models.City] = result_city.scalars().first()
@@ -181,64 +253,63 @@ async def get_city_details(
         return None # City not found
 
     # --- 2. Prepare Base Data ---
-    city_data = {
-        "id": city.id,
-        "name": city.name,
-        "country": city.country, # Pydantic will handle schema conversion
-        "description": city.description,
-        "best_time_to_travel": city.best_time_to_travel,
-        "famous_for": city.famous_for,
-        "timezone": city.timezone,
-        "population": city.population,
-        "wikidata_id": city.wikidata_id,
-        "details_last_updated": city.details_last_updated,
-        "images": [img.image_url for img in city.images], # Extract image URLs
-        "current_weather": None, # Placeholder
-        "weather_last_updated": city.weather_last_updated
-    }
+    city_data: Dict[str, Any] = {"id": city.id}
+    for field in CITY_DETAIL_COLUMNS:
+        if wants(field):
+            city_data[field] = getattr(city, field)
+    if wants("country"):
+        country = await get_loaders(db).countries.load(city.country_id)
+        city_data["country"] = {"id": country.id, "name": country.name}
+    if wants("images"):
+        # Existing cached images, primary (featured, then oldest) first
+        city_data["images"] = await get_loaders(db).city_images.load(city.id)
 
     # --- 3. Handle City Images (Fetch if missing - Background Task) ---
-    if not city_data["images"]:
+    if wants("images") and not city_data["images"]:
         logger.info(f"No cached images for city {city_id}, triggering background fetch.")
         # Reuse the city image fetching task logic if needed (adapt task function name if necessary)
         # background_tasks.add_task(fetch_and_store_city_image_task, city.id, city.name, city.country.name)
         # For simplicity, let's assume image fetch logic is separate or already run by popular endpoint
 
     # --- 4. Handle Weather Data (Check Cache, Fetch if Stale) ---
-    needs_weather_fetch = True
-    if city.cached_weather and city.weather_last_updated:
-        cache_age = datetime.now(timezone.utc) - city.weather_last_updated
-        if cache_age < timedelta(minutes=WEATHER_CACHE_MINUTES):
-            logger.info(f"Using cached weather for city {city_id} (updated {cache_age.total_seconds():.0f}s ago).")
-            city_data["current_weather"] = city.cached_weather # Use cached JSON
-            needs_weather_fetch = False
-
-    if needs_weather_fetch:
-        logger.info(f"Fetching fresh weather for city {city_id}...")
-        # We need lat/lon - Assuming City model doesn't have them, get from a place? Or add to City?
-        # HACK: Get lat/lon from the first place in the city (inefficient!)
-        # Better: Add representative lat/lon columns to the cities table!
-        first_place_stmt = select(models.Place.latitude, models.Place.longitude).where(models.Place.city_id == city_id).limit(1)
-        place_loc_result = await db.execute(first_place_stmt)
-        place_loc = place_loc_result.first()
-
-        if place_loc:
-            lat, lon = place_loc.latitude, place_loc.longitude
-            weather_json = await weather_service.get_current_weather(lat=lat, lon=lon)
-            if weather_json:
-                logger.info(f"Successfully fetched weather for city {city_id}. Caching.")
-                city_data["current_weather"] = weather_json
-                city_data["weather_last_updated"] = datetime.now(timezone.utc)
-                # Update cache in DB (could also be background task)
-                city.cached_weather = weather_json
-                city.weather_last_updated = city_data["weather_last_updated"]
-                db.add(city) # Add to session for update
-                # Commit happens via get_db dependency
+    if wants_weather:
+        city_data["current_weather"] = None # Placeholder
+        city_data["weather_last_updated"] = city.weather_last_updated
+        needs_weather_fetch = True
+        if city.cached_weather and city.weather_last_updated:
+            cache_age = datetime.now(timezone.utc) - city.weather_last_updated
+            if cache_age < timedelta(minutes=WEATHER_CACHE_MINUTES):
+                logger.info(f"Using cached weather for city {city_id} (updated {cache_age.total_seconds():.0f}s ago).")
+                city_data["current_weather"] = city.cached_weather # Use cached JSON
+                needs_weather_fetch = False
+
+        if needs_weather_fetch:
+            logger.info(f"Fetching fresh weather for city {city_id}...")
+            lat, lon = city.latitude, city.longitude
+            if lat is None or lon is None:
+                # Not computed yet (e.g. the city's places predate the column), compute and store it once
+                centroids = await refresh_city_centroids(db, city_ids=[city_id])
+                lat, lon = centroids.get(city_id, (None, None))
+                for field, value in (("latitude", lat), ("longitude", lon)):
+                    if wants(field):
+                        city_data[field] = value
+
+            if lat is not None and lon is not None:
+                weather_json = await weather_service.get_current_weather(lat=lat, lon=lon)
+                if weather_json:
+                    logger.info(f"Successfully fetched weather for city {city_id}. Caching.")
+                    city_data["current_weather"] = weather_json
+                    city_data["weather_last_updated"] = datetime.now(timezone.utc)
+                    # Update cache in DB (could also be background task)
+                    city.cached_weather = weather_json
+                    city.weather_last_updated = city_data["weather_last_updated"]
+                    db.add(city) # Add to session for update
+                    # Commit happens via get_db dependency
+                else:
+                    logger.warning(f"Failed to fetch weather for city {city_id}. Response will lack weather.")
+                    city_data["weather_last_updated"] = None # Ensure it's None if fetch failed
             else:
-                logger.warning(f"Failed to fetch weather for city {city_id}. Response will lack weather.")
-                city_data["weather_last_updated"] = None # Ensure it's None if fetch failed
-        else:
-             logger.warning(f"Cannot fetch weather for city {city_id}: No places found to get coordinates.")
+                 logger.warning(f"Cannot fetch weather for city {city_id}: No places found to get coordinates.")
 
 
     # --- 5. Handle Other Details (Wikidata, etc. - Placeholder/Future) ---
@@ -247,4 +318,6 @@ async def get_city_details(
     #     # Trigger background task to fetch from wikidata_service
     #     # Update city_data dictionary with results if fetched inline
 
+    if fields is not None:
+        city_data = {key: value for key, value in city_data.items() if key in fields}
     return city_data
\ No newline at end of file
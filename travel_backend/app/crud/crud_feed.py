@@ -0,0 +1,215 @@
+# app/crud/crud_feed.py
+# Personalized "for you" feed.
+#
+# Offline (build_feed_candidates, run by scripts/build_user_feeds.py) every active
+# user gets up to FEED_CANDIDATES places scored from:
+#   - neighbours (place_similarities) of the places they favorited or recently visited
+#   - the most popular places of the cities those places are in
+# Online (get_feed) the stored list is read by primary key, places the user
+# favorited/visited since then are dropped and the rest re-ranked with the live
+# popularity score.
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List, Sequence
+
+from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, union
+from sqlalchemy import func as sql_func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import raiseload
+
+from app.db import models
+from app.crud import crud_place
+
+logger = logging.getLogger(__name__)
+
+FEED_CANDIDATES = 200
+# Users with activity in this period get a feed
+ACTIVE_PERIOD = timedelta(days=30)
+# Seed weights: a favorite says more than a visit, repeated visits count up to a cap
+FAVORITE_WEIGHT = 3.0
+VISIT_WEIGHT = 1.0
+MAX_VISITS_COUNTED = 5
+# Popular places considered per interest city, and their weight against similarity
+CITY_CANDIDATES = 50
+CITY_WEIGHT = 0.5
+# Request-time blend with log(1 + popularity_score)
+POPULARITY_BLEND = 0.05
+
+
+async def get_active_user_ids(db: AsyncSession, *, after_id: int, limit: int) -> List[int]:
+    """Next `limit` ids (above `after_id`) of users who favorited or visited something in ACTIVE_PERIOD."""
+    since = sql_func.now() - ACTIVE_PERIOD
+    active = union(
+        select(models.UserVisitHistory.user_id).where(models.UserVisitHistory.visited_at >= since),
+        select(models.UserFavorite.user_id).where(models.UserFavorite.created_at >= since),
+    ).subquery()
+    stmt = select(active.c.user_id).where(active.c.user_id > after_id).order_by(active.c.user_id).limit(limit)
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def _load_seeds(db: AsyncSession, user_ids: Sequence[int]) -> Dict[int, Dict[int, float]]:
+    """user_id -> {place_id: weight} from favorites and visits in ACTIVE_PERIOD."""
+    seeds: Dict[int, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+    favorites = await db.execute(
+        select(models.UserFavorite.user_id, models.UserFavorite.place_id)
+        .where(models.UserFavorite.user_id.in_(user_ids))
+    )
+    for row in favorites.all():
+        seeds[row.user_id][row.place_id] += FAVORITE_WEIGHT
+
+    visit_count = sql_func.least(sql_func.count(), MAX_VISITS_COUNTED).label("visit_count")
+    visits = await db.execute(
+        select(models.UserVisitHistory.user_id, models.UserVisitHistory.place_id, visit_count)
+        .where(
+            models.UserVisitHistory.user_id.in_(user_ids),
+            models.UserVisitHistory.visited_at >= sql_func.now() - ACTIVE_PERIOD
+        )
+        .group_by(models.UserVisitHistory.user_id, models.UserVisitHistory.place_id)
+    )
+    for row in visits.all():
+        seeds[row.user_id][row.place_id] += row.visit_count * VISIT_WEIGHT
+    return seeds
+
+
+async def build_feed_candidates(db: AsyncSession, user_ids: Sequence[int]) -> int:
+    """
+    Computes and upserts the candidate lists of `user_ids`, in the caller's transaction.
+    Returns the number of users written (users without any seed are skipped).
+    """
+    seeds = await _load_seeds(db, user_ids)
+    seed_place_ids = {place_id for user_seeds in seeds.values() for place_id in user_seeds}
+    if not seed_place_ids:
+        return 0
+
+    # Neighbours and cities of every seed place, for the whole chunk at once
+    neighbours: Dict[int, List[tuple]] = defaultdict(list)
+    result = await db.execute(
+        select(models.PlaceSimilarity.place_id, models.PlaceSimilarity.similar_place_id, models.PlaceSimilarity.score)
+        .where(models.PlaceSimilarity.place_id.in_(seed_place_ids))
+    )
+    for row in result.all():
+        neighbours[row.place_id].append((row.similar_place_id, row.score))
+
+    result = await db.execute(
+        select(models.Place.id, models.Place.city_id).where(models.Place.id.in_(seed_place_ids))
+    )
+    city_of = {row.id: row.city_id for row in result.all() if row.city_id is not None}
+
+    # Top places per interest city, one LATERAL index scan (ix_places_city_popularity) per city
+    city_top: Dict[int, List[tuple]] = defaultdict(list)
+    if city_of:
+        result = await db.execute(
+            text("""
+                SELECT c.city_id, p.id, p.popularity_score
+                FROM unnest(CAST(:city_ids AS integer[])) AS c(city_id)
+                CROSS JOIN LATERAL (
+                    SELECT id, popularity_score FROM places
+                    WHERE places.city_id = c.city_id
+                    ORDER BY popularity_score DESC, id DESC
+                    LIMIT :per_city
+                ) AS p
+            """),
+            {"city_ids": sorted(set(city_of.values())), "per_city": CITY_CANDIDATES}
+        )
+        for row in result.all():
+            city_top[row.city_id].append((row.id, row.popularity_score))
+
+    values = []
+    for user_id, user_seeds in seeds.items():
+        scores: Dict[int, float] = defaultdict(float)
+        for place_id, weight in user_seeds.items():
+            for similar_place_id, similarity in neighbours.get(place_id, []):
+                scores[similar_place_id] += weight * similarity
+
+        city_weights: Dict[int, float] = defaultdict(float)
+        for place_id, weight in user_seeds.items():
+            if place_id in city_of:
+                city_weights[city_of[place_id]] += weight
+        total_weight = sum(city_weights.values())
+        for city_id, weight in city_weights.items():
+            top = city_top.get(city_id, [])
+            max_popularity = max((popularity for _, popularity in top), default=0.0)
+            for place_id, popularity in top:
+                normalized = popularity / max_popularity if max_popularity > 0 else 0.0
+                scores[place_id] += CITY_WEIGHT * (weight / total_weight) * normalized
+
+        # The feed is for discovering places, not the ones the user already knows
+        for place_id in user_seeds:
+            scores.pop(place_id, None)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:FEED_CANDIDATES]
+        values.append({
+            "user_id": user_id,
+            "place_ids": [place_id for place_id, _ in ranked],
+            "scores": [round(score, 5) for _, score in ranked],
+        })
+
+    if values:
+        stmt = insert(models.UserFeedCandidates).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.UserFeedCandidates.user_id],
+            set_={"place_ids": stmt.excluded.place_ids, "scores": stmt.excluded.scores, "computed_at": sql_func.now()}
+        )
+        await db.execute(stmt)
+    logger.info(f"Built feed candidates for {len(values)} of {len(user_ids)} users")
+    return len(values)
+
+
+async def _unseen_candidates(db: AsyncSession, user_id: int, feed: models.UserFeedCandidates) -> Dict[int, float]:
+    """{place_id: offline score} of the stored candidates, minus places favorited/visited since they were computed."""
+    seen = union(
+        select(models.UserFavorite.place_id).where(
+            models.UserFavorite.user_id == user_id, models.UserFavorite.created_at >= feed.computed_at
+        ),
+        select(models.UserVisitHistory.place_id).where(
+            models.UserVisitHistory.user_id == user_id, models.UserVisitHistory.visited_at >= feed.computed_at
+        ),
+    )
+    seen_ids = set((await db.execute(seen)).scalars().all())
+    return {
+        place_id: score for place_id, score in zip(feed.place_ids, feed.scores) if place_id not in seen_ids
+    }
+
+
+async def get_feed(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    *,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Returns one page of the user's feed as dicts matching the Place schema.
+    Users without precomputed candidates (new or inactive), or none of whose candidates
+    are left (all favorited/visited since, or deleted), get the most popular places.
+    """
+    feed = (await db.execute(
+        select(models.UserFeedCandidates).where(models.UserFeedCandidates.user_id == user_id)
+    )).scalar_one_or_none()
+    offline_score: Dict[int, float] = {}
+    if feed is not None and feed.place_ids:
+        offline_score = await _unseen_candidates(db, user_id, feed)
+    places = []
+    if offline_score:
+        stmt = select(models.Place).options(
+            raiseload(models.Place.images),
+            crud_place.place_load_only(crud_place.PLACE_LIST_COLUMNS + ["popularity_score"], None)
+        ).where(models.Place.id.in_(list(offline_score)))
+        places = (await db.execute(stmt)).scalars().all()
+    if not places: # No candidates, all already known, or deleted since
+        logger.info(f"No feed candidates left for user {user_id}, serving popular places")
+        page = await crud_place.get_places(db, background_tasks, sort_by="popular", skip=skip, limit=limit)
+        return page["items"]
+
+    places = sorted(
+        places,
+        key=lambda place: (
+            -(offline_score[place.id] + POPULARITY_BLEND * math.log1p(max(place.popularity_score, 0.0))),
+            place.id
+        )
+    )
+    return await crud_place.build_place_list_data(db, background_tasks, places[skip:skip + limit])
@@ -0,0 +1,147 @@
+# app/crud/crud_map.py
+# Map-oriented reads: precomputed marker clusters for zoomed-out viewports
+# and binary marker tiles for zoomed-in ones.
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, text, or_
+
+from app.db import models
+from app.services import map_tiles
+from app.services.geo import cell_bounds, lonlat_to_cell, mercator_cell_sql
+
+logger = logging.getLogger(__name__)
+
+# Clusters live on a grid 2**CLUSTER_CELL_BITS times finer than the map tiles
+# of the same zoom: 8x8 cells per 256px tile, i.e. roughly one cluster per 32px.
+CLUSTER_CELL_BITS = 3
+# Deepest precomputed level, deeper zooms reuse it (markers are individual places by then)
+CLUSTER_MAX_ZOOM = 16
+# Safety cap for huge viewports
+MAX_CLUSTERS_PER_REQUEST = 5000
+# Marker tiles are only served from this zoom on, coarser views use clusters
+MIN_TILE_ZOOM = 12
+MAX_TILE_ZOOM = 20
+
+
+def cluster_grid_resolution(zoom: int) -> int:
+    return 2 ** (zoom + CLUSTER_CELL_BITS)
+
+
+async def rebuild_place_clusters(db: AsyncSession, max_zoom: int = CLUSTER_MAX_ZOOM) -> int:
+    """
+    Recomputes every cluster level in the caller's transaction (readers keep seeing the
+    old levels until commit). The deepest level is grouped from places, each coarser level
+    is rolled up from the one below (a cell's parent is (x // 2, y // 2)), so the cost is
+    one pass over places plus passes over ever smaller cluster sets.
+    Returns the number of clusters written.
+    """
+    await db.execute(delete(models.PlaceCluster))
+
+    cell_x_sql, cell_y_sql = mercator_cell_sql("longitude", "latitude", str(cluster_grid_resolution(max_zoom)))
+    await db.execute(
+        text(f"""
+            INSERT INTO place_clusters (zoom, cell_x, cell_y, latitude, longitude, place_count, representative_place_id)
+            SELECT :zoom, cell_x, cell_y, avg(latitude), avg(longitude), count(*), min(id)
+            FROM (
+                SELECT id, latitude, longitude, {cell_x_sql} AS cell_x, {cell_y_sql} AS cell_y
+                FROM places
+            ) AS p
+            GROUP BY cell_x, cell_y
+        """),
+        {"zoom": max_zoom}
+    )
+
+    rollup = text("""
+        INSERT INTO place_clusters (zoom, cell_x, cell_y, latitude, longitude, place_count, representative_place_id)
+        SELECT :zoom, cell_x / 2, cell_y / 2,
+               sum(latitude * place_count) / sum(place_count),
+               sum(longitude * place_count) / sum(place_count),
+               sum(place_count),
+               -- Representative of the biggest child cluster
+               (array_agg(representative_place_id ORDER BY place_count DESC, representative_place_id))[1]
+        FROM place_clusters
+        WHERE zoom = :child_zoom
+        GROUP BY cell_x / 2, cell_y / 2
+    """)
+    for zoom in range(max_zoom - 1, -1, -1):
+        await db.execute(rollup, {"zoom": zoom, "child_zoom": zoom + 1})
+
+    total = (await db.execute(text("SELECT count(*) FROM place_clusters"))).scalar_one()
+    logger.info(f"Rebuilt place clusters for zoom 0-{max_zoom}: {total} clusters")
+    return total
+
+
+async def get_clusters(
+    db: AsyncSession,
+    *,
+    min_lon: float,
+    min_lat: float,
+    max_lon: float,
+    max_lat: float,
+    zoom: int
+) -> List[Dict[str, Any]]:
+    """
+    Returns the precomputed clusters intersecting a viewport at `zoom`.
+    A bbox with min_lon > max_lon crosses the antimeridian.
+    """
+    zoom = min(zoom, CLUSTER_MAX_ZOOM)
+    resolution = cluster_grid_resolution(zoom)
+    # y grows southwards: the north-west corner gives the smallest cell indexes
+    x0, y0 = lonlat_to_cell(min_lon, max_lat, resolution)
+    x1, y1 = lonlat_to_cell(max_lon, min_lat, resolution)
+    logger.info(f"Fetching clusters: zoom={zoom}, cells x {x0}-{x1}, y {y0}-{y1}")
+
+    cluster = models.PlaceCluster
+    if x0 <= x1:
+        x_filter = cluster.cell_x.between(x0, x1)
+    else:
+        x_filter = or_(cluster.cell_x >= x0, cluster.cell_x <= x1)
+
+    stmt = select(cluster).where(
+        cluster.zoom == zoom,
+        cluster.cell_y.between(y0, y1),
+        x_filter
+    ).order_by(
+        # When the cap cuts a large viewport, the biggest clusters are kept (deterministically)
+        cluster.place_count.desc(), cluster.cell_x, cluster.cell_y
+    ).limit(MAX_CLUSTERS_PER_REQUEST)
+
+    result = await db.execute(stmt)
+    return [
+        {
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "count": row.place_count,
+            "place_id": row.representative_place_id,
+        }
+        for row in result.scalars().all()
+    ]
+
+
+async def get_marker_tile(db: AsyncSession, *, z: int, x: int, y: int) -> bytes:
+    """
+    Returns the binary marker tile z/x/y (format in app/services/map_tiles.py).
+    Tiles are generated on first request and then served from the disk cache.
+    """
+    cached = await map_tiles.read_cached_tile(z, x, y)
+    if cached is not None:
+        return cached
+
+    bounds = cell_bounds(x, y, 2 ** z)
+    min_lon, min_lat, max_lon, max_lat = bounds
+    # Half-open on the east/south edges so a place on a shared border lands in one tile only
+    stmt = select(
+        models.Place.id, models.Place.latitude, models.Place.longitude, models.Place.category
+    ).where(
+        models.Place.latitude > min_lat, models.Place.latitude <= max_lat,
+        models.Place.longitude >= min_lon, models.Place.longitude < max_lon
+    ).order_by(models.Place.id)
+    result = await db.execute(stmt)
+    markers = [row._asdict() for row in result.all()]
+
+    data = map_tiles.encode_tile(markers, bounds)
+    await map_tiles.store_cached_tile(z, x, y, data)
+    logger.info(f"Generated tile {z}/{x}/{y}: {len(markers)} markers, {len(data)} bytes")
+    return data
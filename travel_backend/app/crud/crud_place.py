@@ -1,29 +1,87 @@
 # app/crud/crud_place.py
 import asyncio
+import datetime
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, distinct
+from sqlalchemy import JSON, Integer, select, distinct, and_, or_, tuple_, literal, literal_column
 from sqlalchemy import func as sql_func
 from fastapi import BackgroundTasks
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, load_only, raiseload
 
 from app.db import models
 from app.schemas import Place as PlaceSchema # Import the schema
 from app.core.config import settings
-from app.services import wikimedia_service
+from app.core.cache import TTLCache
+from app.core.pagination import NUMBER, decode_cursor, next_cursor
+from app.crud import crud_popularity
+from app.crud.loaders import get_loaders
+from app.services import opening_hours, wikimedia_service
+from app.services.category_catalog import category_catalog
 from app.db.session import AsyncSessionLocal # Import session factory
 
 logger = logging.getLogger(__name__)
+
+# Columns behind the Place (list) and PlaceDetail schemas, used for sparse fieldsets.
+# "id" is always loaded, "images" comes from place_images.
+PLACE_LIST_COLUMNS = ["name", "latitude", "longitude", "category", "address", "city_id"]
+PLACE_DETAIL_COLUMNS = PLACE_LIST_COLUMNS + [
+    "osm_id", "osm_type", "website", "description", "phone", "opening_hours", "cuisine",
+    "entry_fee", "religion", "denomination", "attributes", "created_at", "updated_at",
+]
+PLACE_LIST_FIELDS = ["id", *PLACE_LIST_COLUMNS, "images"]
+PLACE_DETAIL_FIELDS = ["id", *PLACE_DETAIL_COLUMNS, "images"]
+# Needed to schedule a background image fetch (and to build name-sorted cursors)
+_IMAGE_TASK_COLUMNS = ["name", "category", "city_id"]
+
+
+def place_load_only(columns: List[str], fields: Optional[Set[str]]):
+    """
+    load_only option for `columns` restricted to the requested fields.
+    Columns needed for background image fetching are kept when images are requested.
+    """
+    if fields is not None:
+        wanted = [column for column in columns if column in fields]
+        if "images" in fields:
+            wanted += [column for column in _IMAGE_TASK_COLUMNS if column not in wanted]
+        columns = wanted
+    return load_only(models.Place.id, *(getattr(models.Place, column) for column in columns))
+
+
+def _select_fields(data: Dict[str, Any], fields: Optional[Set[str]]) -> Dict[str, Any]:
+    """Drops keys that weren't requested (no-op without a sparse fieldset)."""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
+
+# Cache for GET /places/ results, tagged by city_id (None for listings across all cities)
+places_cache = TTLCache(
+    max_entries=settings.PLACES_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PLACES_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_places_cache(city_id: Optional[int]) -> None:
+    """
+    Drops cached listings affected by a change to places (or their images) in `city_id`.
+    Listings without a city filter include every city, so they are always dropped.
+    """
+    removed = places_cache.invalidate_tag(None)
+    if city_id is not None:
+        removed += places_cache.invalidate_tag(city_id)
+    logger.info(f"Invalidated {removed} cached place listings for city_id={city_id}")
+
+# Weights for the D, C, B, A labels of Place.fts_vector (see app/db/ddl.py)
+FTS_RANK_WEIGHTS = "'{0.1, 0.3, 0.6, 1.0}'::float4[]"
 # Ensure basicConfig is called somewhere, e.g., in main.py or here for simplicity
 # logging.basicConfig(level=logging.INFO)
 
 # --- Background Task Function for Places ---
-async def fetch_and_store_place_image_task(place_id: int, place_name: str, category: Optional[str], city_name: Optional[str]):
+async def fetch_and_store_place_image_task(place_id: int, place_name: str, category: Optional[str], city_name: Optional[str], city_id: Optional[int] = None):
     """
     Background task to fetch image for a place from Wikimedia and store it.
-    Handles its own DB session.
+    Handles its own DB session. Invalidates cached listings of the place's city once stored.
     """
     logger.info(f"BG Task: Fetching image for {place_name} (ID: {place_id})")
     async with AsyncSessionLocal() as db_task:
@@ -45,6 +103,7 @@ async def fetch_and_store_place_image_task(place_id: int, place_name: str, categ
                 db_image = models.PlaceImage(place_id=place_id, image_url=fetched_url, source="wikimedia")
                 db_task.add(db_image)
                 await db_task.commit()
+                invalidate_places_cache(city_id)
                 logger.info(f"BG Task: Successfully stored image for {place_name} (ID: {place_id})")
             else:
                 logger.warning(f"BG Task: Could not find Wikimedia image for {place_name} (ID: {place_id})")
@@ -53,28 +112,30 @@ async def fetch_and_store_place_image_task(place_id: int, place_name: str, categ
             await db_task.rollback()
             logger.error(f"BG task error for place {place_id} ({place_name}): {e}", exc_info=True)
 
-# --- Keep get_distinct_categories ---
+# --- Categories (served from the in-memory catalog) ---
 
-async def get_distinct_categories(db: AsyncSession) -> List[str]:
+async def get_distinct_categories(db: AsyncSession, city_id: Optional[int] = None) -> List[str]:
     """
-    Retrieves a distinct, sorted list of all place categories
-    from the places table, ensuring no None values are returned.
+    Retrieves a distinct, sorted list of place categories (optionally for one city),
+    ensuring no None/empty values are returned.
     """
-    stmt = select(models.Place.category)\
-           .where(models.Place.category.is_not(None), models.Place.category != '')\
-           .distinct()\
-           .order_by(models.Place.category) # Order alphabetically
-
-    result = await db.execute(stmt)
-    categories_from_db = result.scalars().all()
+    await category_catalog.ensure_loaded(db)
+    categories = [entry["category"] for entry in category_catalog.counts(city_id)]
+    logger.info(f"Returning {len(categories)} distinct categories (city_id={city_id}, catalog version {category_catalog.version})")
+    return categories
 
-    # --- Add explicit filtering in Python as a safeguard ---
-    # Ensure every item is not None before returning
-    categories = [str(cat) for cat in categories_from_db if cat is not None]
-    # --- End of added filter ---
 
-    logger.info(f"Returning distinct categories: {categories}") # Log the final list
-    return categories
+async def get_category_counts(db: AsyncSession, city_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Returns {"version", "city_id", "categories": [{"category", "count"}]} from the catalog.
+    The version changes whenever any count changes in this process (not across workers).
+    """
+    await category_catalog.ensure_loaded(db)
+    return {
+        "version": category_catalog.version,
+        "city_id": city_id,
+        "categories": category_catalog.counts(city_id),
+    }
 
 # --- Updated get_places function ---
 async def get_places(
@@ -85,27 +146,74 @@ async def get_places(
     category: Optional[str] = None,
     q: Optional[str] = None, # <<< Add search query parameter
     # --- Add sorting parameter ---
-    sort_by: Optional[str] = None, # e.g., "name_asc", "name_desc", "relevance"
+    sort_by: Optional[str] = None, # e.g., "name_asc", "name_desc", "relevance", "distance_asc", "popular"
+    latitude: Optional[float] = None, # Origin for "distance_asc"
+    longitude: Optional[float] = None,
+    cursor: Optional[str] = None, # Keyset cursor from a previous page, takes precedence over skip
     skip: int = 0,
-    limit: int = settings.DEFAULT_PAGE_SIZE
-) -> List[Dict[str, Any]]: # Return Dicts matching schema structure
+    limit: int = settings.DEFAULT_PAGE_SIZE,
+    open_now: bool = False, # Only places open right now (local time of the city)
+    open_at: Optional[datetime.datetime] = None, # Only places open at this local wall-clock time
+    attributes: Optional[Dict[str, List[str]]] = None, # OSM tag filters: key -> accepted values
+    with_facets: bool = False, # Also count places per category for the city/q filter
+    fields: Optional[Set[str]] = None # Sparse fieldset for the items, None means every field
+) -> Dict[str, Any]:
     """
     Retrieves places with filtering, FTS, sorting, and pagination.
     Handles background image fetching.
-    """
-    logger.info(f"Fetching places: city_id={city_id}, category='{category}', q='{q}', sort='{sort_by}', skip={skip}, limit={limit}")
 
-    stmt = select(models.Place)
+    Returns {"items": [...], "next_cursor": ..., "facets": ...}. Items are dicts matching
+    the Place schema, next_cursor is None on the last page. With `with_facets` the facets
+    are [{"category", "count"}] computed in the same query (ignoring the category filter,
+    so every chip shows what selecting it would yield), otherwise None.
+    "distance_asc" needs latitude/longitude and falls back to "name_asc" without them.
+    `open_at`/`open_now` keep places whose compiled opening hours contain that minute of the
+    week; places with unknown hours are excluded.
+    `attributes` keeps places whose tags match every key with one of its values.
+    Raises InvalidCursorError if `cursor` doesn't belong to the requested sort.
+    """
+    logger.info(f"Fetching places: city_id={city_id}, category='{category}', q='{q}', sort='{sort_by}', origin=({latitude}, {longitude}), open_now={open_now}, open_at={open_at}, attributes={attributes}, cursor={cursor}, skip={skip}, limit={limit}, facets={with_facets}")
+
+    # Resolved up front so the cache key holds the minute actually filtered on
+    open_minute = None
+    if open_at is not None:
+        open_minute = opening_hours.minute_of_week(open_at)
+    elif open_now:
+        open_minute = opening_hours.minute_of_week(await _local_now(db, city_id))
+
+    # --- Result Cache ---
+    # Normalized so equivalent requests share an entry (FTS and category matching are case-insensitive)
+    cache_key = (
+        "places", city_id,
+        category.lower() if category else None,
+        " ".join(q.lower().split()) if q else None,
+        sort_by, latitude, longitude, open_minute,
+        tuple(sorted((key, tuple(sorted(values))) for key, values in attributes.items())) if attributes else None,
+        cursor, None if cursor else skip, limit, with_facets,
+        tuple(sorted(fields)) if fields is not None else None
+    )
+    cached_page = places_cache.get(cache_key)
+    if cached_page is not None:
+        logger.info("Returning cached places page.")
+        return cached_page
+
+    # Images are fetched per page by build_place_list_data, skip the relationship's selectin load.
+    # Only list columns are loaded (the name is always needed for name-sorted cursors).
+    stmt = select(models.Place).options(
+        raiseload(models.Place.images),
+        place_load_only(PLACE_LIST_COLUMNS, fields | {"name"} if fields is not None else None)
+    )
 
     # --- Filtering ---
-    city_name_for_wikimedia: Optional[str] = None
+    # Filters shared by the page and the facet counts (everything except category)
+    facet_filters = []
     if city_id is not None:
-        stmt = stmt.where(models.Place.city_id == city_id)
-        city_result = await db.execute(select(models.City.name).where(models.City.id == city_id))
-        city_name_for_wikimedia = city_result.scalar_one_or_none()
-
-    if category:
-        stmt = stmt.where(sql_func.lower(models.Place.category) == sql_func.lower(category))
+        facet_filters.append(models.Place.city_id == city_id)
+    if open_minute is not None:
+        # Constant minute against the GiST-indexed multirange (ix_places_opening_minutes)
+        facet_filters.append(models.Place.opening_minutes.op("@>")(literal(open_minute, Integer)))
+    if attributes:
+        facet_filters.extend(_attribute_filters(attributes))
 
     # --- Full-Text Search ---
     search_rank = None # Define variable for potential ranking column
@@ -114,149 +222,467 @@ async def get_places(
         # Ensure the FTS configuration ('simple' or 'english') matches the one used for the index
         query_ts = sql_func.plainto_tsquery('simple', q)
         # Filter using the @@ operator
-        stmt = stmt.where(models.Place.fts_vector.op('@@')(query_ts)) # Use op('@@') for FTS match
+        facet_filters.append(models.Place.fts_vector.op('@@')(query_ts)) # Use op('@@') for FTS match
 
         # --- Add Ranking for Relevance Sorting ---
         # Calculate relevance rank only if sorting by relevance
         if sort_by == "relevance":
-            search_rank = sql_func.ts_rank(models.Place.fts_vector, query_ts).label("rank")
+            # Cover density ranking over the weighted vector (name A > category B > description C)
+            search_rank = sql_func.ts_rank_cd(literal_column(FTS_RANK_WEIGHTS), models.Place.fts_vector, query_ts)
             # Add the rank column to the selection
-            stmt = stmt.add_columns(search_rank)
+            stmt = stmt.add_columns(search_rank.label("rank"))
+
+    stmt = stmt.where(*facet_filters)
+    if category:
+        stmt = stmt.where(sql_func.lower(models.Place.category) == sql_func.lower(category))
 
+    # --- Facets ---
+    # Uncorrelated scalar subquery: Postgres evaluates it once (InitPlan) and repeats
+    # the value on every row, so the counts arrive in the same round trip as the page.
+    facets_query = None
+    if with_facets:
+        facets_query = _category_facets_query(facet_filters)
+        stmt = stmt.add_columns(facets_query.scalar_subquery().label("facets"))
 
     # --- Sorting ---
-    if sort_by == "relevance" and search_rank is not None:
-        stmt = stmt.order_by(search_rank.desc()) # Order by relevance descending
-    elif sort_by == "name_asc":
-        stmt = stmt.order_by(models.Place.name.asc())
+    # Every order ends with Place.id so that (sort value, id) is unique and usable as a keyset
+    distance = None
+    if sort_by == "distance_asc" and latitude is not None and longitude is not None:
+        sort_key = "distance_asc"
+        # GiST k-NN ordering over ix_places_earth (same expression as get_nearby_places).
+        # The cube distance is a chord length: same order as great-circle distance.
+        distance = sql_func.ll_to_earth(models.Place.latitude, models.Place.longitude)\
+            .op('<->')(sql_func.ll_to_earth(latitude, longitude))
+        stmt = stmt.add_columns(distance.label("distance"))
+        stmt = stmt.order_by(distance.asc(), models.Place.id.asc())
+    elif sort_by == "relevance" and search_rank is not None:
+        sort_key = "relevance"
+        stmt = stmt.order_by(search_rank.desc(), models.Place.id.asc()) # Order by relevance descending
+    elif sort_by == "popular":
+        sort_key = "popular"
+        # Materialized score (crud_popularity), read from ix_places_popularity / ix_places_city_popularity
+        stmt = stmt.add_columns(models.Place.popularity_score.label("popularity"))
+        stmt = stmt.order_by(models.Place.popularity_score.desc(), models.Place.id.desc())
     elif sort_by == "name_desc":
-         stmt = stmt.order_by(models.Place.name.desc())
-    else: # Default sort
-        stmt = stmt.order_by(models.Place.name.asc()) # Default to name ascending
-
+        sort_key = "name_desc"
+        stmt = stmt.order_by(models.Place.name.desc(), models.Place.id.desc())
+    else: # Default sort, also "name_asc"
+        sort_key = "name_asc"
+        stmt = stmt.order_by(models.Place.name.asc(), models.Place.id.asc())
 
     # --- Pagination ---
-    stmt = stmt.offset(skip).limit(limit)
+    if cursor:
+        # Keyset: continue strictly after the last row of the previous page
+        value_type = str if sort_key in ("name_asc", "name_desc") else NUMBER
+        last_value, last_id = decode_cursor(cursor, sort_key, (value_type, int))
+        if sort_key == "distance_asc":
+            stmt = stmt.where(or_(
+                distance > last_value,
+                and_(distance == last_value, models.Place.id > last_id)
+            ))
+        elif sort_key == "relevance":
+            stmt = stmt.where(or_(
+                search_rank < last_value,
+                and_(search_rank == last_value, models.Place.id > last_id)
+            ))
+        elif sort_key == "popular":
+            stmt = stmt.where(tuple_(models.Place.popularity_score, models.Place.id) < tuple_(last_value, last_id))
+        elif sort_key == "name_desc":
+            stmt = stmt.where(tuple_(models.Place.name, models.Place.id) < tuple_(last_value, last_id))
+        else:
+            stmt = stmt.where(tuple_(models.Place.name, models.Place.id) > tuple_(last_value, last_id))
+    else:
+        stmt = stmt.offset(skip)
+    stmt = stmt.limit(limit)
 
     result = await db.execute(stmt)
+    # Rows are (Place, [rank], [facets], [distance], [popularity]) depending on sort and with_facets
+    rows = result.all()
+    places: List[models.Place] = [row[0] for row in rows]
+
+    facets = None
+    if with_facets:
+        if rows:
+            facets = _facets_to_list(rows[0].facets)
+        else:
+            # No row to carry the subquery value, ask for the counts directly
+            facets = _facets_to_list((await db.execute(facets_query)).scalar_one())
 
-    # Process results - handle the case where rank was added
-    places: List[models.Place] = []
-    if sort_by == "relevance" and search_rank is not None:
-         # Result contains tuples (Place, rank)
-        for row in result.all():
-            places.append(row[0]) # Extract the Place object
+    if not places:
+        logger.info("No places found matching criteria.")
+        page = {"items": [], "next_cursor": None, "facets": facets}
+        places_cache.set(cache_key, page, tags=[city_id])
+        return page
+
+    places_data = await build_place_list_data(db, background_tasks, places, fields=fields)
+    if sort_key == "distance_asc":
+        new_cursor = next_cursor(sort_key, rows, limit, lambda row: [row.distance, row[0].id])
+    elif sort_key == "relevance":
+        new_cursor = next_cursor(sort_key, rows, limit, lambda row: [row.rank, row[0].id])
+    elif sort_key == "popular":
+        new_cursor = next_cursor(sort_key, rows, limit, lambda row: [row.popularity, row[0].id])
     else:
-        # Result contains only Place objects
-        places = result.scalars().all()
+        new_cursor = next_cursor(sort_key, places, limit, lambda place: [place.name, place.id])
+
+    logger.info("Finished preparing places list data.")
+    page = {"items": places_data, "next_cursor": new_cursor, "facets": facets}
+    places_cache.set(cache_key, page, tags=[city_id])
+    return page
+
+
+def _category_facets_query(filters: List[Any]):
+    """Select returning a single JSON object {category: place count} for the given filters."""
+    counts = (
+        select(models.Place.category, sql_func.count().label("place_count"))
+        .where(*filters)
+        .group_by(models.Place.category)
+        .correlate(None) # Must not correlate with the outer places query
+        .subquery()
+    )
+    return select(
+        sql_func.json_object_agg(counts.c.category, counts.c.place_count, type_=JSON)
+    ).correlate(None)
+
+
+def _attribute_filters(attributes: Dict[str, List[str]]) -> List[Any]:
+    """
+    JSONB containment filters for {key: [values]}: keys with a single value share one
+    @> document, keys with several values become an OR of @> (each served by ix_places_attributes_gin).
+    """
+    single = {key: values[0] for key, values in attributes.items() if len(values) == 1}
+    filters = [models.Place.attributes.contains(single)] if single else []
+    for key, values in attributes.items():
+        if len(values) > 1:
+            filters.append(or_(*(models.Place.attributes.contains({key: value}) for value in values)))
+    return filters
 
 
-    if not places:
-        logger.info("No places found matching criteria.")
+async def _local_now(db: AsyncSession, city_id: Optional[int]) -> datetime.datetime:
+    """
+    Current wall-clock time for open_now: in the city's timezone when known,
+    otherwise in settings.DEFAULT_PLACE_TIMEZONE (UTC if that isn't recognised either).
+    """
+    tz = None
+    if city_id is not None:
+        tz_name = (await db.execute(
+            select(models.City.timezone).where(models.City.id == city_id)
+        )).scalar_one_or_none()
+        tz = opening_hours.resolve_timezone(tz_name)
+    tz = tz or opening_hours.resolve_timezone(settings.DEFAULT_PLACE_TIMEZONE) or datetime.timezone.utc
+    return datetime.datetime.now(tz)
+
+
+def _facets_to_list(facet_counts: Optional[Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Converts {category: count} to a list sorted by count (desc) then name."""
+    if not facet_counts:
         return []
+    return [
+        {"category": category, "count": count}
+        for category, count in sorted(facet_counts.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def place_list_dict(place: models.Place, image_urls: List[str], fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    List-view dict for a place matching the Place schema (only the first, primary, image is kept).
+    With `fields`, only the loaded (requested) columns are read.
+    """
+    if fields is not None:
+        data = {column: getattr(place, column) for column in PLACE_LIST_COLUMNS if column in fields}
+        data["id"] = place.id
+        if "images" in fields:
+            data["images"] = image_urls[:1]
+        return data
+    return {
+        "id": place.id,
+        "name": place.name,
+        "latitude": place.latitude,
+        "longitude": place.longitude,
+        "category": place.category,
+        "address": place.address,
+        "city_id": place.city_id,
+        "images": image_urls[:1]
+    }
 
-    # --- Image Fetching (same as before) ---
+
+async def build_place_list_data(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    places: List[models.Place],
+    fields: Optional[Set[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Builds the list-view dicts (matching the Place schema) for already loaded places.
+    Fetches each place's primary image in one query and triggers background tasks for missing ones.
+    With a sparse fieldset only the requested keys are kept, images are skipped unless requested.
+    """
+    if fields is not None and "images" not in fields:
+        return [place_list_dict(place, [], fields) for place in places]
+
+    loaders = get_loaders(db)
+
+    # --- Image Fetching (one query for the whole page, one image per place) ---
     place_ids = [place.id for place in places]
     logger.info(f"Found {len(places)} places with IDs: {place_ids}")
+    images_by_place_id = await loaders.primary_place_images.load_many(place_ids)
 
-    stmt_images = select(models.PlaceImage).where(models.PlaceImage.place_id.in_(place_ids))
-    result_images = await db.execute(stmt_images)
-    images: List[models.PlaceImage] = result_images.scalars().all()
-    images_by_place_id: Dict[int, List[str]] = {place_id: [] for place_id in place_ids}
-    for image in images:
-        if image.place_id in images_by_place_id:
-            images_by_place_id[image.place_id].append(str(image.image_url))
-
-    # --- Prepare Response and Trigger BG Tasks (same as before) ---
+    # --- Prepare Response and Trigger BG Tasks ---
     places_data = []
     places_missing_images = []
     for place in places:
         place_existing_images = images_by_place_id.get(place.id, [])
-        place_dict = {
-            "id": place.id,
-            "name": place.name,
-            "latitude": place.latitude,
-            "longitude": place.longitude,
-            "category": place.category,
-            "address": place.address,
-            "city_id": place.city_id,
-            "images": place_existing_images[:1]
-        }
-        places_data.append(place_dict)
+        places_data.append(place_list_dict(place, place_existing_images, fields))
         if not place_existing_images:
             places_missing_images.append(place)
 
     if places_missing_images:
         logger.info(f"Triggering background tasks for {len(places_missing_images)} places missing images.")
+        # Need city name context for wikimedia search, one query for all cities involved
+        city_names = await loaders.city_names.load_many(place.city_id for place in places_missing_images)
         for place_to_fetch in places_missing_images:
-            # Need city name context for wikimedia search
-            current_city_name = None
-            if place_to_fetch.city_id: # Attempt to get city name if city_id exists
-                 city_res = await db.execute(select(models.City.name).where(models.City.id == place_to_fetch.city_id))
-                 current_city_name = city_res.scalar_one_or_none()
-
             background_tasks.add_task(
                 fetch_and_store_place_image_task,
                 place_id=place_to_fetch.id,
                 place_name=place_to_fetch.name,
                 category=place_to_fetch.category,
-                city_name=current_city_name
+                city_name=city_names.get(place_to_fetch.city_id),
+                city_id=place_to_fetch.city_id
             )
 
-    logger.info("Finished preparing places list data.")
     return places_data
+
+
+# --- Nearby places (GiST index over ll_to_earth, see app/db/ddl.py) ---
+async def get_nearby_places(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    *,
+    latitude: float,
+    longitude: float,
+    radius_m: Optional[float] = None,
+    category: Optional[str] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    Retrieves places around a point, closest first.
+    With `radius_m` only places within that distance are returned,
+    otherwise the `limit` nearest places (k-NN) are returned.
+    """
+    logger.info(f"Fetching nearby places: lat={latitude}, lon={longitude}, radius_m={radius_m}, category='{category}', limit={limit}")
+
+    # Both expressions must match the indexed expression exactly for the planner to use ix_places_earth
+    place_point = sql_func.ll_to_earth(models.Place.latitude, models.Place.longitude)
+    origin = sql_func.ll_to_earth(latitude, longitude)
+    distance = sql_func.earth_distance(origin, place_point)
+
+    stmt = select(models.Place, distance.label("distance_m")).options(
+        raiseload(models.Place.images),
+        place_load_only(PLACE_LIST_COLUMNS, None)
+    )
+
+    if radius_m is not None:
+        # earth_box is an index-friendly bounding cube, it can include points just outside
+        # the radius, so the exact distance check is still needed.
+        stmt = stmt.where(
+            sql_func.earth_box(origin, radius_m).op('@>')(place_point),
+            distance <= radius_m
+        )
+
+    if category:
+        stmt = stmt.where(sql_func.lower(models.Place.category) == sql_func.lower(category))
+
+    # <-> on cube is a GiST k-NN ordering. The chord distance it uses grows with the
+    # great-circle distance, so the order is the same as ordering by earth_distance.
+    stmt = stmt.order_by(place_point.op('<->')(origin)).limit(limit)
+
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    if not rows:
+        logger.info("No nearby places found.")
+        return []
+
+    places = [row[0] for row in rows]
+    places_data = await build_place_list_data(db, background_tasks, places)
+    for place_dict, row in zip(places_data, rows):
+        place_dict["distance_m"] = round(row.distance_m, 1)
+
+    return places_data
+
+# Trending rankings only change with new visits, a few minutes of staleness is fine
+trending_cache = TTLCache(
+    max_entries=settings.TRENDING_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TRENDING_CACHE_TTL_SECONDS
+)
+
+
+async def get_trending_places(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    *,
+    window: str,
+    city_id: Optional[int] = None,
+    limit: int = settings.DEFAULT_PAGE_SIZE
+) -> List[Dict[str, Any]]:
+    """
+    Most visited places over a trending window ("24h" or "7d"), each with its `visit_count`.
+    Sums the hourly place_visit_buckets of the window (at most 168 rows per place)
+    instead of aggregating user_visit_history. Results are cached for TRENDING_CACHE_TTL_SECONDS.
+    """
+    cache_key = ("trending", window, city_id, limit)
+    cached = trending_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    logger.info(f"Computing trending places: window={window}, city_id={city_id}, limit={limit}")
+    bucket = models.PlaceVisitBucket
+    visit_count = sql_func.sum(bucket.visit_count).label("visit_count")
+    ranking = (
+        select(bucket.place_id, visit_count)
+        .where(bucket.bucket_start >= sql_func.now() - crud_popularity.TRENDING_WINDOWS[window])
+        .group_by(bucket.place_id)
+        .order_by(visit_count.desc(), bucket.place_id)
+        .limit(limit)
+    )
+    if city_id is not None:
+        ranking = ranking.where(bucket.city_id == city_id)
+    ranked = (await db.execute(ranking)).all()
+
+    places_data: List[Dict[str, Any]] = []
+    if ranked:
+        stmt = select(models.Place).options(
+            raiseload(models.Place.images),
+            place_load_only(PLACE_LIST_COLUMNS, None)
+        ).where(models.Place.id.in_([row.place_id for row in ranked]))
+        places_by_id = {place.id: place for place in (await db.execute(stmt)).scalars().all()}
+        ordered = [(places_by_id[row.place_id], row.visit_count) for row in ranked if row.place_id in places_by_id]
+        places_data = await build_place_list_data(db, background_tasks, [place for place, _ in ordered])
+        for place_dict, (_, count) in zip(places_data, ordered):
+            place_dict["visit_count"] = count
+
+    trending_cache.set(cache_key, places_data)
+    return places_data
+
+async def get_similar_places(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    *,
+    place_id: int,
+    limit: int = 10
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Places most often co-visited/co-favorited with `place_id`, each with its similarity `score`.
+    Reads the neighbour list precomputed by scripts/compute_similar_places.py (one lookup on
+    the place_similarities primary key). Returns None if the place doesn't exist.
+    """
+    similarity = models.PlaceSimilarity
+    stmt = (
+        select(models.Place, similarity.score)
+        .join(similarity, similarity.similar_place_id == models.Place.id)
+        .where(similarity.place_id == place_id)
+        .options(raiseload(models.Place.images), place_load_only(PLACE_LIST_COLUMNS, None))
+        .order_by(similarity.score.desc(), models.Place.id)
+        .limit(limit)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        # No neighbours yet (new or rarely visited place), or no such place
+        exists = (await db.execute(select(models.Place.id).where(models.Place.id == place_id))).scalar_one_or_none()
+        return [] if exists is not None else None
+
+    places_data = await build_place_list_data(db, background_tasks, [row[0] for row in rows])
+    for place_dict, row in zip(places_data, rows):
+        place_dict["score"] = round(row.score, 4)
+    return places_data
+
 # --- New function for getting place details ---
 async def get_place_details_with_images(
     db: AsyncSession,
     background_tasks: BackgroundTasks,
-    place_id: int
+    place_id: int,
+    fields: Optional[Set[str]] = None # Sparse fieldset, None means every field
 ) -> Optional[Dict[str, Any]]: # Return dict matching schema structure
     """
     Retrieves details for a single place by ID, fetches existing images,
     and triggers background tasks for missing images.
     """
     logger.info(f"Fetching details for place_id: {place_id}")
-    # --- 1. Fetch Place by ID ---
-    # Optionally joinload the city if city_name is needed for image search context
-    stmt_place = select(models.Place).options(
-        joinedload(models.Place.city) # Example: Load city if city_id exists
-    ).where(models.Place.id == place_id)
-
-    result_place = await db.execute(stmt_place)
-    place: Optional[models.Place] = result_place.scalars().first()
-
-    if not place:
+    details = await get_places_details_batch(db, background_tasks, [place_id], fields=fields)
+    if not details:
         logger.warning(f"Place with id {place_id} not found.")
         return None # Place not found
+    return details[0]
 
-    # --- 2. Fetch Existing Images (Batch Query - only one ID here) ---
-    stmt_images = select(models.PlaceImage).where(models.PlaceImage.place_id == place.id)
-    # Optionally order images (e.g., featured first)
-    # stmt_images = stmt_images.order_by(models.PlaceImage.is_featured.desc(), models.PlaceImage.created_at)
-    result_images = await db.execute(stmt_images)
-    images: List[models.PlaceImage] = result_images.scalars().all()
-
-    image_urls = [str(img.image_url) for img in images] # Extract URLs
-    logger.info(f"Found {len(image_urls)} existing images for place {place_id}.")
-
-    # --- 3. Trigger Background Task if No Images Found ---
-    if not image_urls:
-        logger.info(f"No existing images found for place {place_id}. Triggering background task.")
-        # Extract city name if loaded and available
-        city_name_context = place.city.name if place.city else None
-        background_tasks.add_task(
-            fetch_and_store_place_image_task, # Reuse the same task function
-            place_id=place.id,
-            place_name=place.name,
-            category=place.category,
-            city_name=city_name_context
-        )
+
+async def get_places_details_batch(
+    db: AsyncSession,
+    background_tasks: BackgroundTasks,
+    place_ids: List[int],
+    fields: Optional[Set[str]] = None # Sparse fieldset, None means every field
+) -> List[Dict[str, Any]]:
+    """
+    Retrieves details (PlaceDetail dicts) for many places in the order of `place_ids`,
+    silently skipping unknown IDs. Uses one query for the places and one for their images,
+    plus one for city names if some places need a background image fetch.
+    With `fields`, only those columns are loaded and images are skipped unless requested.
+    """
+    place_ids = list(dict.fromkeys(place_ids)) # De-duplicate, keep order
+    logger.info(f"Fetching details for {len(place_ids)} places: {place_ids}")
+    loaders = get_loaders(db)
+
+    # --- 1. Fetch Places by ID ---
+    # Images come from the loader below, the city name only when an image fetch is needed
+    stmt_places = select(models.Place).options(
+        raiseload(models.Place.images),
+        place_load_only(PLACE_DETAIL_COLUMNS, fields)
+    ).where(models.Place.id.in_(place_ids))
+    result_places = await db.execute(stmt_places)
+    places_by_id = {place.id: place for place in result_places.scalars().all()}
+    places = [places_by_id[place_id] for place_id in place_ids if place_id in places_by_id]
+    if not places:
+        return []
+
+    if fields is not None and "images" not in fields:
+        return [_select_fields(_place_detail_dict(place, [], fields), fields) for place in places]
+
+    # --- 2. Fetch Existing Images (one IN query, memoized per request) ---
+    images_by_place_id = await loaders.place_images.load_many(place.id for place in places)
+
+    # --- 3. Trigger Background Tasks for Places Without Images ---
+    places_missing_images = [place for place in places if not images_by_place_id[place.id]]
+    if places_missing_images:
+        logger.info(f"No existing images for {len(places_missing_images)} places. Triggering background tasks.")
+        city_names = await loaders.city_names.load_many(place.city_id for place in places_missing_images)
+        for place in places_missing_images:
+            background_tasks.add_task(
+                fetch_and_store_place_image_task, # Reuse the same task function
+                place_id=place.id,
+                place_name=place.name,
+                category=place.category,
+                city_name=city_names.get(place.city_id),
+                city_id=place.city_id
+            )
 
     # --- 4. Prepare Response Data ---
-    # Convert the SQLAlchemy model object to a dictionary.
-    # Pydantic's from_orm can handle this well, but doing it manually
-    # gives more control, especially adding the images list.
-    place_data = {
+    return [
+        _select_fields(_place_detail_dict(place, images_by_place_id[place.id], fields), fields)
+        for place in places
+    ]
+
+
+def _place_detail_dict(place: models.Place, image_urls: List[str], fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    Converts the SQLAlchemy model object to a dictionary matching PlaceDetail.
+    Pydantic's from_orm can handle this well, but doing it manually
+    gives more control, especially adding the images list.
+    With `fields`, only the loaded (requested) columns are read.
+    """
+    if fields is not None:
+        data = {column: getattr(place, column) for column in PLACE_DETAIL_COLUMNS if column in fields}
+        data["id"] = place.id
+        data["images"] = image_urls
+        return data
+    return {
         "id": place.id,
         "name": place.name,
         "latitude": place.latitude,
@@ -279,5 +705,3 @@ async def get_place_details_with_images(
         "updated_at": place.updated_at,
         "images": image_urls # Add the list of fetched image URLs
     }
-
-    return place_data
\ No newline at end of file
@@ -0,0 +1,187 @@
+# app/crud/crud_popularity.py
+# Materialized popularity scores (places.popularity_score, cities.popularity_score)
+# and the hourly visit counters behind trending places (place_visit_buckets).
+#
+# place score = FAVORITE_WEIGHT * favorites
+#             + VISIT_WEIGHT * sum over recent visits of 0.5 ** (age / VISIT_HALF_LIFE)
+#
+# The full refresh (scripts/refresh_popularity.py, e.g. hourly) recomputes every
+# score with decay. In between, favorites and visits bump the score of their place
+# by their undecayed weight, so new activity shows up immediately and only ages
+# at the next refresh. City scores are only computed by the refresh.
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, text, update
+from sqlalchemy import func as sql_func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_WEIGHT = 5.0
+VISIT_WEIGHT = 1.0
+VISIT_HALF_LIFE = timedelta(days=14)
+# Visits older than this contribute less than 1% and are not scanned by the refresh
+VISIT_WINDOW = timedelta(days=100)
+
+
+async def bump_place_popularity(db: AsyncSession, place_id: int, delta: float) -> None:
+    """Adds `delta` to a place's score in the caller's transaction (single-row atomic update)."""
+    await db.execute(
+        update(models.Place)
+        .where(models.Place.id == place_id)
+        # Keep updated_at: a score change isn't an edit of the place
+        .values(popularity_score=models.Place.popularity_score + delta, updated_at=models.Place.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def refresh_place_popularity(db: AsyncSession) -> int:
+    """
+    Recomputes every place's score from user_favorites and the last VISIT_WINDOW of
+    user_visit_history, in the caller's transaction. Only rows whose score changes are
+    written. Returns the number of updated places.
+    """
+    result = await db.execute(
+        text("""
+            WITH favorites AS (
+                SELECT place_id, count(*) AS favorite_count
+                FROM user_favorites
+                GROUP BY place_id
+            ),
+            visits AS (
+                SELECT place_id,
+                       sum(power(0.5, extract(epoch FROM now() - visited_at)::float8 / CAST(:half_life_seconds AS float8))) AS visit_score
+                FROM user_visit_history
+                WHERE visited_at >= now() - make_interval(secs => CAST(:window_seconds AS float8))
+                GROUP BY place_id
+            ),
+            scores AS (
+                SELECT p.id,
+                       coalesce(f.favorite_count, 0) * CAST(:favorite_weight AS float8)
+                       + coalesce(v.visit_score, 0) * CAST(:visit_weight AS float8) AS score
+                FROM places p
+                LEFT JOIN favorites f ON f.place_id = p.id
+                LEFT JOIN visits v ON v.place_id = p.id
+            )
+            UPDATE places
+            SET popularity_score = scores.score
+            FROM scores
+            WHERE places.id = scores.id
+              AND places.popularity_score IS DISTINCT FROM scores.score
+        """),
+        {
+            "half_life_seconds": VISIT_HALF_LIFE.total_seconds(),
+            "window_seconds": VISIT_WINDOW.total_seconds(),
+            "favorite_weight": FAVORITE_WEIGHT,
+            "visit_weight": VISIT_WEIGHT,
+        }
+    )
+    logger.info(f"Refreshed place popularity: {result.rowcount} places changed")
+    return result.rowcount
+
+
+# City score = weighted sum of log(1 + x) over population, number of places and the
+# summed popularity of its places: logs keep megacities from drowning everything else,
+# user activity breaks ties between cities of similar size.
+CITY_POPULATION_WEIGHT = 1.0
+CITY_PLACES_WEIGHT = 1.0
+CITY_ACTIVITY_WEIGHT = 2.0
+
+
+async def refresh_city_popularity(db: AsyncSession) -> int:
+    """
+    Recomputes every city's score from its population and places, in the caller's
+    transaction. Run after refresh_place_popularity so the activity part is current.
+    Only rows whose score changes are written. Returns the number of updated cities.
+    """
+    result = await db.execute(
+        text("""
+            WITH place_stats AS (
+                SELECT city_id, count(*) AS place_count, sum(greatest(popularity_score, 0)) AS activity
+                FROM places
+                WHERE city_id IS NOT NULL
+                GROUP BY city_id
+            ),
+            scores AS (
+                SELECT c.id,
+                       ln(1 + greatest(coalesce(c.population, 0), 0)::float8) * CAST(:population_weight AS float8)
+                       + ln(1 + coalesce(s.place_count, 0)::float8) * CAST(:places_weight AS float8)
+                       + ln(1 + coalesce(s.activity, 0)::float8) * CAST(:activity_weight AS float8) AS score
+                FROM cities c
+                LEFT JOIN place_stats s ON s.city_id = c.id
+            )
+            UPDATE cities
+            SET popularity_score = scores.score
+            FROM scores
+            WHERE cities.id = scores.id
+              AND cities.popularity_score IS DISTINCT FROM scores.score
+        """),
+        {
+            "population_weight": CITY_POPULATION_WEIGHT,
+            "places_weight": CITY_PLACES_WEIGHT,
+            "activity_weight": CITY_ACTIVITY_WEIGHT,
+        }
+    )
+    logger.info(f"Refreshed city popularity: {result.rowcount} cities changed")
+    return result.rowcount
+
+
+# --- Trending: hourly visit buckets ---
+# Window name -> length, buckets older than the longest window are pruned
+TRENDING_WINDOWS = {"24h": timedelta(hours=24), "7d": timedelta(days=7)}
+BUCKET_RETENTION = max(TRENDING_WINDOWS.values())
+
+
+async def record_visit_bucket(db: AsyncSession, place_id: int, city_id: Optional[int]) -> None:
+    """Counts one visit in the place's bucket for the current hour (upsert, in the caller's transaction)."""
+    bucket = models.PlaceVisitBucket
+    stmt = insert(bucket).values(
+        place_id=place_id,
+        bucket_start=sql_func.date_trunc("hour", sql_func.now()),
+        city_id=city_id,
+        visit_count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[bucket.place_id, bucket.bucket_start],
+        set_={"visit_count": bucket.visit_count + 1}
+    )
+    await db.execute(stmt)
+
+
+async def prune_visit_buckets(db: AsyncSession) -> int:
+    """Deletes buckets no trending window reaches anymore. Returns the number deleted."""
+    result = await db.execute(
+        delete(models.PlaceVisitBucket).where(
+            models.PlaceVisitBucket.bucket_start < sql_func.now() - BUCKET_RETENTION
+        )
+    )
+    logger.info(f"Pruned {result.rowcount} visit buckets older than {BUCKET_RETENTION}")
+    return result.rowcount
+
+
+async def rebuild_visit_buckets(db: AsyncSession) -> int:
+    """
+    Recreates the buckets of the retention period from user_visit_history, in the
+    caller's transaction (used once to backfill, or to repair counters).
+    Returns the number of buckets written.
+    """
+    await db.execute(delete(models.PlaceVisitBucket))
+    result = await db.execute(
+        text("""
+            INSERT INTO place_visit_buckets (place_id, bucket_start, city_id, visit_count)
+            SELECT h.place_id, date_trunc('hour', h.visited_at), p.city_id, count(*)
+            FROM user_visit_history h
+            JOIN places p ON p.id = h.place_id
+            WHERE h.visited_at >= now() - make_interval(secs => CAST(:retention_seconds AS float8))
+            GROUP BY h.place_id, date_trunc('hour', h.visited_at), p.city_id
+        """),
+        {"retention_seconds": BUCKET_RETENTION.total_seconds()}
+    )
+    logger.info(f"Rebuilt {result.rowcount} visit buckets from visit history")
+    return result.rowcount
+
@@ -0,0 +1,205 @@
+# app/crud/crud_search.py
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, cast, select, literal, null, or_, union_all
+from sqlalchemy import func as sql_func
+
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.category_catalog import category_catalog
+
+logger = logging.getLogger(__name__)
+
+# Below this length trigrams are meaningless, only prefix matches are used
+MIN_FUZZY_QUERY_LENGTH = 3
+
+
+def _suggestion_select(model, q: str, limit: int, type_name: str, city_id_column):
+    """
+    Builds the suggestion query for one table (places or cities).
+    Uses the lower(name) trigram/prefix indexes from app/db/ddl.py.
+    """
+    name_lower = sql_func.lower(model.name)
+    is_prefix = name_lower.startswith(q, autoescape=True)
+
+    match = is_prefix
+    if len(q) >= MIN_FUZZY_QUERY_LENGTH:
+        # q <% name: some word (or word prefix) of name is similar to q
+        match = or_(is_prefix, literal(q).op('<%')(name_lower))
+    score = sql_func.word_similarity(q, name_lower)
+
+    stmt = (
+        select(
+            literal(type_name).label("type"),
+            model.id.label("id"),
+            model.name.label("name"),
+            city_id_column.label("city_id"),
+            score.label("score"),
+            is_prefix.label("is_prefix"),
+        )
+        .where(match)
+        .order_by(is_prefix.desc(), score.desc(), sql_func.length(model.name))
+        .limit(limit)
+    )
+    return stmt.subquery()
+
+
+async def get_suggestions(db: AsyncSession, *, q: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Returns up to `limit` place and city names matching partial or misspelled input.
+    Prefix matches come first, then the closest trigram matches.
+    Both tables are searched in a single round trip.
+    """
+    q = q.strip().lower()
+    if not q:
+        return []
+
+    places_sq = _suggestion_select(models.Place, q, limit, "place", models.Place.city_id)
+    cities_sq = _suggestion_select(models.City, q, limit, "city", cast(null(), Integer))
+    stmt = union_all(select(places_sq), select(cities_sq))
+
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    # Each side is already limited, merge the two short lists here
+    rows.sort(key=lambda row: (not row.is_prefix, -row.score))
+    logger.debug(f"Suggestions for '{q}': {len(rows)} candidates")
+    return [
+        {
+            "type": row.type,
+            "id": row.id,
+            "name": row.name,
+            "city_id": row.city_id,
+            "score": round(row.score, 3),
+        }
+        for row in rows[:limit]
+    ]
+
+
+# --- Unified search (GET /search) ---
+# Every group is scored in [0, 1] on the same scale (name word similarity, prefix
+# matches boosted), so the groups can be merged into one ranked "top" list.
+PREFIX_BOOST = 0.25
+# A country match is weaker evidence than a city name match
+COUNTRY_MATCH_WEIGHT = 0.8
+# Full-text rank normalized to [0, 1) (ts_rank_cd normalization 32: rank / (rank + 1))
+FTS_RANK_NORMALIZATION = 32
+
+
+def _name_score(name_lower, q: str):
+    """word_similarity(q, name) plus a boost for prefix matches, capped at 1."""
+    is_prefix = name_lower.startswith(q, autoescape=True)
+    return sql_func.least(
+        sql_func.word_similarity(q, name_lower) + cast(is_prefix, Integer) * PREFIX_BOOST,
+        1.0
+    )
+
+
+def _name_match(name_lower, q: str):
+    match = name_lower.startswith(q, autoescape=True)
+    if len(q) >= MIN_FUZZY_QUERY_LENGTH:
+        match = or_(match, literal(q).op('<%')(name_lower))
+    return match
+
+
+async def _search_cities(q: str, limit: int) -> List[Dict[str, Any]]:
+    """Cities whose name, or country name, matches q."""
+    city_name = sql_func.lower(models.City.name)
+    country_name = sql_func.lower(models.Country.name)
+    score = sql_func.greatest(
+        _name_score(city_name, q),
+        _name_score(country_name, q) * COUNTRY_MATCH_WEIGHT
+    ).label("score")
+    stmt = (
+        select(models.City.id, models.City.name, models.Country.name.label("country"), score)
+        .join(models.Country, models.City.country_id == models.Country.id)
+        .where(or_(_name_match(city_name, q), _name_match(country_name, q)))
+        .order_by(score.desc(), models.City.id)
+        .limit(limit)
+    )
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(stmt)).all()
+    return [
+        {"type": "city", "id": row.id, "name": row.name, "country": row.country, "score": float(row.score)}
+        for row in rows
+    ]
+
+
+async def _search_places(q: str, limit: int, city_id: Optional[int]) -> List[Dict[str, Any]]:
+    """Places matching q by full-text search (name, category, description...) or by name."""
+    name_lower = sql_func.lower(models.Place.name)
+    query_ts = sql_func.plainto_tsquery('simple', q)
+    fts_match = models.Place.fts_vector.op('@@')(query_ts)
+    score = sql_func.greatest(
+        _name_score(name_lower, q),
+        sql_func.ts_rank_cd(models.Place.fts_vector, query_ts, FTS_RANK_NORMALIZATION)
+    ).label("score")
+    stmt = (
+        select(models.Place.id, models.Place.name, models.Place.category, models.Place.city_id, score)
+        .where(or_(fts_match, _name_match(name_lower, q)))
+        .order_by(score.desc(), models.Place.id)
+        .limit(limit)
+    )
+    if city_id is not None:
+        stmt = stmt.where(models.Place.city_id == city_id)
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(stmt)).all()
+    return [
+        {
+            "type": "place", "id": row.id, "name": row.name, "category": row.category,
+            "city_id": row.city_id, "score": float(row.score),
+        }
+        for row in rows
+    ]
+
+
+async def _search_categories(q: str, limit: int, city_id: Optional[int]) -> List[Dict[str, Any]]:
+    """Categories from the in-memory catalog whose name starts with or contains q."""
+    if category_catalog.is_stale:
+        async with AsyncSessionLocal() as db:
+            await category_catalog.ensure_loaded(db)
+
+    matches = []
+    for entry in category_catalog.counts(city_id):
+        name = entry["category"].lower().replace("_", " ")
+        if name == q:
+            score = 1.0
+        elif name.startswith(q):
+            score = 0.9
+        elif q in name:
+            score = 0.6
+        else:
+            continue
+        matches.append({"type": "category", "name": entry["category"], "place_count": entry["count"], "score": score})
+    matches.sort(key=lambda match: (-match["score"], -match["place_count"]))
+    return matches[:limit]
+
+
+async def search_all(*, q: str, limit: int = 5, city_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Searches cities, places and categories for one query.
+    The database sub-queries run concurrently, each on its own pooled session
+    (an AsyncSession can't run two statements at once), so the latency is that
+    of the slowest group rather than the sum.
+    Returns {"query", "cities", "places", "categories", "top"}; "top" merges every
+    group by score. `city_id` scopes places and categories to one city.
+    """
+    q = " ".join(q.lower().split())
+    if not q:
+        return {"query": q, "cities": [], "places": [], "categories": [], "top": []}
+
+    cities, places, categories = await asyncio.gather(
+        _search_cities(q, limit),
+        _search_places(q, limit, city_id),
+        _search_categories(q, limit, city_id),
+    )
+    for hit in (*cities, *places):
+        hit["score"] = round(hit["score"], 3)
+
+    top = sorted((*cities, *places, *categories), key=lambda hit: -hit["score"])[:limit]
+    logger.debug(f"Search '{q}': {len(cities)} cities, {len(places)} places, {len(categories)} categories")
+    return {"query": q, "cities": cities, "places": places, "categories": categories, "top": top}
+
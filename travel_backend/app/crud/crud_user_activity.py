@@ -1,13 +1,17 @@
 # app/crud/crud_user_activity.py
 import logging
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, and_
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, raiseload
+from starlette.concurrency import run_in_threadpool
 
 from app.db import models
+from app.crud import crud_place, crud_popularity
+from app.crud.loaders import get_loaders
+from app.services.route_optimizer import RoutePlanner, Stop
 from app.schemas import Place as PlaceSchema # For returning favorite places
 
 logger = logging.getLogger(__name__)
@@ -36,6 +40,7 @@ async def add_favorite(db: AsyncSession, *, user_id: int, place_id: int) -> Opti
     # Create new favorite record
     db_fav = models.UserFavorite(user_id=user_id, place_id=place_id)
     db.add(db_fav)
+    await crud_popularity.bump_place_popularity(db, place_id, crud_popularity.FAVORITE_WEIGHT)
     # Commit will be handled by the request lifecycle (get_db dependency)
     # await db.flush() # Optional: Flush to ensure it exists before returning (no ID needed here)
     logger.info(f"Added place {place_id} to favorites for user {user_id}")
@@ -58,6 +63,7 @@ async def remove_favorite(db: AsyncSession, *, user_id: int, place_id: int) -> b
     result = await db.execute(stmt)
     # Commit handled by request lifecycle
     if result.scalar_one_or_none() is not None:
+         await crud_popularity.bump_place_popularity(db, place_id, -crud_popularity.FAVORITE_WEIGHT)
          logger.info(f"Removed place {place_id} from favorites for user {user_id}")
          return True
     else:
@@ -65,20 +71,100 @@ async def remove_favorite(db: AsyncSession, *, user_id: int, place_id: int) -> b
         return False # Indicate it wasn't favorited
 
 
-async def get_favorite_places(db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Place]:
-    """Gets the list of places favorited by a user."""
+def _favorite_places_stmt(user_id: int, city_id: Optional[int] = None):
     stmt = (
         select(models.Place)
         .join(models.UserFavorite, models.Place.id == models.UserFavorite.place_id)
         .where(models.UserFavorite.user_id == user_id)
         .order_by(models.UserFavorite.created_at.desc()) # Order by when favorited
-        .options(selectinload(models.Place.images).load_only(models.PlaceImage.image_url)) # Eager load image URLs
-        .offset(skip)
-        .limit(limit)
+        .options(raiseload(models.Place.images)) # Image URLs come from the batch loader
     )
+    if city_id is not None:
+        stmt = stmt.where(models.Place.city_id == city_id)
+    return stmt
+
+
+async def get_favorite_places(
+    db: AsyncSession, *, user_id: int, city_id: Optional[int] = None, skip: int = 0, limit: int = 100
+) -> List[Dict[str, Any]]:
+    """Gets the list of places favorited by a user (optionally in one city), as dicts matching the Place schema."""
+    stmt = _favorite_places_stmt(user_id, city_id).offset(skip).limit(limit)
     result = await db.execute(stmt)
     places = result.scalars().all()
-    return places
+
+    images_by_place_id = await get_loaders(db).primary_place_images.load_many(place.id for place in places)
+    return [crud_place.place_list_dict(place, images_by_place_id[place.id]) for place in places]
+
+
+async def get_itinerary(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    city_id: int,
+    days: int = 1,
+    start_date: Optional[date] = None,
+    start_latitude: Optional[float] = None,
+    start_longitude: Optional[float] = None,
+    max_stops: int = 200
+) -> Dict[str, Any]:
+    """
+    Orders the user's favorites in a city into day routes (dict matching the Itinerary schema).
+    Routing runs in app/services/route_optimizer.py (distance matrix + nearest neighbour + 2-opt),
+    respecting each place's compiled opening hours on the date it is visited.
+    Each day starts from (start_latitude, start_longitude) when given.
+    """
+    start_date = start_date or date.today()
+    result = await db.execute(_favorite_places_stmt(user_id, city_id).limit(max_stops))
+    places = result.scalars().all()
+    logger.info(f"Planning itinerary for user {user_id}, city {city_id}: {len(places)} favorites over {days} day(s)")
+
+    stops = [
+        Stop(
+            id=place.id,
+            latitude=place.latitude,
+            longitude=place.longitude,
+            # opening_minutes is a list of [lower, upper) integer ranges, NULL = unknown hours
+            opening_intervals=(
+                [(r.lower, r.upper) for r in place.opening_minutes] if place.opening_minutes is not None else None
+            ),
+        )
+        for place in places
+    ]
+    origin = (start_latitude, start_longitude) if start_latitude is not None and start_longitude is not None else None
+    def plan_routes():
+        return RoutePlanner(stops, origin=origin).plan(days=days, first_weekday=start_date.weekday())
+
+    # CPU-bound (distance matrix, 2-opt, scheduling), keep it off the event loop
+    plans, unscheduled = await run_in_threadpool(plan_routes)
+
+    images_by_place_id = await get_loaders(db).primary_place_images.load_many(place.id for place in places)
+    place_dicts = [crud_place.place_list_dict(place, images_by_place_id[place.id]) for place in places]
+
+    def clock(minutes: int) -> time:
+        return time(hour=minutes // 60, minute=minutes % 60)
+
+    day_dicts = []
+    for day_number, plan in enumerate(plans, start=1):
+        day_dicts.append({
+            "day": day_number,
+            "date": start_date + timedelta(days=day_number - 1),
+            "distance_m": round(plan.distance_m, 1),
+            "stops": [
+                {
+                    "place": place_dicts[stop.stop_index],
+                    "arrival": clock(stop.arrival),
+                    "departure": clock(stop.departure),
+                    "distance_from_previous_m": round(stop.distance_from_previous_m, 1),
+                }
+                for stop in plan.stops
+            ],
+        })
+    return {
+        "city_id": city_id,
+        "total_distance_m": round(sum(plan.distance_m for plan in plans), 1),
+        "days": day_dicts,
+        "unscheduled": [place_dicts[index] for index in unscheduled],
+    }
 
 
 async def get_favorite_place_ids(db: AsyncSession, *, user_id: int) -> List[int]:
@@ -103,13 +189,18 @@ async def record_visit(db: AsyncSession, *, user_id: int, place_id: int) -> mode
 
     db_visit = models.UserVisitHistory(user_id=user_id, place_id=place_id)
     db.add(db_visit)
+    await crud_popularity.bump_place_popularity(db, place_id, crud_popularity.VISIT_WEIGHT)
+    await crud_popularity.record_visit_bucket(db, place_id, place.city_id)
     # Commit handled by request lifecycle
     logger.info(f"Recorded visit for user {user_id} to place {place_id}")
     return db_visit
 
 
-async def get_visit_history(db: AsyncSession, *, user_id: int, days: int = 30, skip: int = 0, limit: int = 100) -> List[models.UserVisitHistory]:
-    """Gets the user's visit history for the specified number of past days."""
+async def get_visit_history(db: AsyncSession, *, user_id: int, days: int = 30, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Gets the user's visit history for the specified number of past days,
+    as dicts matching the VisitHistoryEntry schema.
+    """
     since_date = datetime.utcnow() - timedelta(days=days)
 
     stmt = (
@@ -119,11 +210,10 @@ async def get_visit_history(db: AsyncSession, *, user_id: int, days: int = 30, s
             models.UserVisitHistory.visited_at >= since_date
         )
         .order_by(models.UserVisitHistory.visited_at.desc())
-        # Eager load the related Place object and its image URLs
+        # Eager load the related Place object, its image URLs come from the batch loader
         .options(
             joinedload(models.UserVisitHistory.place) # Use joinedload for Place
-            .selectinload(models.Place.images) # Then selectinload for images from Place
-            .load_only(models.PlaceImage.image_url) # Only load the image URL
+            .raiseload(models.Place.images)
         )
         .offset(skip)
         .limit(limit)
@@ -131,4 +221,13 @@ async def get_visit_history(db: AsyncSession, *, user_id: int, days: int = 30, s
     result = await db.execute(stmt)
     # Need unique() because joinedload can cause duplicates if multiple history entries point to same place
     history_entries = result.scalars().unique().all()
-    return history_entries
\ No newline at end of file
+
+    # Several entries often point to the same place, the loader fetches each place's image once
+    images_by_place_id = await get_loaders(db).primary_place_images.load_many(entry.place_id for entry in history_entries)
+    return [
+        {
+            "place": crud_place.place_list_dict(entry.place, images_by_place_id[entry.place_id]),
+            "visited_at": entry.visited_at,
+        }
+        for entry in history_entries
+    ]
\ No newline at end of file
@@ -0,0 +1,155 @@
+# app/crud/loaders.py
+# Request-scoped batching loaders (DataLoader style).
+# Collect the keys a request needs, fetch them with one IN (...) query and
+# memoize the results on the session, so the same key is never fetched twice
+# while the request's session lives.
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[AsyncSession, List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+# Key under which the loaders are stored in AsyncSession.info
+LOADERS_INFO_KEY = "batch_loaders"
+
+
+class BatchLoader:
+    """
+    Loads values by key through `batch_fn`, one query per batch of unseen keys.
+    Keys the batch function doesn't return get `default()` (None by default).
+    """
+
+    def __init__(self, db: AsyncSession, batch_fn: BatchFn, default: Callable[[], Any] = lambda: None):
+        self._db = db
+        self._batch_fn = batch_fn
+        self._default = default
+        self._memo: Dict[Hashable, Any] = {}
+
+    async def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Returns {key: value} for all keys, querying only the ones not loaded yet."""
+        keys = [key for key in dict.fromkeys(keys) if key is not None]
+        missing = [key for key in keys if key not in self._memo]
+        if missing:
+            found = await self._batch_fn(self._db, missing)
+            for key in missing:
+                self._memo[key] = found[key] if key in found else self._default()
+        return {key: self._memo[key] for key in keys}
+
+    async def load(self, key: Hashable) -> Any:
+        if key is None:
+            return self._default()
+        return (await self.load_many([key]))[key]
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Seeds a value the caller already has, so it won't be queried."""
+        self._memo.setdefault(key, value)
+
+
+# --- Batch functions ---
+
+async def _batch_city_names(db: AsyncSession, city_ids: List[int]) -> Dict[int, str]:
+    result = await db.execute(select(models.City.id, models.City.name).where(models.City.id.in_(city_ids)))
+    return {row.id: row.name for row in result.all()}
+
+
+async def _batch_countries(db: AsyncSession, country_ids: List[int]) -> Dict[int, models.Country]:
+    result = await db.execute(select(models.Country).where(models.Country.id.in_(country_ids)))
+    return {country.id: country for country in result.scalars().all()}
+
+
+async def _batch_place_images(db: AsyncSession, place_ids: List[int]) -> Dict[int, List[str]]:
+    # Primary image first: featured, then oldest
+    stmt = select(models.PlaceImage.place_id, models.PlaceImage.image_url)\
+           .where(models.PlaceImage.place_id.in_(place_ids))\
+           .order_by(
+               models.PlaceImage.place_id,
+               models.PlaceImage.is_featured.desc(),
+               models.PlaceImage.created_at,
+               models.PlaceImage.id
+           )
+    result = await db.execute(stmt)
+    images: Dict[int, List[str]] = {}
+    for row in result.all():
+        images.setdefault(row.place_id, []).append(str(row.image_url))
+    return images
+
+
+async def _batch_city_images(db: AsyncSession, city_ids: List[int]) -> Dict[int, List[str]]:
+    # Primary image first: featured, then oldest (is_featured/created_at are nullable here)
+    stmt = select(models.CityImage.city_id, models.CityImage.image_url)\
+           .where(models.CityImage.city_id.in_(city_ids))\
+           .order_by(
+               models.CityImage.city_id,
+               models.CityImage.is_featured.desc().nullslast(),
+               models.CityImage.created_at,
+               models.CityImage.id
+           )
+    result = await db.execute(stmt)
+    images: Dict[int, List[str]] = {}
+    for row in result.all():
+        images.setdefault(row.city_id, []).append(str(row.image_url))
+    return images
+
+
+# One LIMIT 1 index probe per owner (ix_place_images_primary / ix_city_images_primary),
+# so list views read a single image row per item however many images it has.
+# Same order as the full loaders above, the primary image is their first URL.
+_PRIMARY_IMAGE_SQL = """
+    SELECT o.owner_id, i.image_url
+    FROM unnest(CAST(:owner_ids AS integer[])) AS o(owner_id)
+    CROSS JOIN LATERAL (
+        SELECT image_url FROM {table}
+        WHERE {table}.{owner_column} = o.owner_id
+        ORDER BY is_featured DESC NULLS LAST, created_at, id
+        LIMIT 1
+    ) AS i
+"""
+
+
+async def _batch_primary_images(
+    db: AsyncSession, table: str, owner_column: str, owner_ids: List[int]
+) -> Dict[int, List[str]]:
+    result = await db.execute(
+        text(_PRIMARY_IMAGE_SQL.format(table=table, owner_column=owner_column)),
+        {"owner_ids": list(owner_ids)}
+    )
+    return {row.owner_id: [str(row.image_url)] for row in result.all()}
+
+
+async def _batch_primary_place_images(db: AsyncSession, place_ids: List[int]) -> Dict[int, List[str]]:
+    return await _batch_primary_images(db, "place_images", "place_id", place_ids)
+
+
+async def _batch_primary_city_images(db: AsyncSession, city_ids: List[int]) -> Dict[int, List[str]]:
+    return await _batch_primary_images(db, "city_images", "city_id", city_ids)
+
+
+class Loaders:
+    """All loaders of one request/session."""
+
+    def __init__(self, db: AsyncSession):
+        self.city_names = BatchLoader(db, _batch_city_names)
+        self.countries = BatchLoader(db, _batch_countries)
+        self.place_images = BatchLoader(db, _batch_place_images, default=list)
+        self.city_images = BatchLoader(db, _batch_city_images, default=list)
+        # [primary image URL] or [], for list views
+        self.primary_place_images = BatchLoader(db, _batch_primary_place_images, default=list)
+        self.primary_city_images = BatchLoader(db, _batch_primary_city_images, default=list)
+
+
+def get_loaders(db: AsyncSession) -> Loaders:
+    """
+    Returns the loaders bound to this session, creating them on first use.
+    Sessions are request-scoped (see get_db), so memoized values never outlive the request.
+    """
+    loaders: Optional[Loaders] = db.info.get(LOADERS_INFO_KEY)
+    if loaders is None:
+        loaders = Loaders(db)
+        db.info[LOADERS_INFO_KEY] = loaders
+    return loaders
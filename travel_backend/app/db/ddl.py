@@ -0,0 +1,91 @@
+# app/db/ddl.py
+# Database objects that can't be expressed through the SQLAlchemy models alone
+# (extensions, functional indexes, triggers...).
+# Every statement must be idempotent: scripts/apply_db_ddl.py runs the whole
+# list against existing databases.
+
+# --- Extensions ---
+EXTENSIONS = [
+    # earthdistance (which needs cube) gives us ll_to_earth/earth_box/earth_distance
+    "CREATE EXTENSION IF NOT EXISTS cube",
+    "CREATE EXTENSION IF NOT EXISTS earthdistance",
+    # Trigram matching for fuzzy name suggestions
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
+
+# --- Columns added to existing tables ---
+# create_all only creates missing tables, new columns of existing ones are added here
+COLUMNS = [
+    # Compiled opening hours, int4multirange needs PostgreSQL 14+
+    "ALTER TABLE places ADD COLUMN IF NOT EXISTS opening_minutes int4multirange",
+    "ALTER TABLE places ADD COLUMN IF NOT EXISTS popularity_score double precision NOT NULL DEFAULT 0",
+    "ALTER TABLE cities ADD COLUMN IF NOT EXISTS popularity_score double precision NOT NULL DEFAULT 0",
+    "ALTER TABLE cities ADD COLUMN IF NOT EXISTS latitude double precision",
+    "ALTER TABLE cities ADD COLUMN IF NOT EXISTS longitude double precision",
+]
+
+# --- Full-text search vector for places ---
+def place_fts_vector_sql(row: str = "") -> str:
+    """
+    Weighted tsvector expression for a place: name (A), category/cuisine (B),
+    description/address (C). `row` prefixes the columns, e.g. "NEW." in a trigger.
+    Must use the same configuration ('simple') as the queries in crud_place.
+    """
+    return (
+        f"setweight(to_tsvector('simple', coalesce({row}name, '')), 'A')"
+        f" || setweight(to_tsvector('simple', coalesce({row}category, '') || ' ' || coalesce({row}cuisine, '')), 'B')"
+        f" || setweight(to_tsvector('simple', coalesce({row}description, '') || ' ' || coalesce({row}address, '')), 'C')"
+    )
+
+
+TRIGGERS = [
+    f"""
+    CREATE OR REPLACE FUNCTION places_fts_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.fts_vector := {place_fts_vector_sql('NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_places_fts_vector ON places",
+    """
+    CREATE TRIGGER trg_places_fts_vector
+    BEFORE INSERT OR UPDATE OF name, category, cuisine, description, address ON places
+    FOR EACH ROW EXECUTE FUNCTION places_fts_vector_update()
+    """,
+]
+
+# --- Indexes ---
+INDEXES = [
+    # GiST index over the earth (cube) point of every place.
+    # Serves radius queries (earth_box @>) and k-NN ordering (<->).
+    "CREATE INDEX IF NOT EXISTS ix_places_earth ON places USING gist (ll_to_earth(latitude, longitude))",
+    # @@ needs a GIN index, the B-tree that index=True used to create can't serve it
+    "DROP INDEX IF EXISTS ix_places_fts_vector",
+    "CREATE INDEX IF NOT EXISTS ix_places_fts_gin ON places USING gin (fts_vector)",
+    # Name suggestions: trigram GIN for typo-tolerant matches (<%),
+    # text_pattern_ops B-tree for short prefixes where trigrams don't help.
+    "CREATE INDEX IF NOT EXISTS ix_places_name_trgm ON places USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_places_name_prefix ON places (lower(name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cities_name_trgm ON cities USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cities_name_prefix ON cities (lower(name) text_pattern_ops)",
+    # open_now/open_at filters: opening_minutes @> minute-of-week
+    "CREATE INDEX IF NOT EXISTS ix_places_opening_minutes ON places USING gist (opening_minutes)",
+    # attr= filters: attributes @> '{"wheelchair": "yes"}'. jsonb_path_ops only supports @>,
+    # but is smaller and faster for it than the default jsonb_ops.
+    "CREATE INDEX IF NOT EXISTS ix_places_attributes_gin ON places USING gin (attributes jsonb_path_ops)",
+    # sort_by=popular (score DESC, id DESC) is a backward scan, globally or within a city
+    "CREATE INDEX IF NOT EXISTS ix_places_popularity ON places (popularity_score, id)",
+    "CREATE INDEX IF NOT EXISTS ix_places_city_popularity ON places (city_id, popularity_score, id)",
+    # /cities/popular (score DESC, id DESC), keyset pages are a backward scan from the cursor
+    "CREATE INDEX IF NOT EXISTS ix_cities_popularity ON cities (popularity_score, id)",
+    # Primary image of a place/city (featured first, then oldest) is one index probe,
+    # see loaders._PRIMARY_IMAGE_SQL
+    "CREATE INDEX IF NOT EXISTS ix_place_images_primary"
+    " ON place_images (place_id, is_featured DESC NULLS LAST, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_city_images_primary"
+    " ON city_images (city_id, is_featured DESC NULLS LAST, created_at, id)",
+]
+
+# Applied (in order) after the extensions and Base.metadata.create_all
+STATEMENTS = COLUMNS + TRIGGERS + INDEXES
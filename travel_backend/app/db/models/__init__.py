@@ -6,4 +6,8 @@ from .place import Place
 from .place_image import PlaceImage
 from .user_favorite import UserFavorite       # <<< Add this
 from .user_visit_history import UserVisitHistory # <<< Add this
+from .place_cluster import PlaceCluster
+from .place_visit_bucket import PlaceVisitBucket
+from .place_similarity import PlaceSimilarity
+from .user_feed_candidates import UserFeedCandidates
 # Import other models here as you create them
\ No newline at end of file
@@ -30,7 +30,7 @@ from app.db.base_class import Base
 #     # 'back_populates' links to the 'city' attribute in CityImage
 #     images = relationship("CityImage", back_populates="city", cascade="all, delete-orphan")
 # app/db/models/city.py
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, Text, BigInteger # Import Text, BigInteger if needed
+from sqlalchemy import Column, Float, Integer, String, DateTime, func, ForeignKey, Text, BigInteger # Import Text, BigInteger if needed
 from sqlalchemy.dialects.postgresql import JSONB # Import JSONB
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -55,8 +55,12 @@ class City(Base):
     weather_last_updated = Column(DateTime(timezone=True), nullable=True)
     budget_scale = Column(SmallInteger, nullable=True) # Added
     budget_summary = Column(Text, nullable=True) # Added
-    # latitude = Column(Float, nullable=True)
-    # longitude = Column(Float, nullable=True)
+    # Centroid (median of the city's place coordinates), see crud_city.refresh_city_centroids
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # Materialized by crud_popularity.refresh_city_popularity, orders /cities/popular.
+    # The (popularity_score, id) index lives in app/db/ddl.py.
+    popularity_score = Column(Float, nullable=False, default=0.0, server_default="0")
 
     # --- END OF NEW COLUMNS ---
 
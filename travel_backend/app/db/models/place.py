@@ -1,12 +1,14 @@
 # app/db/models/place.py
 from sqlalchemy import (
-    Column, Integer, String, Float, Text, DateTime, func, Index, ForeignKey, Boolean
+    Column, Integer, String, Float, Text, DateTime, func, Index, ForeignKey, Boolean, event, inspect
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, INT4MULTIRANGE, Range
 from sqlalchemy.orm import relationship  # Ensure relationship is imported
 from app.db.base_class import Base
+from app.db.models.city import City
 from sqlalchemy.dialects.postgresql import TSVECTOR
 from typing import TYPE_CHECKING
+from app.services.opening_hours import compile_opening_hours
 
 if TYPE_CHECKING:
     from .user import User # Import for type hinting
@@ -34,14 +36,21 @@ class Place(Base):
     address = Column(Text, nullable=True)
     phone = Column(String(50), nullable=True)
     opening_hours = Column(Text, nullable=True)
+    # opening_hours compiled to minute-of-week intervals (see app/services/opening_hours.py),
+    # NULL when missing or unparseable. Kept in sync by the mapper events below, GiST indexed.
+    opening_minutes = Column(INT4MULTIRANGE, nullable=True)
+    # Favorites + time-decayed visits, maintained by app/crud/crud_popularity.py.
+    # (popularity_score, id) indexes for sort_by=popular live in app/db/ddl.py.
+    popularity_score = Column(Float, nullable=False, default=0.0, server_default="0")
     cuisine = Column(String(255), nullable=True)
     entry_fee = Column(String(100), nullable=True)
     religion = Column(String(100), nullable=True)
     denomination = Column(String(100), nullable=True)
-    attributes = Column(JSONB, nullable=True)
+    attributes = Column(JSONB, nullable=True) # OSM tags, GIN (jsonb_path_ops) indexed in app/db/ddl.py
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    fts_vector = Column(TSVECTOR, index=True)
+    # Maintained by the trg_places_fts_vector trigger, GIN indexed (see app/db/ddl.py)
+    fts_vector = Column(TSVECTOR)
 
     favorited_by_users = relationship(
         "User",
@@ -64,4 +73,37 @@ class Place(Base):
          # Removed duplicate indexes if defined on columns directly
          Index('ix_places_location', 'latitude', 'longitude'),
          # Add other multi-column or functional indexes here if needed
-     )
\ No newline at end of file
+         # Indexes needing extensions (e.g. GiST on ll_to_earth) live in app/db/ddl.py
+     )
+
+
+def opening_minutes_value(opening_hours):
+    """Value for Place.opening_minutes compiled from an opening_hours string."""
+    intervals = compile_opening_hours(opening_hours)
+    if intervals is None:
+        return None
+    return [Range(start, end, bounds="[)") for start, end in intervals]
+
+
+@event.listens_for(Place, "before_insert")
+def _compile_opening_hours_on_insert(mapper, connection, target: Place) -> None:
+    target.opening_minutes = opening_minutes_value(target.opening_hours)
+
+
+@event.listens_for(Place, "before_update")
+def _compile_opening_hours_on_update(mapper, connection, target: Place) -> None:
+    if inspect(target).attrs.opening_hours.history.has_changes():
+        target.opening_minutes = opening_minutes_value(target.opening_hours)
+
+
+@event.listens_for(Place, "after_insert")
+def _seed_city_centroid(mapper, connection, target: Place) -> None:
+    # A city without coordinates takes its first place's until
+    # crud_city.refresh_city_centroids computes the median
+    if target.city_id is None or target.latitude is None or target.longitude is None:
+        return
+    connection.execute(
+        City.__table__.update()
+        .where(City.__table__.c.id == target.city_id, City.__table__.c.latitude.is_(None))
+        .values(latitude=target.latitude, longitude=target.longitude)
+    )
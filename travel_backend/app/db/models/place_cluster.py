@@ -0,0 +1,26 @@
+# app/db/models/place_cluster.py
+from sqlalchemy import Column, Integer, SmallInteger, Float, ForeignKey, Index
+from app.db.base_class import Base
+
+class PlaceCluster(Base):
+    """
+    Precomputed map cluster: every place in one Web Mercator grid cell at one zoom level.
+    Rebuilt offline by crud_map.rebuild_place_clusters (scripts/refresh_place_clusters.py).
+    """
+    __tablename__ = "place_clusters"
+
+    id = Column(Integer, primary_key=True)
+    zoom = Column(SmallInteger, nullable=False)
+    # Cell on a 2**(zoom + CLUSTER_CELL_BITS) grid, see crud_map
+    cell_x = Column(Integer, nullable=False)
+    cell_y = Column(Integer, nullable=False)
+    # Centroid of the places in the cell
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    place_count = Column(Integer, nullable=False)
+    representative_place_id = Column(Integer, ForeignKey("places.id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (
+        # Viewport lookups: one zoom, a range of cells
+        Index('ix_place_clusters_zoom_cell', 'zoom', 'cell_x', 'cell_y', unique=True),
+    )
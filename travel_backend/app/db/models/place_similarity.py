@@ -0,0 +1,15 @@
+# app/db/models/place_similarity.py
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from app.db.base_class import Base
+
+class PlaceSimilarity(Base):
+    """
+    Precomputed "similar places": the top-K co-visited neighbours of a place.
+    Rebuilt offline by scripts/compute_similar_places.py, read by primary key prefix (place_id).
+    """
+    __tablename__ = "place_similarities"
+
+    place_id = Column(Integer, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True)
+    similar_place_id = Column(Integer, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True)
+    # Cosine similarity of the two places' user interaction vectors, 0..1
+    score = Column(Float, nullable=False)
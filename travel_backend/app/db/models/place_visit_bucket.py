@@ -0,0 +1,24 @@
+# app/db/models/place_visit_bucket.py
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.db.base_class import Base
+
+class PlaceVisitBucket(Base):
+    """
+    Visits to one place during one hour, maintained by crud_popularity.record_visit_bucket
+    (called from record_visit). Trending rankings sum a window of buckets instead of
+    aggregating user_visit_history. Buckets older than the longest window are pruned.
+    """
+    __tablename__ = "place_visit_buckets"
+
+    place_id = Column(Integer, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True)
+    # Start of the hour (date_trunc('hour', ...))
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    # Denormalized from places so per-city rankings don't need a join
+    city_id = Column(Integer, ForeignKey("cities.id", ondelete="CASCADE"), nullable=True)
+    visit_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Window scans: all buckets since a time, globally or for one city
+        Index('ix_place_visit_buckets_start', 'bucket_start'),
+        Index('ix_place_visit_buckets_city_start', 'city_id', 'bucket_start'),
+    )
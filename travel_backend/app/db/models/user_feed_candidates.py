@@ -0,0 +1,17 @@
+# app/db/models/user_feed_candidates.py
+from sqlalchemy import Column, Integer, REAL, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.db.base_class import Base
+
+class UserFeedCandidates(Base):
+    """
+    Precomputed "for you" candidates of one user: parallel arrays of place ids and
+    offline scores, best first. Built by scripts/build_user_feeds.py for active users,
+    re-ranked at request time by crud_feed.get_feed.
+    """
+    __tablename__ = "user_feed_candidates"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    place_ids = Column(ARRAY(Integer), nullable=False)
+    scores = Column(ARRAY(REAL), nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
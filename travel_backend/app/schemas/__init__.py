@@ -2,7 +2,8 @@ from .user import User, UserCreate, UserUpdate
 from .token import Token, TokenPayload, RefreshTokenRequest
 from .country import Country # , CountryCreate # Add schemas as needed
 from .city import City,CityDetail # , CityCreate
-from .place import Place,PlaceDetail
-from .user_activity import VisitHistoryEntry # <<< Add this
+from .place import Place,PlaceDetail,PlaceNearby,PlaceTrending,PlaceSimilar,PlacePage,CategoryFacet,CategoryCatalog,PlaceClusterMarker
+from .user_activity import VisitHistoryEntry, ItineraryStop, ItineraryDay, Itinerary # <<< Add this
 from .weather import WeatherCondition
+from .search import SearchSuggestion, SearchResult, SearchResults
 # Import other schemas
\ No newline at end of file
@@ -41,5 +41,5 @@ class CityDetail(City): # Inherits fields from City list schema (id, name, count
     weather_last_updated: Optional[datetime.datetime] = None
     budget_scale: Optional[int] = None # Added (using int for schema)
     budget_summary: Optional[str] = None # Added
-    # latitude: Optional[float] = None
-    # longitude: Optional[float] = None
\ No newline at end of file
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
\ No newline at end of file
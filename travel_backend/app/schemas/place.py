@@ -26,6 +26,42 @@ class Place(PlaceInDBBase):
     # Add the images field, defaulting to an empty list
     images: List[HttpUrl] = [] # Will store URLs fetched from place_images
 
+# Schema returned by the GET /places/nearby endpoint
+class PlaceNearby(Place):
+    distance_m: float # Great-circle distance from the requested point, in metres
+
+# Schema returned by the GET /places/trending endpoint
+class PlaceTrending(Place):
+    visit_count: int # Visits during the requested window
+
+# Schema returned by the GET /places/{place_id}/similar endpoint
+class PlaceSimilar(Place):
+    score: float # Co-visitation similarity with the requested place, 0..1
+
+# Number of places per category for the current filter (category chips)
+class CategoryFacet(BaseModel):
+    category: str
+    count: int
+
+# Schema returned by GET /places/categories/counts
+class CategoryCatalog(BaseModel):
+    version: int # Changes whenever any count changes, per process
+    city_id: Optional[int] = None
+    categories: List[CategoryFacet] = []
+
+# Schema returned by the GET /places/browse endpoint: one page plus its facets
+class PlacePage(BaseModel):
+    items: List[Place] = []
+    next_cursor: Optional[str] = None # Pass back as `cursor` to get the next page
+    facets: Optional[List[CategoryFacet]] = None
+
+# Schema returned by GET /places/clusters: one marker per precomputed cluster
+class PlaceClusterMarker(BaseModel):
+    latitude: float # Centroid of the clustered places
+    longitude: float
+    count: int
+    place_id: Optional[int] = None # Representative place (the place itself when count == 1)
+
 # We might need a more detailed schema later for GET /places/{place_id}
 class PlaceDetail(Place): # Inherits from Place list schema
     osm_id: Optional[str] = None
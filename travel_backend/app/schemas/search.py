@@ -0,0 +1,30 @@
+# app/schemas/search.py
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Schema for a single autocomplete entry returned by GET /search/suggest
+class SearchSuggestion(BaseModel):
+    type: str # "city" or "place"
+    id: int
+    name: str
+    city_id: Optional[int] = None # Only set for places
+    score: float # Trigram word similarity, 1.0 is an exact word match
+
+# One hit of GET /search, shared by every group so they can be merged into "top"
+class SearchResult(BaseModel):
+    type: str # "city", "place" or "category"
+    id: Optional[int] = None # Not set for categories
+    name: str
+    score: float # 0..1, comparable across types
+    country: Optional[str] = None # Cities
+    category: Optional[str] = None # Places
+    city_id: Optional[int] = None # Places
+    place_count: Optional[int] = None # Categories
+
+class SearchResults(BaseModel):
+    query: str # Normalized query
+    cities: List[SearchResult]
+    places: List[SearchResult]
+    categories: List[SearchResult]
+    top: List[SearchResult] # Best hits across all groups
+
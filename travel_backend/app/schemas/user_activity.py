@@ -1,6 +1,7 @@
 # app/schemas/user_activity.py
 from pydantic import BaseModel
 import datetime
+from typing import List
 from .place import Place # Import the basic Place schema for list view
 
 # Schema for representing a single entry in the visit history list
@@ -9,4 +10,24 @@ class VisitHistoryEntry(BaseModel):
     visited_at: datetime.datetime
 
     class Config:
-        orm_mode = True # Pydantic V1. Use from_attributes = True for V2
\ No newline at end of file
+        orm_mode = True # Pydantic V1. Use from_attributes = True for V2
+
+# --- Itinerary (GET /users/me/itinerary) ---
+class ItineraryStop(BaseModel):
+    place: Place
+    arrival: datetime.time # Local time, waiting for opening included
+    departure: datetime.time
+    distance_from_previous_m: float # From the previous stop (or the start point)
+
+class ItineraryDay(BaseModel):
+    day: int # 1-based
+    date: datetime.date
+    distance_m: float
+    stops: List[ItineraryStop]
+
+class Itinerary(BaseModel):
+    city_id: int
+    total_distance_m: float
+    days: List[ItineraryDay]
+    unscheduled: List[Place] # Favorites that fit no day (opening hours / time budget)
+
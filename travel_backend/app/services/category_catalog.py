@@ -0,0 +1,129 @@
+# app/services/category_catalog.py
+# In-memory catalog of place categories with counts, globally and per city.
+# Loaded once with a GROUP BY, then kept current from ORM writes in this process
+# (session events below). Writes from other processes (import scripts) are
+# picked up by a periodic full reload.
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy import func as sql_func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding the deltas of a not yet committed transaction
+PENDING_DELTAS_KEY = "category_catalog_deltas"
+
+
+class CategoryCatalog:
+    """Category -> place count, per city and global, with a version stamp bumped on every change."""
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self._by_city: Dict[Optional[int], Counter] = {}
+        self._global: Counter = Counter()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """(Re)loads the counts from the database if never loaded or older than refresh_seconds."""
+        if not self.is_stale:
+            return
+        async with self._lock:
+            if not self.is_stale: # Another request reloaded while we waited
+                return
+            stmt = select(models.Place.city_id, models.Place.category, sql_func.count().label("place_count"))\
+                   .where(models.Place.category.is_not(None), models.Place.category != '')\
+                   .group_by(models.Place.city_id, models.Place.category)
+            result = await db.execute(stmt)
+
+            by_city: Dict[Optional[int], Counter] = {}
+            global_counts: Counter = Counter()
+            for row in result.all():
+                by_city.setdefault(row.city_id, Counter())[row.category] = row.place_count
+                global_counts[row.category] += row.place_count
+
+            self._by_city, self._global = by_city, global_counts
+            self._loaded_at = time.monotonic()
+            self.version += 1
+            logger.info(f"Category catalog loaded: {len(global_counts)} categories, version {self.version}")
+
+    def apply_deltas(self, deltas: Counter) -> None:
+        """Applies {(city_id, category): +/-n} changes from committed writes."""
+        changed = False
+        for (city_id, category), delta in deltas.items():
+            if not category or delta == 0:
+                continue
+            city_counts = self._by_city.setdefault(city_id, Counter())
+            city_counts[category] += delta
+            self._global[category] += delta
+            for counts in (city_counts, self._global):
+                if counts[category] <= 0:
+                    del counts[category]
+            changed = True
+        if changed:
+            self.version += 1
+
+    def counts(self, city_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """[{"category", "count"}] sorted by category name, for one city or all places."""
+        counts = self._global if city_id is None else self._by_city.get(city_id, Counter())
+        return [{"category": category, "count": count} for category, count in sorted(counts.items())]
+
+
+category_catalog = CategoryCatalog(refresh_seconds=settings.CATEGORY_CATALOG_REFRESH_SECONDS)
+
+
+# --- Incremental maintenance from ORM writes ---
+
+def _place_key(place: models.Place, use_old: bool = False) -> Tuple[Optional[int], Optional[str]]:
+    """(city_id, category) of a place, before the pending change when use_old is set."""
+    if not use_old:
+        return place.city_id, place.category
+    state = inspect(place)
+    values = []
+    for attr in ("city_id", "category"):
+        history = state.attrs[attr].history
+        values.append(history.deleted[0] if history.deleted else getattr(place, attr))
+    return values[0], values[1]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_category_deltas(session: Session, flush_context) -> None:
+    deltas: Counter = session.info.setdefault(PENDING_DELTAS_KEY, Counter())
+    for obj in session.new:
+        if isinstance(obj, models.Place):
+            deltas[_place_key(obj)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, models.Place):
+            deltas[_place_key(obj, use_old=True)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, models.Place) and session.is_modified(obj):
+            old_key, new_key = _place_key(obj, use_old=True), _place_key(obj)
+            if old_key != new_key:
+                deltas[old_key] -= 1
+                deltas[new_key] += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_category_deltas(session: Session) -> None:
+    deltas = session.info.pop(PENDING_DELTAS_KEY, None)
+    if deltas:
+        category_catalog.apply_deltas(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_category_deltas(session: Session) -> None:
+    session.info.pop(PENDING_DELTAS_KEY, None)
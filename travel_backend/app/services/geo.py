@@ -0,0 +1,118 @@
+# app/services/geo.py
+# Plain-Python geo helpers (Web Mercator tile math, geohashes, distances).
+import math
+from typing import List, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+# Web Mercator is undefined at the poles, latitudes are clamped to its square extent
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def clamp_lat(lat: float) -> float:
+    return max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+
+
+def lonlat_to_cell(lon: float, lat: float, resolution: int) -> Tuple[int, int]:
+    """
+    Web Mercator cell (x, y) of a point on a `resolution` x `resolution` grid
+    (resolution = 2**zoom for slippy map tiles). y grows southwards.
+    """
+    lat_rad = math.radians(clamp_lat(lat))
+    x = int((lon + 180.0) / 360.0 * resolution)
+    y = int((1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0 * resolution)
+    # lon == 180 / lat == -MAX land exactly on the far edge
+    return min(max(x, 0), resolution - 1), min(max(y, 0), resolution - 1)
+
+
+def cell_bounds(x: int, y: int, resolution: int) -> Tuple[float, float, float, float]:
+    """(min_lon, min_lat, max_lon, max_lat) of a Web Mercator cell."""
+    def lat_of(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / resolution))))
+
+    min_lon = x / resolution * 360.0 - 180.0
+    max_lon = (x + 1) / resolution * 360.0 - 180.0
+    return min_lon, lat_of(y + 1), max_lon, lat_of(y)
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def mercator_cell_sql(lon_sql: str, lat_sql: str, resolution_sql: str) -> Tuple[str, str]:
+    """
+    SQL expressions computing the same cell as lonlat_to_cell, for bulk jobs.
+    Arguments are SQL snippets (column names or bind parameters).
+    """
+    lat = f"radians(least(greatest({lat_sql}, -{MAX_MERCATOR_LAT}), {MAX_MERCATOR_LAT}))"
+    x = f"least(greatest(floor(({lon_sql} + 180.0) / 360.0 * {resolution_sql}), 0), {resolution_sql} - 1)::int"
+    y = (
+        f"least(greatest(floor((1.0 - ln(tan({lat}) + 1.0 / cos({lat})) / pi()) / 2.0 * {resolution_sql}), 0),"
+        f" {resolution_sql} - 1)::int"
+    )
+    return x, y
+
+
+# --- Geohash ---
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH_INDEX = {char: index for index, char in enumerate(GEOHASH_ALPHABET)}
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 7) -> str:
+    """Geohash of a point (precision 7 cells are about 153 x 153 m at the equator)."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate longitude / latitude, starting with longitude
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits <<= 1
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """(min_lon, min_lat, max_lon, max_lat) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        index = _GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            mid = (value_range[0] + value_range[1]) / 2
+            if (index >> shift) & 1:
+                value_range[0] = mid
+            else:
+                value_range[1] = mid
+            even = not even
+    return lon_range[0], lat_range[0], lon_range[1], lat_range[1]
+
+
+def geohash_neighbours(geohash: str) -> List[str]:
+    """The (up to) 8 cells around a geohash cell, same precision. Wraps at the antimeridian."""
+    min_lon, min_lat, max_lon, max_lat = geohash_bounds(geohash)
+    center_lat, center_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    d_lat, d_lon = max_lat - min_lat, max_lon - min_lon
+    neighbours = set()
+    for row in (-1, 0, 1):
+        for col in (-1, 0, 1):
+            lat = center_lat + row * d_lat
+            if (row, col) == (0, 0) or not -90 < lat < 90:
+                continue
+            lon = (center_lon + col * d_lon + 180.0) % 360.0 - 180.0
+            neighbours.add(geohash_encode(lat, lon, len(geohash)))
+    return sorted(neighbours)
@@ -0,0 +1,120 @@
+# app/services/map_tiles.py
+# Compact binary encoding and on-disk cache for place marker tiles.
+#
+# Tile layout (little-endian):
+#   b"PTL1"                                   magic + format version
+#   uint8   n_categories
+#   n_categories x (uint8 length, utf-8 bytes)  category names, indexed below
+#   uint32  n_markers
+#   n_markers x (uint32 place_id, uint16 x, uint16 y, uint8 category_index)
+# x/y are the marker position inside the tile quantized to 0..65535,
+# x from the west edge, y from the north edge (same orientation as tiles).
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TILE_MAGIC = b"PTL1"
+MARKER_STRUCT = struct.Struct("<IHHB")
+# n_categories is a uint8, so at most 255 names (indexes 0..254). When a tile has more
+# categories, the last index (254) is OTHER_CATEGORY, shared by everything else.
+MAX_CATEGORIES = 255
+OTHER_CATEGORY = "other"
+QUANT_MAX = 65535
+
+
+def encode_tile(markers: List[Dict[str, Any]], bounds: Tuple[float, float, float, float]) -> bytes:
+    """Encodes markers ({"id", "latitude", "longitude", "category"}) falling in `bounds`."""
+    min_lon, min_lat, max_lon, max_lat = bounds
+    lon_span = (max_lon - min_lon) or 1.0
+    lat_span = (max_lat - min_lat) or 1.0
+
+    # Most frequent categories get an index, the rest share OTHER_CATEGORY
+    frequency: Dict[str, int] = {}
+    for marker in markers:
+        category = marker["category"] or OTHER_CATEGORY
+        frequency[category] = frequency.get(category, 0) + 1
+    categories = sorted(frequency, key=lambda c: (-frequency[c], c))
+    if len(categories) > MAX_CATEGORIES:
+        # A real "other" category (or missing ones) must not take a slot and appear twice
+        named = [category for category in categories if category != OTHER_CATEGORY]
+        categories = named[:MAX_CATEGORIES - 1] + [OTHER_CATEGORY]
+    index_of = {category: index for index, category in enumerate(categories)}
+    other_index = index_of.get(OTHER_CATEGORY, len(categories) - 1)
+
+    parts = [TILE_MAGIC, struct.pack("<B", len(categories))]
+    for category in categories:
+        # At most 255 bytes, cut on a character boundary so the name stays valid UTF-8
+        encoded = category.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+        parts.append(struct.pack("<B", len(encoded)))
+        parts.append(encoded)
+
+    parts.append(struct.pack("<I", len(markers)))
+    for marker in markers:
+        # Quantized linearly in lon/lat, good enough inside one tile
+        x = round((marker["longitude"] - min_lon) / lon_span * QUANT_MAX)
+        y = round((max_lat - marker["latitude"]) / lat_span * QUANT_MAX)
+        parts.append(MARKER_STRUCT.pack(
+            marker["id"],
+            min(max(x, 0), QUANT_MAX),
+            min(max(y, 0), QUANT_MAX),
+            index_of.get(marker["category"] or OTHER_CATEGORY, other_index)
+        ))
+    return b"".join(parts)
+
+
+# --- Disk cache ---
+
+def _tile_path(z: int, x: int, y: int) -> str:
+    return os.path.join(settings.TILE_CACHE_DIR, str(z), str(x), f"{y}.bin")
+
+
+def _read_cached(path: str) -> Optional[bytes]:
+    try:
+        if time.time() - os.path.getmtime(path) > settings.TILE_CACHE_MAX_AGE_SECONDS:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so concurrent readers never see a partial tile
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+async def read_cached_tile(z: int, x: int, y: int) -> Optional[bytes]:
+    """Returns the cached tile if present and younger than TILE_CACHE_MAX_AGE_SECONDS."""
+    return await run_in_threadpool(_read_cached, _tile_path(z, x, y))
+
+
+async def store_cached_tile(z: int, x: int, y: int, data: bytes) -> None:
+    try:
+        await run_in_threadpool(_write_cached, _tile_path(z, x, y), data)
+    except OSError as e:
+        # Cache is best effort, the tile is still served
+        logger.warning(f"Could not cache tile {z}/{x}/{y}: {e}")
+
+
+def purge_tile_cache() -> None:
+    """Deletes every cached tile, e.g. after a bulk place import."""
+    shutil.rmtree(settings.TILE_CACHE_DIR, ignore_errors=True)
+    logger.info(f"Purged tile cache at {settings.TILE_CACHE_DIR}")
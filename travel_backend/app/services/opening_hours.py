@@ -0,0 +1,172 @@
+# app/services/opening_hours.py
+# Compiles OSM `opening_hours` strings into weekly minute intervals.
+#
+# A week is minutes 0..10080 starting Monday 00:00 local time; a place's hours
+# become a sorted list of half-open [start, end) intervals on that axis, stored
+# as an int4multirange (Place.opening_minutes) so "open at minute m" is an
+# indexable containment test.
+#
+# Supported subset (covers the vast majority of OSM data):
+#   24/7
+#   rules separated by ";" (later rules replace the days they name)
+#   rules separated by "," after a time (additional hours, e.g. "Mo-Fr 09:00-17:00, Sa 10:00-14:00")
+#   weekday selectors: Mo, Mo-Fr, Fr-Mo (wrapping), Mo,We,Fr
+#   times: 09:00-17:00, several per rule, end 24:00, ranges past midnight (22:00-02:00)
+#   off / closed
+#   public/school holiday rules (PH, SH) are skipped, a weekly axis has no dates:
+#   "Mo-Fr 09:00-17:00; PH off" compiles like "Mo-Fr 09:00-17:00"
+# Anything else (months, sunrise, week numbers...) makes the whole string
+# unsupported: compile_opening_hours returns None, i.e. "unknown".
+import datetime
+import re
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+WEEKDAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+
+_DAY = r"(?:Mo|Tu|We|Th|Fr|Sa|Su)"
+_DAYS = rf"{_DAY}(?:-{_DAY})?(?:,{_DAY}(?:-{_DAY})?)*"
+_TIME_RANGE = r"\d{1,2}:\d{2}-\d{1,2}:\d{2}"
+_TIMES = rf"{_TIME_RANGE}(?:,{_TIME_RANGE})*"
+_RULE_RE = re.compile(rf"^(?:(?P<days>{_DAYS})(?::|\s)\s*)?(?P<times>{_TIMES}|off|closed)$")
+# "," followed by a weekday after a time starts an additional rule
+_ADDITIONAL_RULE_SPLIT_RE = re.compile(r"(?<=\d),(?=[A-Z])")
+_HOLIDAY_SELECTORS = ("PH", "SH")
+_UTC_OFFSET_RE = re.compile(r"^(?:UTC|GMT)\s*([+\-−])\s*(\d{1,2})(?::?(\d{2}))?$")
+
+Interval = Tuple[int, int]
+
+
+def _parse_days(selector: Optional[str]) -> List[int]:
+    if not selector:
+        return list(range(7))
+    days: List[int] = []
+    for part in selector.split(","):
+        if "-" in part:
+            first, last = (WEEKDAYS.index(day) for day in part.split("-"))
+            span = (last - first) % 7
+            days.extend((first + offset) % 7 for offset in range(span + 1))
+        else:
+            days.append(WEEKDAYS.index(part))
+    return days
+
+
+def _without_holidays(rule: str) -> Optional[str]:
+    """The rule without PH/SH selectors ("Mo-Fr,PH 09:00-17:00" -> "Mo-Fr 09:00-17:00"), None if only holidays."""
+    head, separator, rest = rule.partition(" ")
+    selectors = head.split(",")
+    if not any(selector in _HOLIDAY_SELECTORS for selector in selectors):
+        return rule
+    selectors = [selector for selector in selectors if selector not in _HOLIDAY_SELECTORS]
+    if not selectors:
+        return None
+    return ",".join(selectors) + separator + rest
+
+
+def _parse_minute(value: str) -> Optional[int]:
+    hours, minutes = (int(part) for part in value.split(":"))
+    if minutes >= 60 or hours > 24 or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+
+def _parse_times(times: str) -> Optional[List[Interval]]:
+    """Day-relative intervals, an end before the start continues into the next day."""
+    intervals = []
+    for time_range in times.split(","):
+        start, end = (_parse_minute(value) for value in time_range.split("-"))
+        if start is None or end is None or start == MINUTES_PER_DAY:
+            return None
+        if end <= start:
+            end += MINUTES_PER_DAY
+        intervals.append((start, end))
+    return intervals
+
+
+def _merge(intervals: List[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def compile_opening_hours(value: Optional[str]) -> Optional[List[Interval]]:
+    """
+    Compiles an OSM opening_hours string into merged [start, end) minute-of-week intervals.
+    Returns [] for "always closed", None if the string is empty or uses unsupported syntax.
+    """
+    if not value or not value.strip():
+        return None
+    normalized = re.sub(r"\s*([-,;])\s*", r"\1", value.strip())
+    if normalized == "24/7":
+        return [(0, MINUTES_PER_WEEK)]
+
+    by_day: Dict[int, List[Interval]] = {}
+    for rule_group in normalized.split(";"):
+        if not rule_group:
+            continue
+        for position, rule in enumerate(_ADDITIONAL_RULE_SPLIT_RE.split(rule_group)):
+            rule = _without_holidays(rule.strip())
+            if rule is None:
+                continue
+            match = _RULE_RE.match(rule)
+            if not match:
+                return None
+            days = _parse_days(match.group("days"))
+            if match.group("times") in ("off", "closed"):
+                intervals: List[Interval] = []
+            else:
+                intervals = _parse_times(match.group("times"))
+                if intervals is None:
+                    return None
+            for day in days:
+                if position == 0:
+                    by_day[day] = list(intervals) # Normal rule: replaces earlier hours for the day
+                else:
+                    by_day.setdefault(day, []).extend(intervals) # Additional rule
+
+    week: List[Interval] = []
+    for day, intervals in by_day.items():
+        offset = day * MINUTES_PER_DAY
+        for start, end in intervals:
+            start, end = offset + start, offset + end
+            if end > MINUTES_PER_WEEK: # Sunday night past midnight wraps to Monday
+                week.append((start, MINUTES_PER_WEEK))
+                week.append((0, end - MINUTES_PER_WEEK))
+            else:
+                week.append((start, end))
+    return _merge(week)
+
+
+def is_open_at(intervals: List[Interval], minute_of_week: int) -> bool:
+    return any(start <= minute_of_week < end for start, end in intervals)
+
+
+def minute_of_week(moment: datetime.datetime) -> int:
+    """Minute of the week (Monday 00:00 = 0) of a wall-clock time."""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def resolve_timezone(name: Optional[str]) -> Optional[datetime.tzinfo]:
+    """
+    Timezone for a City.timezone value: an IANA name ("Asia/Kolkata") or a fixed
+    offset label as stored from Wikidata ("UTC+05:30"). None if not recognised.
+    """
+    if not name:
+        return None
+    name = name.strip()
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        pass
+    match = _UTC_OFFSET_RE.match(name)
+    if not match:
+        return None
+    sign = -1 if match.group(1) in ("-", "−") else 1
+    offset = datetime.timedelta(hours=int(match.group(2)), minutes=int(match.group(3) or 0))
+    return datetime.timezone(sign * offset)
@@ -0,0 +1,138 @@
+# app/services/place_dedupe.py
+# Finds duplicate places (used by scripts/dedupe_places.py).
+#
+# Two places are duplicates when they share an OSM object (osm_type + osm_id),
+# or when their names are near-identical and they are a few metres apart.
+# Names only count as near-identical with the same numbers ("Terminal 1" and
+# "Terminal 2" are different places), and rows of two different OSM objects are
+# never merged by name.
+# Name/distance pairs are only compared within a geohash cell and its 8
+# neighbours, so the work grows with the number of places, not its square.
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.geo import geohash_encode, geohash_neighbours, haversine_m
+
+# Precision 7 cells are ~150 m tall and at least ~75 m wide up to 60 degrees latitude,
+# wider than MAX_DISTANCE_M, so any close pair is in the same or adjacent cells.
+GEOHASH_PRECISION = 7
+MAX_DISTANCE_M = 50.0
+MIN_NAME_SIMILARITY = 0.85
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+@dataclass
+class PlaceRecord:
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    osm_type: Optional[str] = None
+    osm_id: Optional[str] = None
+    # Number of filled optional columns, the most complete place of a group is kept
+    completeness: int = 0
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(_NON_WORD_RE.sub(" ", name.lower()).split())
+
+
+def _osm_key(place: PlaceRecord) -> Optional[Tuple[str, str]]:
+    return (place.osm_type or "", place.osm_id) if place.osm_id else None
+
+
+def _is_close_duplicate(a: PlaceRecord, b: PlaceRecord, names: Dict[int, str]) -> bool:
+    osm_a, osm_b = _osm_key(a), _osm_key(b)
+    if osm_a is not None and osm_b is not None and osm_a != osm_b:
+        return False # Two distinct mapped objects, even if they look alike
+    if haversine_m(a.latitude, a.longitude, b.latitude, b.longitude) > MAX_DISTANCE_M:
+        return False
+    name_a, name_b = names[a.id], names[b.id]
+    if name_a == name_b:
+        return True
+    if _DIGITS_RE.findall(name_a) != _DIGITS_RE.findall(name_b):
+        return False # "Gate A12" vs "Gate A13"
+    return SequenceMatcher(None, name_a, name_b).ratio() >= MIN_NAME_SIMILARITY
+
+
+class _UnionFind:
+    """Groups of place ids, each holding at most one OSM object."""
+
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+        self.osm_key: Dict[int, Tuple[str, str]] = {} # Per root
+
+    def find(self, item: int) -> int:
+        root = self.parent.setdefault(item, item)
+        while root != self.parent[root]:
+            root = self.parent[root]
+        while item != root: # Path compression
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        key_a, key_b = self.osm_key.get(root_a), self.osm_key.get(root_b)
+        if key_a is not None and key_b is not None and key_a != key_b:
+            return # Would chain two OSM objects through an unmapped row
+        root, child = min(root_a, root_b), max(root_a, root_b)
+        self.parent[child] = root
+        key = self.osm_key.pop(child, None) or key_a or key_b
+        if key is not None:
+            self.osm_key[root] = key
+
+
+def find_duplicate_groups(places: Iterable[PlaceRecord]) -> List[Tuple[int, List[int]]]:
+    """
+    Groups duplicates transitively. Returns [(keeper_id, [duplicate_ids])], the keeper being
+    the most complete place of the group (lowest id on ties).
+    """
+    by_id: Dict[int, PlaceRecord] = {}
+    by_osm: Dict[Tuple[str, str], int] = {}
+    cells: Dict[str, List[PlaceRecord]] = defaultdict(list)
+    names: Dict[int, str] = {}
+    groups = _UnionFind()
+
+    for place in places:
+        by_id[place.id] = place
+        names[place.id] = normalize_name(place.name)
+        key = _osm_key(place)
+        if key is not None:
+            groups.find(place.id)
+            groups.osm_key.setdefault(place.id, key)
+            if key in by_osm:
+                groups.union(by_osm[key], place.id)
+            else:
+                by_osm[key] = place.id
+        cells[geohash_encode(place.latitude, place.longitude, GEOHASH_PRECISION)].append(place)
+
+    for cell, cell_places in cells.items():
+        # Each unordered pair of cells is visited once (neighbour cells with a greater hash)
+        candidates = [cell_places] + [cells[n] for n in geohash_neighbours(cell) if n > cell and n in cells]
+        for i, place in enumerate(cell_places):
+            for other in cell_places[i + 1:]:
+                if _is_close_duplicate(place, other, names):
+                    groups.union(place.id, other.id)
+            for neighbour_places in candidates[1:]:
+                for other in neighbour_places:
+                    if _is_close_duplicate(place, other, names):
+                        groups.union(place.id, other.id)
+
+    members: Dict[int, List[int]] = defaultdict(list)
+    for place_id in by_id:
+        members[groups.find(place_id)].append(place_id)
+
+    result = []
+    for group in members.values():
+        if len(group) < 2:
+            continue
+        keeper = min(group, key=lambda place_id: (-by_id[place_id].completeness, place_id))
+        result.append((keeper, sorted(place_id for place_id in group if place_id != keeper)))
+    return sorted(result)
@@ -0,0 +1,121 @@
+# app/services/recommendations.py
+# Offline math for place recommendations (NumPy/SciPy), used by the batch jobs
+# in scripts/. The API only reads the precomputed results.
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# (user_id, place_id, weight)
+Interaction = Tuple[int, int, float]
+
+
+class CooccurrenceAccumulator:
+    """
+    Accumulates the item-item co-occurrence matrix C = sum over users of x_u^T x_u,
+    where x_u is a user's (weighted) interaction vector. Users are added in chunks so
+    only one chunk's user x place matrix is in memory at a time.
+    The same product over binary vectors counts the distinct users behind every pair.
+    Place ids are mapped to dense indexes as they are first seen.
+    """
+
+    def __init__(self):
+        self.index_of: Dict[int, int] = {}
+        self.place_ids: List[int] = []
+        self._total: Optional[sparse.csr_matrix] = None
+        self._user_counts: Optional[sparse.csr_matrix] = None
+        self._users = 0
+
+    def _place_index(self, place_id: int) -> int:
+        index = self.index_of.get(place_id)
+        if index is None:
+            index = self.index_of[place_id] = len(self.place_ids)
+            self.place_ids.append(place_id)
+        return index
+
+    def add_chunk(self, interactions: Iterable[Interaction]) -> None:
+        """Adds the interactions of a group of users (every interaction of a user must be in the same chunk)."""
+        user_rows: Dict[int, int] = {}
+        rows, cols, weights = [], [], []
+        for user_id, place_id, weight in interactions:
+            rows.append(user_rows.setdefault(user_id, len(user_rows)))
+            cols.append(self._place_index(place_id))
+            weights.append(weight)
+        if not rows:
+            return
+        n_places = len(self.place_ids)
+        chunk = sparse.csr_matrix(
+            (np.asarray(weights, dtype=np.float32), (np.asarray(rows), np.asarray(cols))),
+            shape=(len(user_rows), n_places)
+        )
+        binary = chunk.copy()
+        binary.data[:] = 1
+        self._total = self._add(self._total, (chunk.T @ chunk).tocsr())
+        self._user_counts = self._add(self._user_counts, (binary.T @ binary).tocsr())
+        self._users += len(user_rows)
+
+    def _add(self, total: Optional[sparse.csr_matrix], product: sparse.csr_matrix) -> sparse.csr_matrix:
+        if total is None:
+            return product
+        # New places may have appeared in this chunk, grow the running sum first
+        n_places = len(self.place_ids)
+        total.resize((n_places, n_places))
+        return (total + product).tocsr()
+
+    def _square(self, matrix: Optional[sparse.csr_matrix]) -> sparse.csr_matrix:
+        n_places = len(self.place_ids)
+        if matrix is None:
+            return sparse.csr_matrix((n_places, n_places), dtype=np.float32)
+        matrix.resize((n_places, n_places))
+        return matrix
+
+    def finalize(self) -> sparse.csr_matrix:
+        """The accumulated place x place matrix (indexes follow place_ids)."""
+        total = self._square(self._total)
+        logger.info(f"Co-occurrence matrix: {len(self.place_ids)} places, {self._users} users, {total.nnz} non-zeros")
+        return total
+
+    def user_counts(self) -> sparse.csr_matrix:
+        """Number of distinct users who interacted with both places of every pair (same indexes)."""
+        return self._square(self._user_counts)
+
+
+def cosine_top_k(
+    cooccurrence: sparse.csr_matrix,
+    k: int,
+    user_counts: Optional[sparse.csr_matrix] = None,
+    min_users: int = 1
+) -> List[List[Tuple[int, float]]]:
+    """
+    Top-k neighbours of every row by cosine similarity C_ij / sqrt(C_ii * C_jj),
+    as lists of (column index, score) sorted by decreasing score. The diagonal is
+    skipped, and with `user_counts` so are pairs seen together by fewer than `min_users` users.
+    """
+    diagonal = cooccurrence.diagonal()
+    norms = np.sqrt(np.maximum(diagonal, 1e-12))
+    matrix = cooccurrence.tocsr()
+    if user_counts is not None and min_users > 1:
+        # Norms keep every user, only the pairs below the support threshold are dropped
+        matrix = matrix.multiply(user_counts >= min_users).tocsr()
+        matrix.eliminate_zeros()
+
+    neighbours: List[List[Tuple[int, float]]] = []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        cols = matrix.indices[start:end]
+        values = matrix.data[start:end]
+        keep = (cols != row) & (values > 0)
+        cols, values = cols[keep], values[keep]
+        if cols.size == 0:
+            neighbours.append([])
+            continue
+        scores = values / (norms[row] * norms[cols])
+        if cols.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            cols, scores = cols[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        neighbours.append([(int(cols[i]), float(scores[i])) for i in order])
+    return neighbours
@@ -0,0 +1,214 @@
+# app/services/route_optimizer.py
+# Orders a set of stops into short day routes: NumPy haversine distance matrix,
+# nearest-neighbour construction, then 2-opt improvement (vectorized per move
+# start, O(n^2) per pass). Optional opening-hours constraints and multi-day splits.
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.geo import EARTH_RADIUS_M
+from app.services.opening_hours import MINUTES_PER_DAY
+
+DEFAULT_DAY_START = 9 * 60 # 09:00
+DEFAULT_DAY_END = 20 * 60 # 20:00
+DEFAULT_VISIT_MINUTES = 60
+# Average door-to-door speed in a city (walking + transit)
+DEFAULT_SPEED_KMH = 15.0
+MAX_TWO_OPT_PASSES = 50
+
+
+@dataclass
+class Stop:
+    id: int
+    latitude: float
+    longitude: float
+    # Minute-of-week [start, end) intervals (opening_hours.compile_opening_hours), None = unknown/always open
+    opening_intervals: Optional[List[Tuple[int, int]]] = None
+
+
+@dataclass
+class ScheduledStop:
+    stop_index: int
+    arrival: int # Minutes since midnight of the day
+    departure: int
+    distance_from_previous_m: float
+
+
+@dataclass
+class DayPlan:
+    weekday: int # 0 = Monday
+    stops: List[ScheduledStop] = field(default_factory=list)
+    distance_m: float = 0.0
+
+
+def distance_matrix(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Pairwise great-circle distances in metres (n x n), same formula as geo.haversine_m."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    d_lat = lat[:, None] - lat[None, :]
+    d_lon = lon[:, None] - lon[None, :]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour_path(dist: np.ndarray, nodes: Sequence[int], start: int) -> List[int]:
+    """Greedy path over `nodes` from `start` (which may be outside `nodes`, e.g. a hotel)."""
+    remaining = np.array([node for node in nodes if node != start], dtype=np.int64)
+    path = [start] if start in nodes else []
+    current = start
+    while remaining.size:
+        nearest = int(np.argmin(dist[current, remaining]))
+        current = int(remaining[nearest])
+        path.append(current)
+        remaining = np.delete(remaining, nearest)
+    return path
+
+
+def two_opt(dist: np.ndarray, path: List[int], origin: Optional[int] = None) -> List[int]:
+    """
+    Improves an open path by reversing segments while that shortens it.
+    With `origin` the path is walked from that fixed node (not part of `path`),
+    otherwise both ends are free.
+    """
+    nodes = ([origin] if origin is not None else []) + list(path)
+    first = 1 if origin is not None else 0
+    n = len(nodes)
+    if n - first < 3:
+        return list(path)
+    order = np.array(nodes, dtype=np.int64)
+
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(first, n - 1):
+            # Reverse order[i..j] for every j > i at once
+            j = np.arange(i + 1, n)
+            before = order[i - 1] if i > 0 else None
+            after = np.where(j + 1 < n, order[np.minimum(j + 1, n - 1)], -1)
+            has_after = after >= 0
+
+            delta = np.zeros(j.size)
+            if before is not None:
+                delta += dist[before, order[j]] - dist[before, order[i]]
+            delta += np.where(has_after, dist[order[i], np.maximum(after, 0)] - dist[order[j], np.maximum(after, 0)], 0.0)
+
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-6:
+                end = int(j[best])
+                order[i:end + 1] = order[i:end + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return [int(node) for node in order[first:]]
+
+
+def _earliest_visit(stop: Stop, weekday: int, arrival: int, visit_minutes: int, day_end: int) -> Optional[int]:
+    """Earliest start >= arrival of a visit fully inside an opening interval and before day_end."""
+    if arrival + visit_minutes > day_end:
+        return None
+    if stop.opening_intervals is None:
+        return arrival
+    # Intervals are sorted on the week axis, shifted onto the day's axis
+    day_offset = weekday * MINUTES_PER_DAY
+    for start, end in stop.opening_intervals:
+        visit_start = max(arrival, start - day_offset)
+        if visit_start + visit_minutes <= min(end - day_offset, day_end):
+            return visit_start
+    return None
+
+
+class RoutePlanner:
+    """Plans stops over consecutive days starting on `first_weekday`."""
+
+    def __init__(
+        self,
+        stops: List[Stop],
+        *,
+        origin: Optional[Tuple[float, float]] = None, # (lat, lon) each day starts from, e.g. the hotel
+        day_start: int = DEFAULT_DAY_START,
+        day_end: int = DEFAULT_DAY_END,
+        visit_minutes: int = DEFAULT_VISIT_MINUTES,
+        speed_kmh: float = DEFAULT_SPEED_KMH,
+    ):
+        self.stops = stops
+        latitudes = [stop.latitude for stop in stops]
+        longitudes = [stop.longitude for stop in stops]
+        if origin is not None:
+            latitudes.append(origin[0])
+            longitudes.append(origin[1])
+        self.dist = distance_matrix(latitudes, longitudes)
+        self.origin = len(stops) if origin is not None else None
+        self.day_start = day_start
+        self.day_end = day_end
+        self.visit_minutes = visit_minutes
+        self.metres_per_minute = speed_kmh * 1000 / 60
+
+    def _travel_minutes(self, a: Optional[int], b: int) -> int:
+        return 0 if a is None else math.ceil(self.dist[a, b] / self.metres_per_minute)
+
+    def schedule_day(self, order: List[int], weekday: int) -> Optional[DayPlan]:
+        """Times for visiting `order` on one day, None if some stop can't be fitted."""
+        plan = DayPlan(weekday=weekday)
+        clock, previous = self.day_start, self.origin
+        for index in order:
+            arrival = clock + self._travel_minutes(previous, index)
+            visit_start = _earliest_visit(self.stops[index], weekday, arrival, self.visit_minutes, self.day_end)
+            if visit_start is None:
+                return None
+            travelled = 0.0 if previous is None else float(self.dist[previous, index])
+            plan.stops.append(ScheduledStop(index, visit_start, visit_start + self.visit_minutes, travelled))
+            plan.distance_m += travelled
+            clock, previous = visit_start + self.visit_minutes, index
+        return plan
+
+    def _cheapest_feasible_insertion(self, order: List[int], index: int, weekday: int) -> Optional[List[int]]:
+        """`order` with `index` inserted where it adds the least distance while staying feasible."""
+        best_order, best_distance = None, math.inf
+        for position in range(len(order) + 1):
+            candidate = order[:position] + [index] + order[position:]
+            plan = self.schedule_day(candidate, weekday)
+            if plan is not None and plan.distance_m < best_distance:
+                best_order, best_distance = candidate, plan.distance_m
+        return best_order
+
+    def plan(self, days: int = 1, first_weekday: int = 0) -> Tuple[List[DayPlan], List[int]]:
+        """
+        Returns (day plans, indexes of stops that fit on no day).
+        A global nearest-neighbour + 2-opt route gives the visiting order. Days are filled
+        along it up to an equal share of the stops, each stop inserted where it fits its
+        opening hours best; stops that don't fit move on to the next day. Each day's order
+        is then re-optimized with 2-opt when that keeps it feasible.
+        """
+        all_nodes = list(range(len(self.stops)))
+        if not all_nodes:
+            return [DayPlan(weekday=(first_weekday + day) % 7) for day in range(days)], []
+        if self.origin is not None:
+            start = self.origin
+        else:
+            # Start at the stop farthest from the others on average: routes sweep from one end
+            start = int(np.argmax(self.dist[:len(all_nodes), :len(all_nodes)].sum(axis=1)))
+        route = two_opt(self.dist, nearest_neighbour_path(self.dist, all_nodes, start), origin=self.origin)
+
+        plans: List[DayPlan] = []
+        remaining = route
+        for day in range(days):
+            weekday = (first_weekday + day) % 7
+            target = math.ceil(len(remaining) / (days - day)) if remaining else 0
+            chosen: List[int] = []
+            deferred: List[int] = []
+            for index in remaining:
+                order = self._cheapest_feasible_insertion(chosen, index, weekday) if len(chosen) < target else None
+                if order is not None:
+                    chosen = order
+                else:
+                    deferred.append(index)
+
+            plan = self.schedule_day(chosen, weekday)
+            improved_order = two_opt(self.dist, chosen, origin=self.origin)
+            improved_plan = self.schedule_day(improved_order, weekday)
+            if improved_plan is not None and improved_plan.distance_m < plan.distance_m:
+                plan = improved_plan
+            plans.append(plan)
+            remaining = deferred
+        return plans, remaining
@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware # If you need CORS later
 
 from app.core.config import settings
-from app.api.v1.endpoints import auth, cities, places, users # Import your auth router
+from app.api.v1.endpoints import auth, cities, places, search, users # Import your auth router
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -19,6 +19,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"], # Keyset pagination cursor for list endpoints
 )
 # Add other middlewares here if needed (e.g., logging, timing)
 
@@ -29,6 +30,7 @@ app.include_router(cities.router, prefix=settings.API_V1_STR + "/cities", tags=[
 # Add other routers here later (e.g., places)
 app.include_router(places.router, prefix=settings.API_V1_STR + "/places", tags=["Places"])
 app.include_router(users.router, prefix=settings.API_V1_STR + "/users", tags=["Users"]) # 
+app.include_router(search.router, prefix=settings.API_V1_STR + "/search", tags=["Search"])
 
 # --- Root Endpoint ---
 @app.get("/", tags=["Root"])
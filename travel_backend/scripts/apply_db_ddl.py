@@ -0,0 +1,47 @@
+# scripts/apply_db_ddl.py
+# Creates missing tables and applies the extra DDL from app/db/ddl.py
+# (extensions, functional indexes, triggers). Safe to run repeatedly.
+
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from sqlalchemy import text
+    from app.db.session import engine
+    from app.db.base_class import Base
+    from app.db import models # noqa: F401 - registers all tables on Base.metadata
+    from app.db import ddl
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("apply_db_ddl")
+
+
+async def apply_ddl():
+    async with engine.begin() as conn:
+        # Extensions first: new tables/indexes may depend on their types and functions
+        for statement in ddl.EXTENSIONS:
+            logger.info(f"Applying: {statement}")
+            await conn.execute(text(statement))
+        # Only creates tables that don't exist yet, existing ones are left untouched
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in ddl.STATEMENTS:
+            logger.info(f"Applying: {statement.strip().splitlines()[0]}")
+            await conn.execute(text(statement))
+    await engine.dispose()
+    logger.info("DDL applied.")
+
+
+if __name__ == "__main__":
+    asyncio.run(apply_ddl())
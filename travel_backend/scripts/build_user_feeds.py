@@ -0,0 +1,58 @@
+# scripts/build_user_feeds.py
+# Precomputes the "for you" feed candidates (user_feed_candidates) of every user
+# active in the last 30 days. Run after scripts/compute_similar_places.py and
+# scripts/refresh_popularity.py (e.g. nightly cron), since it builds on both.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.crud import crud_feed
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("build_user_feeds")
+
+DEFAULT_CHUNK_USERS = 500
+
+
+async def build_feeds(chunk_users: int):
+    total = 0
+    async with AsyncSessionLocal() as db:
+        last_id = 0
+        while True:
+            user_ids = await crud_feed.get_active_user_ids(db, after_id=last_id, limit=chunk_users)
+            if not user_ids:
+                break
+            try:
+                total += await crud_feed.build_feed_candidates(db, user_ids)
+                await db.commit() # Commit per chunk
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Feed build failed for users {user_ids[0]}-{user_ids[-1]}: {e}", exc_info=True)
+                raise
+            last_id = user_ids[-1]
+            logger.info(f"Processed users up to id {last_id} - {total} feeds so far")
+
+    await engine.dispose()
+    logger.info(f"Done. {total} feeds built.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute per-user feed candidates")
+    parser.add_argument("--chunk-users", type=int, default=DEFAULT_CHUNK_USERS)
+    args = parser.parse_args()
+    asyncio.run(build_feeds(chunk_users=args.chunk_users))
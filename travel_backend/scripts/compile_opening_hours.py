@@ -0,0 +1,73 @@
+# scripts/compile_opening_hours.py
+# Compiles places.opening_hours into places.opening_minutes in id batches.
+# Needed once after adding the column (scripts/apply_db_ddl.py), after bulk
+# imports that bypass the ORM, or with --all after changing the parser.
+# ORM writes are kept up to date by the mapper events on Place.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from sqlalchemy import select, update
+    from app.db import models
+    from app.db.models.place import opening_minutes_value
+    from app.db.session import AsyncSessionLocal, engine
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("compile_opening_hours")
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+async def compile_all(batch_size: int = DEFAULT_BATCH_SIZE, recompile: bool = False):
+    async with AsyncSessionLocal() as db:
+        last_id = 0
+        total = 0
+        unsupported = 0
+        while True:
+            stmt = select(models.Place.id, models.Place.opening_hours)\
+                   .where(models.Place.id > last_id, models.Place.opening_hours.is_not(None))\
+                   .order_by(models.Place.id).limit(batch_size)
+            if not recompile:
+                stmt = stmt.where(models.Place.opening_minutes.is_(None))
+            rows = (await db.execute(stmt)).all()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                value = opening_minutes_value(row.opening_hours)
+                if value is None:
+                    unsupported += 1
+                updates.append({"id": row.id, "opening_minutes": value})
+            # Bulk UPDATE by primary key (one executemany)
+            await db.execute(update(models.Place), updates)
+            await db.commit() # Commit per batch to keep locks short
+
+            last_id = rows[-1].id
+            total += len(rows)
+            logger.info(f"Compiled up to id {last_id} - {total} rows so far, {unsupported} unsupported")
+
+    await engine.dispose()
+    logger.info(f"Done. {total} places processed, {unsupported} with unsupported opening_hours syntax.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile places.opening_hours into places.opening_minutes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--all", action="store_true", help="Recompile every place, not only those never compiled")
+    args = parser.parse_args()
+    asyncio.run(compile_all(batch_size=args.batch_size, recompile=args.all))
@@ -0,0 +1,108 @@
+# scripts/compute_similar_places.py
+# Computes "similar places" from co-visitation and stores the top-K neighbours
+# of every place in place_similarities (served by GET /places/{place_id}/similar).
+#
+# Every user is a weighted vector over places (favorites + capped visit counts).
+# The place x place co-occurrence matrix is accumulated with SciPy sparse products,
+# chunked by user id range, then each row's top-K cosine neighbours are kept.
+# Run periodically (e.g. nightly cron).
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from sqlalchemy import delete, insert, text
+    from app.db import models
+    from app.db.session import AsyncSessionLocal, engine
+    from app.services.recommendations import CooccurrenceAccumulator, cosine_top_k
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("compute_similar_places")
+
+DEFAULT_TOP_K = 20
+DEFAULT_CHUNK_USERS = 5000
+INSERT_BATCH_SIZE = 5000
+# A favorite says more than a visit; repeated visits count, up to a cap
+FAVORITE_WEIGHT = 3.0
+VISIT_WEIGHT = 1.0
+MAX_VISITS_COUNTED = 5
+# Pairs seen together by a single user are noise, however strong that user's interest
+MIN_COOCCURRING_USERS = 2
+
+INTERACTIONS_SQL = text("""
+    SELECT user_id, place_id, sum(weight) AS weight
+    FROM (
+        SELECT user_id, place_id, CAST(:favorite_weight AS float8) AS weight
+        FROM user_favorites
+        WHERE user_id > :start_id AND user_id <= :end_id
+        UNION ALL
+        SELECT user_id, place_id, least(count(*), :max_visits) * CAST(:visit_weight AS float8)
+        FROM user_visit_history
+        WHERE user_id > :start_id AND user_id <= :end_id
+        GROUP BY user_id, place_id
+    ) AS interactions
+    GROUP BY user_id, place_id
+""")
+
+
+async def compute_similar_places(top_k: int, chunk_users: int):
+    accumulator = CooccurrenceAccumulator()
+    async with AsyncSessionLocal() as db:
+        max_user_id = (await db.execute(text("SELECT coalesce(max(id), 0) FROM users"))).scalar_one()
+        logger.info(f"Accumulating co-occurrences for user ids up to {max_user_id}, {chunk_users} per chunk")
+
+        start_id = 0
+        while start_id < max_user_id:
+            end_id = start_id + chunk_users
+            result = await db.execute(INTERACTIONS_SQL, {
+                "start_id": start_id, "end_id": end_id,
+                "favorite_weight": FAVORITE_WEIGHT, "visit_weight": VISIT_WEIGHT,
+                "max_visits": MAX_VISITS_COUNTED,
+            })
+            accumulator.add_chunk((row.user_id, row.place_id, row.weight) for row in result.all())
+            start_id = end_id
+
+        neighbours = cosine_top_k(
+            accumulator.finalize(), top_k,
+            user_counts=accumulator.user_counts(), min_users=MIN_COOCCURRING_USERS
+        )
+        rows = [
+            {"place_id": accumulator.place_ids[index], "similar_place_id": accumulator.place_ids[other], "score": score}
+            for index, place_neighbours in enumerate(neighbours)
+            for other, score in place_neighbours
+        ]
+
+        try:
+            # Replace everything in one transaction, readers keep the old lists until commit
+            await db.execute(delete(models.PlaceSimilarity))
+            for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+                await db.execute(insert(models.PlaceSimilarity), rows[offset:offset + INSERT_BATCH_SIZE])
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Storing similar places failed: {e}", exc_info=True)
+            raise
+        logger.info(f"Stored {len(rows)} neighbours for {sum(1 for n in neighbours if n)} places.")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute similar places from co-visitation")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--chunk-users", type=int, default=DEFAULT_CHUNK_USERS)
+    args = parser.parse_args()
+    asyncio.run(compute_similar_places(top_k=args.top_k, chunk_users=args.chunk_users))
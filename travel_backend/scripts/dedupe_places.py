@@ -0,0 +1,150 @@
+# scripts/dedupe_places.py
+# Finds and merges duplicate places (same OSM object, or near-identical names a few
+# metres apart; see app/services/place_dedupe.py for the geohash bucketing).
+# For each group the most complete place is kept: images, favorites, visits and
+# visit counters of the duplicates are moved to it, then the duplicates are deleted.
+# Run after imports, then refresh clusters/similarities (their rows of deleted
+# places are dropped by the foreign keys).
+# Use --dry-run first to review the groups.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from sqlalchemy import text
+    from app.db.session import AsyncSessionLocal, engine
+    from app.services import map_tiles
+    from app.services.place_dedupe import PlaceRecord, find_duplicate_groups
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("dedupe_places")
+
+LOAD_BATCH_SIZE = 20000
+DEFAULT_MERGE_BATCH_SIZE = 200
+
+LOAD_SQL = text("""
+    SELECT id, name, latitude, longitude, osm_type, osm_id,
+           (description IS NOT NULL)::int + (website IS NOT NULL)::int + (phone IS NOT NULL)::int
+           + (opening_hours IS NOT NULL)::int + (address IS NOT NULL)::int
+           + (attributes IS NOT NULL)::int AS completeness
+    FROM places
+    WHERE id > :last_id
+    ORDER BY id
+    LIMIT :limit
+""")
+
+# Every statement takes :keeper_id and :duplicate_ids (int[])
+MERGE_STATEMENTS = [
+    # Images: drop the duplicates' copies of URLs the keeper already has, move the rest
+    """
+    DELETE FROM place_images d
+    WHERE d.place_id = ANY(:duplicate_ids)
+      AND EXISTS (SELECT 1 FROM place_images k WHERE k.place_id = :keeper_id AND k.image_url = d.image_url)
+    """,
+    "UPDATE place_images SET place_id = :keeper_id WHERE place_id = ANY(:duplicate_ids)",
+    # Favorites: (user_id, place_id) is the primary key, users who favorited both keep one row
+    """
+    INSERT INTO user_favorites (user_id, place_id, created_at)
+    SELECT user_id, CAST(:keeper_id AS integer), min(created_at)
+    FROM user_favorites
+    WHERE place_id = ANY(:duplicate_ids)
+    GROUP BY user_id
+    ON CONFLICT (user_id, place_id) DO NOTHING
+    """,
+    "DELETE FROM user_favorites WHERE place_id = ANY(:duplicate_ids)",
+    "UPDATE user_visit_history SET place_id = :keeper_id WHERE place_id = ANY(:duplicate_ids)",
+    # Trending counters: add the duplicates' hourly counts to the keeper's
+    """
+    INSERT INTO place_visit_buckets (place_id, bucket_start, city_id, visit_count)
+    SELECT CAST(:keeper_id AS integer), bucket_start, (SELECT city_id FROM places WHERE id = :keeper_id), sum(visit_count)
+    FROM place_visit_buckets
+    WHERE place_id = ANY(:duplicate_ids)
+    GROUP BY bucket_start
+    ON CONFLICT (place_id, bucket_start)
+    DO UPDATE SET visit_count = place_visit_buckets.visit_count + EXCLUDED.visit_count
+    """,
+    "DELETE FROM place_visit_buckets WHERE place_id = ANY(:duplicate_ids)",
+    # Keep the accumulated popularity until the next full refresh recomputes it
+    """
+    UPDATE places SET popularity_score = popularity_score
+        + (SELECT coalesce(sum(popularity_score), 0) FROM places WHERE id = ANY(:duplicate_ids))
+    WHERE id = :keeper_id
+    """,
+    # Remaining references (similarities, cluster representatives) go with the foreign keys
+    "DELETE FROM places WHERE id = ANY(:duplicate_ids)",
+]
+
+
+async def load_places(db):
+    places = []
+    last_id = 0
+    while True:
+        rows = (await db.execute(LOAD_SQL, {"last_id": last_id, "limit": LOAD_BATCH_SIZE})).all()
+        if not rows:
+            break
+        places.extend(
+            PlaceRecord(
+                id=row.id, name=row.name, latitude=row.latitude, longitude=row.longitude,
+                osm_type=row.osm_type, osm_id=row.osm_id, completeness=row.completeness
+            )
+            for row in rows
+        )
+        last_id = rows[-1].id
+    return places
+
+
+async def dedupe_places(dry_run: bool, merge_batch_size: int):
+    async with AsyncSessionLocal() as db:
+        places = await load_places(db)
+        logger.info(f"Loaded {len(places)} places, looking for duplicates...")
+        groups = find_duplicate_groups(places)
+        duplicate_count = sum(len(duplicates) for _, duplicates in groups)
+        logger.info(f"Found {len(groups)} duplicate groups, {duplicate_count} places to merge")
+
+        if dry_run:
+            names = {place.id: place.name for place in places}
+            for keeper_id, duplicate_ids in groups:
+                logger.info(f"  keep {keeper_id} '{names[keeper_id]}' <- {[(i, names[i]) for i in duplicate_ids]}")
+            groups = [] # Nothing to merge
+
+        merged = 0
+        for offset in range(0, len(groups), merge_batch_size):
+            batch = groups[offset:offset + merge_batch_size]
+            try:
+                for keeper_id, duplicate_ids in batch:
+                    params = {"keeper_id": keeper_id, "duplicate_ids": duplicate_ids}
+                    for statement in MERGE_STATEMENTS:
+                        await db.execute(text(statement), params)
+                await db.commit() # Commit per batch of groups to keep transactions short
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Merging groups {offset}-{offset + len(batch)} failed: {e}", exc_info=True)
+                raise
+            merged += sum(len(duplicate_ids) for _, duplicate_ids in batch)
+            logger.info(f"Merged {merged}/{duplicate_count} duplicates")
+
+    if groups:
+        map_tiles.purge_tile_cache() # Tiles still contain the deleted markers
+    await engine.dispose()
+    logger.info(f"Done. {merged} duplicate places merged.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find and merge duplicate places")
+    parser.add_argument("--dry-run", action="store_true", help="Only log the duplicate groups")
+    parser.add_argument("--merge-batch-size", type=int, default=DEFAULT_MERGE_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(dedupe_places(dry_run=args.dry_run, merge_batch_size=args.merge_batch_size))
@@ -0,0 +1,49 @@
+# scripts/maintain_visit_buckets.py
+# Maintenance of the hourly visit counters behind GET /places/trending.
+# Default: prune buckets older than the longest trending window (run daily).
+# --rebuild: recreate the retained buckets from user_visit_history (initial backfill/repair).
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.crud import crud_popularity
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("maintain_visit_buckets")
+
+
+async def maintain_buckets(rebuild: bool):
+    async with AsyncSessionLocal() as db:
+        try:
+            if rebuild:
+                await crud_popularity.rebuild_visit_buckets(db)
+            else:
+                await crud_popularity.prune_visit_buckets(db)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Visit bucket maintenance failed: {e}", exc_info=True)
+            raise
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune or rebuild place_visit_buckets")
+    parser.add_argument("--rebuild", action="store_true", help="Recreate buckets from user_visit_history")
+    args = parser.parse_args()
+    asyncio.run(maintain_buckets(rebuild=args.rebuild))
@@ -0,0 +1,60 @@
+# scripts/rebuild_place_fts.py
+# Recomputes places.fts_vector for every row in id batches.
+# Needed once after installing the trigger (scripts/apply_db_ddl.py),
+# or after changing place_fts_vector_sql. New writes are kept up to date by the trigger.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from sqlalchemy import text
+    from app.db.session import AsyncSessionLocal, engine
+    from app.db.ddl import place_fts_vector_sql
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("rebuild_place_fts")
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+async def rebuild_fts(batch_size: int = DEFAULT_BATCH_SIZE):
+    update_stmt = text(
+        f"UPDATE places SET fts_vector = {place_fts_vector_sql()} "
+        "WHERE id > :start_id AND id <= :end_id"
+    )
+    async with AsyncSessionLocal() as db:
+        max_id = (await db.execute(text("SELECT coalesce(max(id), 0) FROM places"))).scalar_one()
+        logger.info(f"Rebuilding fts_vector for ids up to {max_id} in batches of {batch_size}")
+
+        start_id = 0
+        total = 0
+        while start_id < max_id:
+            end_id = start_id + batch_size
+            result = await db.execute(update_stmt, {"start_id": start_id, "end_id": end_id})
+            await db.commit() # Commit per batch to keep locks and WAL bursts short
+            total += result.rowcount
+            logger.info(f"Updated ids ({start_id}, {end_id}] - {total} rows so far")
+            start_id = end_id
+
+    await engine.dispose()
+    logger.info(f"Done. {total} places updated.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild places.fts_vector")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(rebuild_fts(batch_size=args.batch_size))
@@ -0,0 +1,49 @@
+# scripts/refresh_city_centroids.py
+# Recomputes cities.latitude/longitude as the median of their places' coordinates
+# (used for weather lookups and city-level geo features).
+# New places only seed the coordinates of cities that have none, so run this after
+# place imports/deduplication, or periodically (e.g. nightly cron).
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.crud import crud_city
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("refresh_city_centroids")
+
+
+async def refresh_city_centroids(city_ids):
+    async with AsyncSessionLocal() as db:
+        try:
+            centroids = await crud_city.refresh_city_centroids(db, city_ids=city_ids)
+            await db.commit()
+            logger.info(f"Done. {len(centroids)} city centroids changed.")
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"City centroid refresh failed: {e}", exc_info=True)
+            raise
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute city centroids from place coordinates")
+    parser.add_argument("--city-id", type=int, action="append", dest="city_ids",
+                        help="Only refresh this city (repeatable), default is every city")
+    args = parser.parse_args()
+    asyncio.run(refresh_city_centroids(city_ids=args.city_ids))
@@ -0,0 +1,49 @@
+# scripts/refresh_place_clusters.py
+# Rebuilds the precomputed map clusters (place_clusters) for every zoom level.
+# Run after place imports/deduplication, or periodically (e.g. hourly cron).
+# Also purges the cached binary marker tiles so they are regenerated from current data.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.crud import crud_map
+    from app.services import map_tiles
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("refresh_place_clusters")
+
+
+async def refresh_clusters(max_zoom: int):
+    async with AsyncSessionLocal() as db:
+        try:
+            total = await crud_map.rebuild_place_clusters(db, max_zoom=max_zoom)
+            await db.commit() # Swap in all levels at once
+            logger.info(f"Committed {total} clusters.")
+            map_tiles.purge_tile_cache()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Cluster rebuild failed: {e}", exc_info=True)
+            raise
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild precomputed place clusters")
+    parser.add_argument("--max-zoom", type=int, default=crud_map.CLUSTER_MAX_ZOOM)
+    args = parser.parse_args()
+    asyncio.run(refresh_clusters(max_zoom=args.max_zoom))
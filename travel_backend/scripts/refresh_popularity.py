@@ -0,0 +1,44 @@
+# scripts/refresh_popularity.py
+# Recomputes places.popularity_score (favorites + time-decayed visits), then
+# cities.popularity_score (population, number of places, their popularity).
+# Run periodically (e.g. hourly cron): between runs place scores only receive
+# the undecayed increments from new favorites/visits.
+
+import asyncio
+import logging
+import os
+import sys
+
+# --- Add project root to path to allow imports from app ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# --- End path adjustment ---
+
+try:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.crud import crud_popularity
+except ImportError as e:
+    print(f"Error importing app components: {e}")
+    sys.exit(1)
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("refresh_popularity")
+
+
+async def refresh_popularity():
+    async with AsyncSessionLocal() as db:
+        try:
+            await crud_popularity.refresh_place_popularity(db)
+            await crud_popularity.refresh_city_popularity(db)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Popularity refresh failed: {e}", exc_info=True)
+            raise
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(refresh_popularity())
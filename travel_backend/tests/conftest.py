@@ -0,0 +1,8 @@
+# tests/conftest.py
+import os
+import sys
+
+# --- Add project root to path to allow imports from app (same as scripts/) ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
@@ -0,0 +1,51 @@
+# tests/test_geo.py
+import pytest
+
+from app.services.geo import geohash_bounds, geohash_encode, geohash_neighbours, haversine_m
+
+
+def test_geohash_encode_known_values():
+    # Reference values from the original geohash.org implementation
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash_encode(48.8584, 2.2945, 7) == "u09tunq"
+    assert geohash_encode(-33.8568, 151.2153, 5) == "r3gx2"
+
+
+def test_geohash_bounds_contain_the_encoded_point():
+    lat, lon = 40.6892, -74.0445
+    for precision in range(1, 10):
+        min_lon, min_lat, max_lon, max_lat = geohash_bounds(geohash_encode(lat, lon, precision))
+        assert min_lat <= lat < max_lat
+        assert min_lon <= lon < max_lon
+
+
+def test_geohash_neighbours_surround_the_cell():
+    cell = geohash_encode(48.8584, 2.2945, 7)
+    min_lon, min_lat, max_lon, max_lat = geohash_bounds(cell)
+    height, width = max_lat - min_lat, max_lon - min_lon
+    centre_lat, centre_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+    expected = {
+        geohash_encode(centre_lat + d_lat * height, centre_lon + d_lon * width, 7)
+        for d_lat in (-1, 0, 1) for d_lon in (-1, 0, 1) if (d_lat, d_lon) != (0, 0)
+    }
+    neighbours = geohash_neighbours(cell)
+    assert len(neighbours) == 8
+    assert set(neighbours) == expected
+
+
+def test_geohash_neighbours_wrap_around_the_antimeridian():
+    cell = geohash_encode(0.1, 179.9999, 5)
+    west_of_antimeridian = geohash_encode(0.1, -179.9999, 5)
+    assert west_of_antimeridian in geohash_neighbours(cell)
+
+
+def test_geohash_neighbours_at_the_pole():
+    neighbours = geohash_neighbours(geohash_encode(89.99, 0.0, 4))
+    assert len(set(neighbours)) == len(neighbours) == 5
+
+
+def test_haversine_m():
+    # Eiffel Tower -> Louvre, ~3.2 km
+    assert haversine_m(48.8584, 2.2945, 48.8606, 2.3376) == pytest.approx(3160, rel=0.01)
+    assert haversine_m(10.0, 20.0, 10.0, 20.0) == 0.0
@@ -0,0 +1,54 @@
+# tests/test_map_tiles.py
+import struct
+
+from app.services.map_tiles import MARKER_STRUCT, MAX_CATEGORIES, OTHER_CATEGORY, TILE_MAGIC, encode_tile
+
+BOUNDS = (2.0, 48.0, 3.0, 49.0)
+
+
+def decode_tile(data: bytes):
+    assert data[:4] == TILE_MAGIC
+    offset = 4
+    (n_categories,) = struct.unpack_from("<B", data, offset)
+    offset += 1
+    categories = []
+    for _ in range(n_categories):
+        (length,) = struct.unpack_from("<B", data, offset)
+        categories.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    (n_markers,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    markers = [MARKER_STRUCT.unpack_from(data, offset + i * MARKER_STRUCT.size) for i in range(n_markers)]
+    return categories, markers
+
+
+def marker(id, category, lon=2.5, lat=48.5):
+    return {"id": id, "longitude": lon, "latitude": lat, "category": category}
+
+
+def test_round_trip():
+    categories, markers = decode_tile(encode_tile(
+        [marker(1, "museum", 2.0, 49.0), marker(2, "museum", 3.0, 48.0), marker(3, None)], BOUNDS
+    ))
+    assert categories == ["museum", OTHER_CATEGORY]
+    assert markers == [(1, 0, 0, 0), (2, 65535, 65535, 0), (3, 32768, 32768, 1)]
+
+
+def test_overflow_categories_share_the_last_index():
+    # More categories than fit, plus a real "other" category that is among the most frequent
+    markers = [marker(1000 + i, OTHER_CATEGORY) for i in range(5)]
+    markers += [marker(i, f"category-{i:03d}") for i in range(300)]
+    categories, encoded = decode_tile(encode_tile(markers, BOUNDS))
+
+    assert len(categories) == MAX_CATEGORIES
+    assert categories.count(OTHER_CATEGORY) == 1
+    assert categories[-1] == OTHER_CATEGORY
+    index_of = {place_id: category_index for place_id, _, _, category_index in encoded}
+    assert index_of[1000] == MAX_CATEGORIES - 1
+    assert index_of[299] == MAX_CATEGORIES - 1
+    assert categories[index_of[0]] == "category-000"
+
+
+def test_long_category_names_are_cut_on_a_character_boundary():
+    categories, _ = decode_tile(encode_tile([marker(1, "é" * 200)], BOUNDS)) # 400 bytes
+    assert categories == ["é" * 127]
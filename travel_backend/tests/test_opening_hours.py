@@ -0,0 +1,88 @@
+# tests/test_opening_hours.py
+import datetime
+
+import pytest
+
+from app.services.opening_hours import (
+    MINUTES_PER_DAY, MINUTES_PER_WEEK, compile_opening_hours, is_open_at, minute_of_week, resolve_timezone
+)
+
+MO, TU, WE, TH, FR, SA, SU = (day * MINUTES_PER_DAY for day in range(7))
+
+
+def hm(hours, minutes=0):
+    return hours * 60 + minutes
+
+
+def test_weekday_range():
+    assert compile_opening_hours("Mo-Fr 09:00-17:00") == [
+        (day + hm(9), day + hm(17)) for day in (MO, TU, WE, TH, FR)
+    ]
+
+
+def test_day_range_wrapping_past_sunday():
+    assert compile_opening_hours("Su-Tu 10:00-12:00") == [
+        (MO + hm(10), MO + hm(12)), (TU + hm(10), TU + hm(12)), (SU + hm(10), SU + hm(12))
+    ]
+
+
+def test_span_past_midnight():
+    assert compile_opening_hours("Fr 22:00-02:00") == [(FR + hm(22), SA + hm(2))]
+    # Sunday night continues into Monday morning
+    assert compile_opening_hours("Su 22:00-02:00") == [(0, hm(2)), (SU + hm(22), MINUTES_PER_WEEK)]
+
+
+def test_24_7():
+    assert compile_opening_hours("24/7") == [(0, MINUTES_PER_WEEK)]
+    assert compile_opening_hours(" 24/7 ") == [(0, MINUTES_PER_WEEK)]
+
+
+def test_off_replaces_earlier_rules():
+    assert compile_opening_hours("Mo-Sa 09:00-17:00; We off") == [
+        (day + hm(9), day + hm(17)) for day in (MO, TU, TH, FR, SA)
+    ]
+    assert compile_opening_hours("off") == []
+    assert compile_opening_hours("closed") == []
+
+
+def test_several_times_and_additional_rules():
+    assert compile_opening_hours("Mo 09:00-12:00,14:00-18:00") == [(MO + hm(9), MO + hm(12)), (MO + hm(14), MO + hm(18))]
+    assert compile_opening_hours("Mo 09:00-12:00, Tu 10:00-11:00") == [(MO + hm(9), MO + hm(12)), (TU + hm(10), TU + hm(11))]
+    assert compile_opening_hours("Sa 10:00-24:00") == [(SA + hm(10), SU)]
+
+
+def test_holiday_rules_are_skipped():
+    weekdays = compile_opening_hours("Mo-Fr 09:00-17:00")
+    assert compile_opening_hours("Mo-Fr 09:00-17:00; PH off") == weekdays
+    assert compile_opening_hours("Mo-Fr 09:00-17:00; SH 10:00-12:00") == weekdays
+    assert compile_opening_hours("Mo-Fr,PH 09:00-17:00") == weekdays
+    assert compile_opening_hours("PH off") == []
+
+
+@pytest.mark.parametrize("value", [None, "", "  ", "sunrise-sunset", "Jan-Mar 09:00-17:00", "Mo 25:00-26:00", "Mo 09:60-10:00"])
+def test_unsupported_or_invalid_is_unknown(value):
+    assert compile_opening_hours(value) is None
+
+
+def test_is_open_at():
+    intervals = compile_opening_hours("Mo-Fr 09:00-17:00")
+    assert is_open_at(intervals, MO + hm(9))
+    assert not is_open_at(intervals, MO + hm(17))
+    assert not is_open_at(intervals, SA + hm(12))
+
+
+def test_minute_of_week():
+    assert minute_of_week(datetime.datetime(2024, 1, 1, 0, 0)) == 0 # A Monday
+    assert minute_of_week(datetime.datetime(2024, 1, 3, 9, 30)) == WE + hm(9, 30)
+    assert minute_of_week(datetime.datetime(2024, 1, 7, 23, 59)) == MINUTES_PER_WEEK - 1
+
+
+def test_resolve_timezone():
+    assert resolve_timezone("Asia/Kolkata").key == "Asia/Kolkata"
+    moment = datetime.datetime(2024, 1, 1, 12, 0)
+    assert resolve_timezone("UTC+05:30").utcoffset(moment) == datetime.timedelta(hours=5, minutes=30)
+    assert resolve_timezone("UTC-3").utcoffset(moment) == datetime.timedelta(hours=-3)
+    assert resolve_timezone("GMT−0430").utcoffset(moment) == datetime.timedelta(hours=-4, minutes=-30)
+    assert resolve_timezone("Indian Standard Time") is None
+    assert resolve_timezone(None) is None
+    assert resolve_timezone("") is None
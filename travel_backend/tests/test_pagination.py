@@ -0,0 +1,37 @@
+# tests/test_pagination.py
+import pytest
+
+from app.core.pagination import NUMBER, InvalidCursorError, decode_cursor, encode_cursor, next_cursor
+
+
+def test_round_trip():
+    cursor = encode_cursor("popular", [12.5, 42])
+    assert decode_cursor(cursor, "popular", (NUMBER, int)) == [12.5, 42]
+    assert decode_cursor(encode_cursor("name_asc", ["Louvre", 7]), "name_asc", (str, int)) == ["Louvre", 7]
+
+
+def test_integral_scores_are_numbers():
+    assert decode_cursor(encode_cursor("popular", [0, 1]), "popular", (NUMBER, int)) == [0, 1]
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm90IGpzb24", encode_cursor("popular", [1.0, 2])[:-3]])
+def test_garbage_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "popular", (NUMBER, int))
+
+
+def test_other_sort_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor("name_asc", ["a", 1]), "popular", (NUMBER, int))
+
+
+@pytest.mark.parametrize("key", [[], [1.0], [1.0, 2, 3], ["a", 2], [1.0, "2"], [1.0, 2.5], [1.0, True], [None, 2]])
+def test_wrong_key_shape_is_rejected(key):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor("popular", key), "popular", (NUMBER, int))
+
+
+def test_next_cursor():
+    rows = [{"id": 1}, {"id": 2}]
+    assert next_cursor("id", rows, 3, lambda row: [row["id"]]) is None
+    assert decode_cursor(next_cursor("id", rows, 2, lambda row: [row["id"]]), "id", (int,)) == [2]
@@ -0,0 +1,87 @@
+# tests/test_place_dedupe.py
+from app.services.geo import geohash_encode
+from app.services.place_dedupe import PlaceRecord, find_duplicate_groups, normalize_name
+
+# Eiffel Tower, and offsets of roughly 10 m / 1 km
+LAT, LON = 48.8584, 2.2945
+NEAR = 0.0001
+FAR = 0.01
+
+
+def place(id, name, lat=LAT, lon=LON, osm_id=None, osm_type="node", completeness=0):
+    return PlaceRecord(
+        id=id, name=name, latitude=lat, longitude=lon,
+        osm_type=osm_type if osm_id else None, osm_id=osm_id, completeness=completeness
+    )
+
+
+def test_normalize_name():
+    assert normalize_name("  Café de  Flore! ") == "café de flore"
+    assert normalize_name("St. Mary's") == "st mary s"
+
+
+def test_same_osm_object_is_merged_wherever_it_is():
+    groups = find_duplicate_groups([
+        place(1, "Louvre", osm_id="42"),
+        place(2, "Musée du Louvre", lat=LAT + FAR, osm_id="42"),
+        place(3, "Louvre", osm_id="42", osm_type="way"), # Other OSM object type
+    ])
+    assert groups == [(1, [2])]
+
+
+def test_similar_names_close_by_are_merged():
+    groups = find_duplicate_groups([
+        place(1, "Café de Flore"),
+        place(2, "Cafe de Flore", lat=LAT + NEAR),
+        place(3, "Cafe de Flore", lat=LAT + FAR), # Too far away
+        place(4, "Les Deux Magots", lat=LAT + NEAR), # Different name
+    ])
+    assert groups == [(1, [2])]
+
+
+def test_names_with_different_numbers_are_not_merged():
+    groups = find_duplicate_groups([
+        place(1, "Terminal 1"),
+        place(2, "Terminal 2", lat=LAT + NEAR),
+        place(3, "Gate A12"),
+        place(4, "Gate A13", lon=LON + NEAR),
+    ])
+    assert groups == []
+
+
+def test_different_osm_objects_are_never_merged_by_name():
+    groups = find_duplicate_groups([
+        place(1, "Starbucks", osm_id="1"),
+        place(2, "Starbucks", lat=LAT + NEAR, osm_id="2"),
+    ])
+    assert groups == []
+
+
+def test_unmapped_row_does_not_chain_two_osm_objects():
+    groups = find_duplicate_groups([
+        place(1, "Starbucks", osm_id="1"),
+        place(2, "Starbucks", lat=LAT + NEAR),
+        place(3, "Starbucks", lat=LAT + 2 * NEAR, osm_id="2"),
+    ])
+    assert len(groups) == 1
+    keeper, duplicates = groups[0]
+    assert {keeper, *duplicates} in ({1, 2}, {2, 3})
+
+
+def test_most_complete_place_is_kept():
+    groups = find_duplicate_groups([
+        place(1, "Louvre", completeness=1),
+        place(2, "Louvre", lat=LAT + NEAR, completeness=4),
+        place(3, "Louvre", lon=LON + NEAR, completeness=4),
+    ])
+    assert groups == [(2, [1, 3])]
+
+
+def test_neighbouring_geohash_cells_are_compared():
+    # A precision 7 cell boundary runs between these two points
+    lat = 48.85840
+    lon_west, lon_east = 2.29454, 2.29456
+    while geohash_encode(lat, lon_west, 7) == geohash_encode(lat, lon_east, 7):
+        lon_east += 0.00005
+    groups = find_duplicate_groups([place(1, "Louvre", lon=lon_west), place(2, "Louvre", lon=lon_east)])
+    assert groups == [(1, [2])]
@@ -0,0 +1,65 @@
+# tests/test_places_sparse_fields.py
+# GET /places/?fields=... must only read the columns it loaded: in an AsyncSession
+# touching an unloaded column raises MissingGreenlet instead of lazy loading.
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.core.config import settings
+from app.crud import crud_place
+from main import app
+
+# Only the list columns, enough for the queries of a plain name-sorted listing
+PLACES_DDL = """
+    CREATE TABLE places (
+        id INTEGER PRIMARY KEY, name TEXT, latitude FLOAT, longitude FLOAT,
+        category TEXT, address TEXT, city_id INTEGER
+    )
+"""
+
+
+@pytest.fixture
+def client(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'places.db'}")
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.execute(text(PLACES_DDL))
+            await conn.execute(text(
+                "INSERT INTO places VALUES"
+                " (1, 'Louvre', 48.86, 2.34, 'museum', 'Rue de Rivoli', 7),"
+                " (2, 'Eiffel Tower', 48.86, 2.29, 'attraction', 'Champ de Mars', 7)"
+            ))
+    asyncio.run(setup())
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    crud_place.places_cache.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    crud_place.places_cache.clear()
+    asyncio.run(engine.dispose())
+
+
+def test_list_with_subset_fieldset(client):
+    response = client.get(f"{settings.API_V1_STR}/places/", params={"fields": "name,category"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": 2, "name": "Eiffel Tower", "category": "attraction"},
+        {"id": 1, "name": "Louvre", "category": "museum"},
+    ]
+
+
+def test_list_with_single_field(client):
+    response = client.get(f"{settings.API_V1_STR}/places/", params={"fields": "latitude"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": 2, "latitude": 48.86}, {"id": 1, "latitude": 48.86}]
@@ -0,0 +1,59 @@
+# tests/test_recommendations.py
+import numpy as np
+import pytest
+
+from app.services.recommendations import CooccurrenceAccumulator, cosine_top_k
+
+
+def accumulate(*chunks):
+    accumulator = CooccurrenceAccumulator()
+    for chunk in chunks:
+        accumulator.add_chunk(chunk)
+    return accumulator
+
+
+def neighbour_ids(accumulator, neighbours, place_id):
+    return [accumulator.place_ids[other] for other, _ in neighbours[accumulator.index_of[place_id]]]
+
+
+def test_chunks_add_up_to_the_full_product():
+    interactions = [(1, 10, 3.0), (1, 20, 1.0), (2, 20, 2.0), (2, 30, 1.0), (3, 10, 1.0), (3, 30, 4.0)]
+    chunked = accumulate(interactions[:2], interactions[2:4], interactions[4:])
+    whole = accumulate(interactions)
+
+    order = [chunked.index_of[place_id] for place_id in whole.place_ids]
+    np.testing.assert_allclose(chunked.finalize().toarray()[np.ix_(order, order)], whole.finalize().toarray())
+    assert whole.finalize()[whole.index_of[10], whole.index_of[30]] == pytest.approx(4.0)
+    assert whole.user_counts()[whole.index_of[10], whole.index_of[30]] == 1
+
+
+def test_user_counts_count_distinct_users_not_weights():
+    accumulator = accumulate([(1, 10, 3.0), (1, 20, 3.0), (2, 10, 1.0), (2, 20, 1.0), (2, 30, 1.0)])
+    counts = accumulator.user_counts()
+    index = accumulator.index_of
+    assert counts[index[10], index[20]] == 2
+    assert counts[index[10], index[30]] == 1
+    assert counts[index[10], index[10]] == 2
+
+
+def test_pairs_of_a_single_user_are_dropped_whatever_their_weight():
+    # User 1 strongly likes 10 and 30 (e.g. two favorites), only 10/20 is shared by two users
+    accumulator = accumulate([
+        (1, 10, 9.0), (1, 30, 9.0),
+        (2, 10, 1.0), (2, 20, 1.0),
+        (3, 10, 1.0), (3, 20, 1.0),
+    ])
+    neighbours = cosine_top_k(accumulator.finalize(), 5, user_counts=accumulator.user_counts(), min_users=2)
+    assert neighbour_ids(accumulator, neighbours, 10) == [20]
+    assert neighbour_ids(accumulator, neighbours, 30) == []
+
+    unfiltered = cosine_top_k(accumulator.finalize(), 5)
+    assert set(neighbour_ids(accumulator, unfiltered, 10)) == {20, 30}
+
+
+def test_top_k_scores_are_cosine_and_sorted():
+    accumulator = accumulate([(1, 10, 1.0), (1, 20, 1.0), (2, 10, 1.0), (2, 20, 1.0), (2, 30, 1.0), (3, 30, 1.0)])
+    neighbours = cosine_top_k(accumulator.finalize(), 1)
+    (other, score), = neighbours[accumulator.index_of[10]]
+    assert accumulator.place_ids[other] == 20
+    assert score == pytest.approx(1.0) # 2 / sqrt(2 * 2)
@@ -0,0 +1,90 @@
+# tests/test_route_optimizer.py
+import random
+
+from app.services.opening_hours import MINUTES_PER_DAY, compile_opening_hours
+from app.services.route_optimizer import RoutePlanner, Stop, distance_matrix, nearest_neighbour_path, two_opt
+
+
+def path_length(dist, path, origin=None):
+    nodes = ([origin] if origin is not None else []) + list(path)
+    return sum(dist[a, b] for a, b in zip(nodes, nodes[1:]))
+
+
+def random_points(n, seed=7):
+    rng = random.Random(seed)
+    return [(48.85 + rng.uniform(-0.05, 0.05), 2.35 + rng.uniform(-0.05, 0.05)) for _ in range(n)]
+
+
+def test_distance_matrix_is_symmetric_with_zero_diagonal():
+    points = random_points(5)
+    dist = distance_matrix([lat for lat, _ in points], [lon for _, lon in points])
+    assert dist.shape == (5, 5)
+    assert (dist.diagonal() == 0).all()
+    assert (abs(dist - dist.T) < 1e-6).all()
+
+
+def test_two_opt_shortens_a_crossing_route():
+    points = random_points(30)
+    dist = distance_matrix([lat for lat, _ in points], [lon for _, lon in points])
+    shuffled = list(range(30))
+    random.Random(1).shuffle(shuffled)
+
+    improved = two_opt(dist, shuffled)
+    assert sorted(improved) == list(range(30))
+    assert path_length(dist, improved) < path_length(dist, shuffled)
+    # Never worse than the greedy construction it usually starts from
+    greedy = nearest_neighbour_path(dist, list(range(30)), 0)
+    assert path_length(dist, two_opt(dist, greedy)) <= path_length(dist, greedy) + 1e-6
+
+
+def test_two_opt_keeps_the_origin_first():
+    points = random_points(12)
+    dist = distance_matrix([lat for lat, _ in points], [lon for _, lon in points])
+    origin = 11
+    path = list(range(11))
+    improved = two_opt(dist, path, origin=origin)
+    assert origin not in improved
+    assert sorted(improved) == path
+    assert path_length(dist, improved, origin) <= path_length(dist, path, origin) + 1e-6
+
+
+def test_planner_starts_each_day_at_the_origin():
+    points = random_points(6)
+    stops = [Stop(id=i, latitude=lat, longitude=lon) for i, (lat, lon) in enumerate(points)]
+    origin = (48.85, 2.35)
+    planner = RoutePlanner(stops, origin=origin)
+    plans, unscheduled = planner.plan(days=2)
+
+    assert unscheduled == []
+    assert sorted(stop.stop_index for plan in plans for stop in plan.stops) == list(range(6))
+    for plan in plans:
+        first = plan.stops[0]
+        # The first leg is measured from the origin, not from another stop
+        assert first.distance_from_previous_m == planner.dist[planner.origin, first.stop_index]
+
+
+def test_opening_hours_windows_are_respected():
+    points = random_points(4)
+    hours = ["Mo-Su 09:00-20:00", "Mo-Su 14:00-16:00", "Mo-Su 10:00-11:30", "Tu 09:00-20:00"]
+    stops = [
+        Stop(id=i, latitude=lat, longitude=lon, opening_intervals=compile_opening_hours(value))
+        for i, ((lat, lon), value) in enumerate(zip(points, hours))
+    ]
+    plans, unscheduled = RoutePlanner(stops).plan(days=2, first_weekday=0) # Monday, Tuesday
+
+    scheduled = {stop.stop_index: (plan.weekday, stop) for plan in plans for stop in plan.stops}
+    assert unscheduled == []
+    assert scheduled[3][0] == 1 # Only open on Tuesday
+    for index, (weekday, stop) in scheduled.items():
+        start, end = weekday * MINUTES_PER_DAY + stop.arrival, weekday * MINUTES_PER_DAY + stop.departure
+        assert any(open_ <= start and end <= close for open_, close in stops[index].opening_intervals)
+
+
+def test_stops_that_never_fit_are_reported():
+    stops = [
+        Stop(id=0, latitude=48.85, longitude=2.35),
+        Stop(id=1, latitude=48.86, longitude=2.36, opening_intervals=compile_opening_hours("Su 09:00-20:00")),
+    ]
+    plans, unscheduled = RoutePlanner(stops).plan(days=1, first_weekday=0)
+    assert unscheduled == [1]
+    assert [stop.stop_index for stop in plans[0].stops] == [0]